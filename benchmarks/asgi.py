@@ -0,0 +1,124 @@
+"""
+Параллельное чтение каталога и корзины: WSGI (пул потоков) против ASGI.
+
+Режимы:
+  wsgi        — sync-вьюхи, каждый запрос в своём потоке пула (как threaded WSGI-сервер);
+  asgi-sync   — ASGI с прежними sync-вьюхами (переход в поток на каждый запрос);
+  asgi-async  — ASGI с async-вьюхами (shop.async_views).
+
+Запросы идут через тестовые клиенты Django в одном процессе, без сети,
+поэтому сравнивается именно обработка конкурентных запросов фреймворком.
+
+    python -m benchmarks.asgi --products 10000 --requests 500 --concurrency 1 10 50
+"""
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import analyze, base_parser, bench_database, print_table, seed_products, setup_django
+
+
+def summarize(latencies, wall):
+    latencies = sorted(latencies)
+    return {
+        "rps": round(len(latencies) / wall),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+
+def run_wsgi(path, headers, requests, concurrency):
+    from django.test import Client
+
+    local = threading.local()
+
+    def one(_):
+        client = getattr(local, "client", None) or Client()
+        local.client = client
+        started = time.perf_counter()
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200, response.status_code
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        started = time.perf_counter()
+        latencies = list(pool.map(one, range(requests)))
+        return summarize(latencies, time.perf_counter() - started)
+
+
+def run_asgi(path, headers, requests, concurrency):
+    from django.test import AsyncClient
+
+    async def main():
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                assert response.status_code == 200, response.status_code
+                return time.perf_counter() - started
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(one() for _ in range(requests)))
+        return summarize(latencies, time.perf_counter() - started)
+
+    return asyncio.run(main())
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--cart-lines", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500, help="запросов на каждую комбинацию")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+    setup_django()
+
+    from django.contrib.auth.models import User
+    from django.test.utils import override_settings, setup_test_environment
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from shop.models import CartItem, Product
+
+    setup_test_environment()  # testserver в ALLOWED_HOSTS
+    modes = {
+        "wsgi": (run_wsgi, {}),
+        "asgi-sync": (run_asgi, {"ASGI_URLCONF": "config.urls"}),
+        "asgi-async": (run_asgi, {}),
+    }
+
+    with bench_database(keepdb=args.keepdb) as connection:
+        if not Product.objects.exists():
+            seed_products(args.products, seed=args.seed)
+        user, _ = User.objects.get_or_create(username="bench-asgi")
+        product_ids = list(Product.objects.order_by("id").values_list("id", flat=True)[:args.cart_lines])
+        CartItem.objects.filter(user=user).delete()
+        CartItem.objects.bulk_create(CartItem(user=user, product_id=pk, quantity=1) for pk in product_ids)
+        analyze(connection)
+        auth = {"authorization": f"Bearer {AccessToken.for_user(user)}"}
+
+        endpoints = [
+            ("products", "/api/products/?page=3", {}),
+            ("products-cursor", "/api/products/?cursor=&ordering=-price", {}),
+            ("product-detail", f"/api/products/{product_ids[0]}/", {}),
+            ("cart", "/api/cart/", auth),
+        ]
+        rows = []
+        for name, path, headers in endpoints:
+            for concurrency in args.concurrency:
+                for mode, (run, overrides) in modes.items():
+                    with override_settings(**overrides):
+                        run(path, headers, min(args.requests, 20), concurrency)  # прогрев кэша и соединений
+                        stats = run(path, headers, args.requests, concurrency)
+                    rows.append({"endpoint": name, "concurrency": concurrency, "mode": mode, **stats})
+        print(f"vendor={connection.vendor} products={Product.objects.count()} requests={args.requests}")
+        print_table(rows, ["endpoint", "concurrency", "mode", "rps", "p50_ms", "p95_ms", "max_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+JWT-аутентификация: JWTAuthentication (пользователь из БД на каждый запрос)
+против CachedJWTAuthentication (пользователь из кэша) на списке корзины и add.
+
+    python -m benchmarks.auth --cart-lines 5
+"""
+from benchmarks.common import (
+    analyze,
+    base_parser,
+    bench_database,
+    measure,
+    print_table,
+    seed_products,
+    setup_django,
+)
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument("--cart-lines", type=int, default=5)
+    args = parser.parse_args()
+    setup_django()
+
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from config.authentication import CachedJWTAuthentication
+    from shop.models import CartItem, Product
+    from shop.views import CartViewSet
+
+    setup_test_environment()
+    rates = dict.fromkeys(settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"])
+    override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": rates}).enable()
+
+    with bench_database(keepdb=args.keepdb):
+        if Product.objects.count() < args.cart_lines + 1:
+            seed_products(args.cart_lines + 1, seed=args.seed)
+        analyze(connection)
+        user, _ = User.objects.get_or_create(username="bench-auth")
+        product_ids = list(Product.objects.order_by("id").values_list("id", flat=True)[:args.cart_lines + 1])
+        CartItem.objects.filter(user=user).delete()
+        CartItem.objects.bulk_create([CartItem(user=user, product_id=pid, quantity=1) for pid in product_ids[1:]])
+        client = Client(headers={"authorization": f"Bearer {AccessToken.for_user(user)}"})
+
+        def cart_list():
+            assert client.get("/api/cart/").status_code == 200
+
+        def cart_add():
+            response = client.post("/api/cart/add/", {"product_id": product_ids[0], "quantity": 1},
+                                   content_type="application/json")
+            assert response.status_code == 201
+
+        rows = []
+        for auth in (JWTAuthentication, CachedJWTAuthentication):
+            CartViewSet.authentication_classes = [auth]
+            for label, fn in (("cart list", cart_list), ("cart add", cart_add)):
+                stats = measure(fn, args.repeat)
+                with CaptureQueriesContext(connection) as ctx:
+                    fn()
+                rows.append({"endpoint": label, "auth": auth.__name__, "queries": len(ctx.captured_queries), **stats})
+
+        print(f"vendor={connection.vendor} cache={settings.CACHES['default']['BACKEND'].rsplit('.', 1)[-1]}")
+        print_table(rows, ["endpoint", "auth", "queries", "rps", "min_ms", "median_ms", "p95_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Пропускная способность import_products / export_products на сгенерированном файле.
+
+    python -m benchmarks.bulk_import --rows 1000000 --workers 4
+"""
+import csv
+import io
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import base_parser, bench_database, random_text, setup_django
+
+
+def generate_feed(path, rows, seed):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["sku", "name", "price", "description"])
+        for i in range(rows):
+            writer.writerow([
+                f"SKU-{i:08d}",
+                random_text(rng, 3).title()[:100],
+                f"{rng.randint(100, 500_000) / 100:.2f}",
+                random_text(rng, 20),
+            ])
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    setup_django()
+
+    from django.core.management import call_command
+
+    with tempfile.TemporaryDirectory() as tmp, bench_database(keepdb=args.keepdb) as connection:
+        feed, export = Path(tmp) / "feed.csv", Path(tmp) / "export.jsonl"
+        generate_feed(feed, args.rows, args.seed)
+
+        results = {}
+        for label in ("insert", "update"):
+            started = time.monotonic()
+            call_command("import_products", str(feed), batch_size=args.batch_size,
+                         workers=args.workers, stdout=io.StringIO())
+            results[label] = time.monotonic() - started
+
+        started = time.monotonic()
+        call_command("export_products", str(export), stdout=io.StringIO())
+        results["export"] = time.monotonic() - started
+
+        print(f"vendor={connection.vendor} rows={args.rows} workers={args.workers} batch={args.batch_size}")
+        for label, seconds in results.items():
+            print(f"{label:<8} {seconds:8.1f}s  {args.rows / seconds:>12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Оформление заказа: прежний построчный путь против checkout_cart (INSERT ... SELECT).
+
+Время вызова = длительность транзакции, т.е. сколько держатся блокировки корзины.
+
+    python -m benchmarks.checkout --lines 1 50 500
+"""
+from decimal import Decimal
+
+from benchmarks.common import (
+    analyze,
+    base_parser,
+    bench_database,
+    measure,
+    print_table,
+    seed_products,
+    setup_django,
+)
+
+
+def legacy_checkout(user):
+    """Копия create_order до перехода на checkout_cart."""
+    from django.db import transaction
+
+    from shop.models import CartItem, Order, OrderItem
+
+    with transaction.atomic():
+        items = CartItem.objects.select_for_update().filter(user=user).select_related("product")
+        if not items.exists():
+            return None
+        order = Order.objects.create(user=user, total=Decimal("0"))
+        total = Decimal("0")
+        bulk_items = []
+        for it in items:
+            total += it.product.price * it.quantity
+            bulk_items.append(OrderItem(order=order, product=it.product, price=it.product.price, quantity=it.quantity))
+        OrderItem.objects.bulk_create(bulk_items)
+        order.total = total
+        order.save()
+        items.delete()
+        return order
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument("--lines", type=int, nargs="+", default=[1, 50, 500])
+    args = parser.parse_args()
+    setup_django()
+
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from shop.checkout import checkout_cart
+    from shop.models import CartItem, Product
+
+    with bench_database(keepdb=args.keepdb):
+        if Product.objects.count() < max(args.lines):
+            seed_products(max(args.lines), seed=args.seed)
+        analyze(connection)
+        user, _ = User.objects.get_or_create(username="bench-checkout")
+        product_ids = list(Product.objects.order_by("id").values_list("id", flat=True)[:max(args.lines)])
+
+        rows = []
+        for lines in args.lines:
+            def fill_cart():
+                CartItem.objects.filter(user=user).delete()
+                CartItem.objects.bulk_create(
+                    [CartItem(user=user, product_id=pid, quantity=2) for pid in product_ids[:lines]]
+                )
+
+            for label, fn in (("legacy", legacy_checkout), ("set-based", checkout_cart)):
+                stats = measure(lambda: fn(user), args.repeat, setup=fill_cart)
+                fill_cart()
+                with CaptureQueriesContext(connection) as ctx:
+                    fn(user)
+                rows.append({"lines": lines, "path": label, "queries": len(ctx.captured_queries), **stats})
+
+        print(f"vendor={connection.vendor}")
+        print_table(rows, ["lines", "path", "queries", "min_ms", "median_ms", "p95_ms"])
+
+
+if __name__ == "__main__":
+    main()
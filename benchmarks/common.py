@@ -0,0 +1,172 @@
+"""Общие утилиты бенчмарков: настройка Django, временная БД, генерация данных, замеры."""
+import argparse
+import os
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+WORDS = [
+    "phone", "case", "charger", "wireless", "cable", "laptop", "stand", "mouse",
+    "keyboard", "monitor", "speaker", "headphones", "camera", "lens", "tripod",
+    "watch", "band", "tablet", "cover", "glass", "router", "adapter", "drive",
+    "memory", "card", "battery", "lamp", "desk", "chair", "bag", "bottle",
+]
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    import django
+
+    django.setup()
+
+
+def base_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--keepdb", action="store_true", help="не удалять тестовую БД после прогона")
+    parser.add_argument("--repeat", type=int, default=20, help="повторов каждого замера")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser
+
+
+@contextmanager
+def bench_database(keepdb=False):
+    """Отдельная тестовая БД (test_<NAME>), как у pytest-django."""
+    from django.db import connection
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield connection
+    finally:
+        if not keepdb:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def analyze(connection):
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cur:
+            cur.execute("ANALYZE")
+
+
+def random_text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed_products(count, seed=42, batch_size=10_000):
+    """Каталог из count товаров пачками bulk_create."""
+    from shop.models import Product
+
+    rng = random.Random(seed)
+    for start in range(0, count, batch_size):
+        Product.objects.bulk_create(
+            [
+                Product(
+                    name=f"{random_text(rng, 2).title()} {start + i}",
+                    price=Decimal(rng.randint(100, 500_000)) / 100,
+                    description=random_text(rng, 30),
+                )
+                for i in range(min(batch_size, count - start))
+            ],
+            batch_size=batch_size,
+        )
+
+
+def sample_products(limit=10_000):
+    """[(id, name, price)] — выборка товаров, из которой набираются корзины и заказы"""
+    from shop.models import Product
+
+    return list(Product.objects.order_by("id").values_list("id", "name", "price")[:limit])
+
+
+def seed_users(count, prefix="bench-user", password="bench-password", batch_size=10_000):
+    """count пользователей bulk_create с одним заранее посчитанным хэшем пароля; возвращает id"""
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+
+    hashed = make_password(password)
+    for start in range(0, count, batch_size):
+        User.objects.bulk_create(
+            [User(username=f"{prefix}-{i}", password=hashed) for i in range(start, min(count, start + batch_size))],
+            batch_size=batch_size,
+        )
+    return list(User.objects.filter(username__startswith=f"{prefix}-").values_list("id", flat=True))
+
+
+def seed_carts(user_ids, lines, products, seed=42, batch_size=10_000):
+    """По lines случайных товаров в корзину каждого пользователя"""
+    from shop.models import CartItem
+
+    rng = random.Random(seed)
+    batch = []
+    for user_id in user_ids:
+        for product_id, _, _ in rng.sample(products, min(lines, len(products))):
+            batch.append(CartItem(user_id=user_id, product_id=product_id, quantity=rng.randint(1, 5)))
+        if len(batch) >= batch_size:
+            CartItem.objects.bulk_create(batch, batch_size=batch_size)
+            batch = []
+    CartItem.objects.bulk_create(batch, batch_size=batch_size)
+
+
+def seed_orders(user_ids, count, lines, products, seed=42, batch_size=5_000):
+    """
+    count заказов по lines позиций, равномерно по user_ids: заказы со снимком
+    и суммой, затем их позиции, пачками bulk_create.
+    """
+    from shop.models import Order, OrderItem
+    from shop.snapshots import snapshot_line
+
+    rng = random.Random(seed)
+    for start in range(0, count, batch_size):
+        orders, items = [], []
+        for i in range(start, min(count, start + batch_size)):
+            picked = [(p, rng.randint(1, 5)) for p in rng.sample(products, min(lines, len(products)))]
+            orders.append(Order(
+                user_id=user_ids[i % len(user_ids)],
+                total=sum(price * quantity for (_, _, price), quantity in picked),
+                item_count=sum(quantity for _, quantity in picked),
+                items_snapshot=[snapshot_line(pid, name, price, qty) for (pid, name, price), qty in picked],
+            ))
+            items.append(picked)
+        Order.objects.bulk_create(orders, batch_size=batch_size)
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(order_id=order.pk, product_id=pid, price=price, quantity=qty)
+                for order, picked in zip(orders, items)
+                for (pid, _, price), qty in picked
+            ],
+            batch_size=batch_size,
+        )
+
+
+def measure(fn, repeat, setup=None):
+    """Время вызова fn в мс: min / median / p95 по repeat прогонам (первый — прогрев).
+
+    setup() вызывается перед каждым прогоном и в замер не входит.
+    """
+    if setup:
+        setup()
+    fn()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    total = sum(samples)
+    samples.sort()
+    return {
+        "rps": round(repeat * 1000 / total, 1) if total else None,
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[max(0, int(len(samples) * 0.95) - 1)], 3),
+    }
+
+
+def print_table(rows, columns):
+    widths = [max(len(str(c)), *(len(str(r.get(c, ""))) for r in rows)) for c in columns]
+    print("  ".join(str(c).ljust(w) for c, w in zip(columns, widths)))
+    for r in rows:
+        print("  ".join(str(r.get(c, "")).ljust(w) for c, w in zip(columns, widths)))
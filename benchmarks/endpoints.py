@@ -0,0 +1,326 @@
+"""
+Все эндпоинты shop/urls.py и config/urls.py на большом наборе данных.
+
+Сидирует товары, пользователей с корзинами и историю заказов (bulk_create),
+затем прогоняет каждый сценарий через тестовый клиент Django: задержка,
+пропускная способность последовательных запросов и число SQL на запрос.
+Результат пишется в JSON; --compare сравнивает с прошлым прогоном и
+завершается с кодом 1, если медиана выросла больше --threshold %
+(и больше --min-delta-ms) или стало больше SQL.
+
+    python -m benchmarks.endpoints --products 1000000 --users 100000 --orders 2000000 --output before.json
+    python -m benchmarks.endpoints --keepdb --output after.json --compare before.json
+"""
+import json
+import logging
+import subprocess
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from benchmarks.common import (
+    analyze,
+    base_parser,
+    bench_database,
+    measure,
+    print_table,
+    sample_products,
+    seed_carts,
+    seed_orders,
+    seed_products,
+    seed_users,
+    setup_django,
+)
+
+BENCH_PASSWORD = "bench-password"
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: object            # строка или fn(ctx) -> строка
+    route: str              # view_name маршрута, который покрывает сценарий
+    data: object = None     # dict или fn(ctx) -> dict
+    auth: str = None        # None | "user" | "admin"
+    setup: object = None    # fn(ctx), выполняется перед каждым вызовом и не входит в замер
+    expect: tuple = (200,)
+
+    def resolve(self, value, ctx):
+        return value(ctx) if callable(value) else value
+
+
+def bump_catalog(ctx):
+    from shop.cache import bump_catalog_version
+
+    bump_catalog_version()
+
+
+def reset_cart(ctx):
+    from shop.models import CartItem
+
+    CartItem.objects.filter(user=ctx.user).delete()
+    CartItem.objects.upsert_quantities(ctx.user.id, ctx.cart, increment=False)
+
+
+def new_product(ctx):
+    from shop.models import Product
+
+    ctx.product_id = Product.objects.create(name="Bench product", price="1.00").pk
+
+
+def new_cart_item(ctx):
+    from shop.models import CartItem
+
+    CartItem.objects.filter(user=ctx.user, product_id=ctx.spare_product).delete()
+    ctx.cart_item = CartItem.objects.create(user=ctx.user, product_id=ctx.spare_product, quantity=1).pk
+
+
+def next_username(ctx):
+    ctx.counter += 1
+    username = f"bench-register-{ctx.run}-{ctx.counter}"
+    return {"username": username, "email": f"{username}@example.com", "password": BENCH_PASSWORD}
+
+
+SCENARIOS = [
+    Scenario("api-root", "GET", "/api/", "api-root"),
+    Scenario("products", "GET", "/api/products/?page=50", "products-list"),
+    Scenario("products cold", "GET", "/api/products/?page=50", "products-list", setup=bump_catalog),
+    Scenario("products search cold", "GET", "/api/products/?search=wireless charger", "products-list",
+             setup=bump_catalog),
+    Scenario("products cursor cold", "GET", "/api/products/?cursor=&ordering=-price", "products-list",
+             setup=bump_catalog),
+    Scenario("products create", "POST", "/api/products/", "products-list",
+             data={"name": "Bench product", "price": "9.99", "description": "bench"}, auth="admin", expect=(201,)),
+    Scenario("product detail", "GET", lambda ctx: f"/api/products/{ctx.products[0][0]}/", "products-detail"),
+    Scenario("product detail cold", "GET", lambda ctx: f"/api/products/{ctx.products[0][0]}/", "products-detail",
+             setup=bump_catalog),
+    Scenario("product update", "PATCH", lambda ctx: f"/api/products/{ctx.products[1][0]}/", "products-detail",
+             data={"description": "bench update"}, auth="admin"),
+    Scenario("product delete", "DELETE", lambda ctx: f"/api/products/{ctx.product_id}/", "products-detail",
+             auth="admin", setup=new_product, expect=(204,)),
+    Scenario("products-cached", "GET", "/api/products-cached/", "products-cached"),
+    Scenario("product facets", "GET", "/api/products/facets/?q=wireless&buckets=20", "products-facets"),
+    Scenario("product facets cold", "GET", "/api/products/facets/?q=wireless&buckets=20", "products-facets",
+             setup=bump_catalog),
+    Scenario("cart", "GET", "/api/cart/", "cart-list", auth="user", setup=reset_cart),
+    Scenario("cart add", "POST", "/api/cart/add/", "cart-add",
+             data=lambda ctx: {"product_id": ctx.products[0][0], "quantity": 1}, auth="user", expect=(201,)),
+    Scenario("cart batch", "POST", "/api/cart/batch/", "cart-batch",
+             data=lambda ctx: {"mode": "set", "items": [{"product_id": p, "quantity": 2} for p in ctx.cart]},
+             auth="user"),
+    Scenario("cart remove", "DELETE", lambda ctx: f"/api/cart/{ctx.cart_item}/remove/", "cart-remove",
+             auth="user", setup=new_cart_item, expect=(204,)),
+    Scenario("cart remove-by-product", "DELETE", lambda ctx: f"/api/cart/remove-by-product/{ctx.spare_product}/",
+             "cart-remove-by-product", auth="user", setup=new_cart_item, expect=(204,)),
+    Scenario("checkout", "POST", "/api/orders/create_order/", "orders-create-order",
+             auth="user", setup=reset_cart, expect=(201,)),
+    Scenario("order detail", "GET", lambda ctx: f"/api/orders/{ctx.order_id}/", "orders-detail", auth="user"),
+    Scenario("order history", "GET", "/api/orders/my/", "orders-my", auth="user"),
+    Scenario("report top-sellers", "GET", "/api/reports/top-sellers/?by=units&limit=50", "reports-top-sellers",
+             auth="admin"),
+    Scenario("report revenue", "GET", "/api/reports/revenue/?interval=week", "reports-revenue", auth="admin"),
+    Scenario("register", "POST", "/api/auth/register/", "register", data=next_username, expect=(201,)),
+    Scenario("login", "POST", "/api/auth/login/", "token_obtain_pair",
+             data=lambda ctx: {"username": ctx.user.username, "password": BENCH_PASSWORD}),
+    Scenario("refresh", "POST", "/api/auth/refresh/", "token_refresh", data=lambda ctx: {"refresh": ctx.refresh}),
+    Scenario("schema", "GET", "/api/schema/", "schema"),
+    Scenario("docs", "GET", "/api/docs/", "docs"),
+    Scenario("health", "GET", "/health/", "config.urls.health", expect=(200, 503)),
+    Scenario("metrics", "GET", "/metrics", "config.urls.metrics"),
+]
+
+
+def route_names():
+    """view_name всех маршрутов проекта, кроме админки и раздачи media"""
+    from django.urls import URLResolver, get_resolver
+
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                if pattern.app_name != "admin":
+                    yield from walk(pattern.url_patterns)
+            elif pattern.lookup_str != "django.views.static.serve":
+                yield pattern.name or pattern.lookup_str
+
+    return set(walk(get_resolver().url_patterns))
+
+
+def prepare(args):
+    from django.contrib.auth.models import User
+    from django.test.utils import override_settings
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from shop.models import CartItem, Order, Product
+    from shop.rollups import roll_up
+
+    if not Product.objects.exists():
+        seed_products(args.products, seed=args.seed)
+    products = sample_products()
+    if not User.objects.filter(username__startswith="bench-user-").exists():
+        user_ids = seed_users(args.users, password=BENCH_PASSWORD)
+        seed_carts(user_ids, args.cart_lines, products, seed=args.seed)
+        seed_orders(user_ids, args.orders, args.order_lines, products, seed=args.seed)
+    # агрегаты для отчётов; сидированные заказы только что созданы, поэтому без ROLLUP_LAG_SEC
+    with override_settings(ROLLUP_LAG_SEC=0):
+        while roll_up():
+            pass
+
+    user = User.objects.get(username="bench-user-0")
+    admin, created = User.objects.get_or_create(username="bench-admin", defaults={"is_staff": True})
+    if created:
+        admin.set_password(BENCH_PASSWORD)
+        admin.save()
+    refresh = RefreshToken.for_user(user)
+    cart = {pid: 1 for pid, _, _ in products[2:2 + args.cart_lines]}
+    return SimpleNamespace(
+        user=user,
+        products=products,
+        cart=cart,
+        spare_product=products[-1][0],
+        order_id=Order.objects.filter(user=user).order_by("-id").values_list("id", flat=True).first(),
+        refresh=str(refresh),
+        tokens={
+            "user": str(refresh.access_token),
+            "admin": str(RefreshToken.for_user(admin).access_token),
+        },
+        counts={
+            "products": Product.objects.count(),
+            "users": User.objects.count(),
+            "cart_items": CartItem.objects.count(),
+            "orders": Order.objects.count(),
+        },
+        run=datetime.now().strftime("%Y%m%d%H%M%S"),
+        counter=0,
+    )
+
+
+def run_scenario(client, scenario, ctx, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    headers = {"authorization": f"Bearer {ctx.tokens[scenario.auth]}"} if scenario.auth else {}
+    setup = (lambda: scenario.setup(ctx)) if scenario.setup else None
+    status = {}
+
+    def call():
+        data = scenario.resolve(scenario.data, ctx)
+        response = client.generic(
+            scenario.method,
+            scenario.resolve(scenario.path, ctx),
+            json.dumps(data) if data is not None else "",
+            content_type="application/json",
+            headers=headers,
+        )
+        if response.status_code not in scenario.expect:
+            raise AssertionError(f"{scenario.name}: HTTP {response.status_code} {response.content[:200]!r}")
+        status["code"] = response.status_code
+
+    stats = measure(call, repeat, setup=setup)
+    if setup:
+        setup()
+    with CaptureQueriesContext(connection) as queries:
+        call()
+    return {"route": scenario.route, "method": scenario.method, "status": status["code"],
+            "queries": len(queries), **stats}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Строки сравнения и признак регрессии"""
+    rows, regressed = [], False
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        change = (current["median_ms"] / before["median_ms"] - 1) * 100 if before["median_ms"] else 0.0
+        flag = ""
+        slower = change > threshold and current["median_ms"] - before["median_ms"] > min_delta_ms
+        if slower or current["queries"] > before["queries"]:
+            flag, regressed = "REGRESSION", True
+        rows.append({
+            "scenario": name,
+            "median_before": before["median_ms"],
+            "median_after": current["median_ms"],
+            "change_%": round(change, 1),
+            "queries": f"{before['queries']} -> {current['queries']}",
+            "": flag,
+        })
+    return rows, regressed
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--cart-lines", type=int, default=5)
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--order-lines", type=int, default=3)
+    parser.add_argument("--only", nargs="+", help="только сценарии с этими именами")
+    parser.add_argument("--output", default="benchmark-endpoints.json", help="куда записать результат (JSON)")
+    parser.add_argument("--compare", help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=20.0, help="допустимый рост медианы, %%")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="меньший рост медианы считается шумом")
+    args = parser.parse_args()
+    setup_django()
+
+    from django.conf import settings
+    from django.test import Client
+    from django.test.utils import override_settings, setup_test_environment
+
+    setup_test_environment()  # testserver в ALLOWED_HOSTS
+    # сотни register/login с одного клиента: rate limit мерили бы вместо эндпоинтов
+    rates = dict.fromkeys(settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"])
+    override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": rates}).enable()
+    logging.disable(logging.ERROR)  # ожидаемые 4xx/503 и предупреждения схемы не нужны в выводе
+    scenarios = [s for s in SCENARIOS if not args.only or s.name in args.only]
+    uncovered = sorted(route_names() - {s.route for s in SCENARIOS})
+    if uncovered:
+        print(f"маршруты без сценария: {', '.join(uncovered)}", file=sys.stderr)
+
+    with bench_database(keepdb=args.keepdb) as connection:
+        ctx = prepare(args)
+        analyze(connection)
+        client = Client()
+        results = {s.name: run_scenario(client, s, ctx, args.repeat) for s in scenarios}
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "vendor": connection.vendor,
+                "repeat": args.repeat,
+                "dataset": ctx.counts,
+                "uncovered_routes": uncovered,
+            },
+            "results": results,
+        }
+
+    with open(args.output, "w") as fh:
+        json.dump(report, fh, indent=2, ensure_ascii=False)
+    print(f"vendor={report['meta']['vendor']} " + " ".join(f"{k}={v}" for k, v in ctx.counts.items()))
+    print_table(
+        [{"scenario": name, **r} for name, r in results.items()],
+        ["scenario", "method", "status", "queries", "rps", "min_ms", "median_ms", "p95_ms"],
+    )
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+        print(f"\nсравнение с {args.compare} (commit {baseline['meta'].get('commit')})")
+        rows, regressed = compare(results, baseline["results"], args.threshold, args.min_delta_ms)
+        print_table(rows, ["scenario", "median_before", "median_after", "change_%", "queries", ""])
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Нагрузочный прогон оформления заказа против запущенного сервера.
+
+N пользователей (корутины asyncio, HTTP поверх asyncio.open_connection) проходят
+register -> login -> add (пачками параллельных запросов на один товар) -> cart ->
+checkout (с параллельными add в ту же корзину) -> order history.
+
+Отчёт: пропускная способность, перцентили задержки по шагам, ответы не 2xx,
+ожидания блокировок и deadlock'и (--db-stats, только PostgreSQL: опрос
+pg_stat_activity и счётчик pg_stat_database той же БД, что в .env) и нарушения
+целостности:
+  lost_increment  — в корзине меньше, чем успешных add;
+  cart_mismatch   — в корзине лишние товары или больше, чем успешных add;
+  total_mismatch  — сумма заказа не равна сумме цена * количество по каталогу;
+  lost_racing_add — add, шедший параллельно с checkout, не попал ни в заказ, ни в корзину;
+  history_missing — заказ не виден в /api/orders/my/ или расходится с ответом checkout.
+Код выхода 1 при любом нарушении.
+
+    python manage.py runserver --noreload  # или gunicorn/uvicorn
+    python -m benchmarks.load --users 200 --concurrency 50 --db-stats
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from decimal import Decimal
+from urllib.parse import urlsplit
+
+from benchmarks.common import print_table, setup_django
+
+PASSWORD = "load-password-1"
+
+
+class HTTPError(Exception):
+    def __init__(self, status, body):
+        super().__init__(f"HTTP {status}: {body[:200]!r}")
+        self.status = status
+
+
+class Client:
+    """Минимальный HTTP/1.1-клиент: соединение на запрос, JSON в обе стороны"""
+
+    def __init__(self, base_url, stats):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.stats = stats
+        self.token = None
+
+    async def request(self, step, method, path, data=None, expect=(200,)):
+        body = json.dumps(data).encode() if data is not None else b""
+        headers = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Connection: close",
+            "Accept: application/json",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+        ]
+        if self.token:
+            headers.append(f"Authorization: Bearer {self.token}")
+
+        started = time.perf_counter()
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write("\r\n".join(headers).encode() + b"\r\n\r\n" + body)
+            await writer.drain()
+            status, payload = parse_response(await reader.read())
+        finally:
+            writer.close()
+        self.stats.record(step, time.perf_counter() - started, status)
+
+        if status not in expect:
+            raise HTTPError(status, payload)
+        return json.loads(payload) if payload else None
+
+
+def parse_response(raw):
+    head, _, payload = raw.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    headers = {k.strip().lower(): v.strip() for k, _, v in (line.partition(":") for line in lines[1:])}
+    if headers.get("transfer-encoding") == "chunked":
+        chunks = []
+        while payload:
+            size, _, rest = payload.partition(b"\r\n")
+            size = int(size.split(b";")[0], 16)
+            if not size:
+                break
+            chunks.append(rest[:size])
+            payload = rest[size + 2:]
+        payload = b"".join(chunks)
+    return status, payload
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = Counter()
+        self.violations = []
+
+    def record(self, step, seconds, status):
+        self.latencies[step].append(seconds)
+        self.statuses[(step, status)] += 1
+
+    def violation(self, kind, user, **detail):
+        self.violations.append({"kind": kind, "user": user, **detail})
+
+
+class LockMonitor(threading.Thread):
+    """Опрос pg_stat_activity: сколько бэкендов ждут блокировку; deadlock'и — разницей счётчика"""
+
+    QUERY = (
+        "SELECT count(*) FROM pg_stat_activity "
+        "WHERE datname = current_database() AND wait_event_type = 'Lock'"
+    )
+    DEADLOCKS = "SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()"
+
+    def __init__(self, interval):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = []
+        self.deadlocks = None
+        self.stopped = threading.Event()
+
+    def run(self):
+        from django.db import connection
+
+        if connection.vendor != "postgresql":
+            return
+        with connection.cursor() as cur:
+            cur.execute(self.DEADLOCKS)
+            before = cur.fetchone()[0]
+            while not self.stopped.wait(self.interval):
+                cur.execute(self.QUERY)
+                self.samples.append(cur.fetchone()[0])
+            cur.execute("SELECT pg_stat_clear_snapshot()")
+            cur.execute(self.DEADLOCKS)
+            self.deadlocks = cur.fetchone()[0] - before
+        connection.close()
+
+    def report(self):
+        if not self.samples:
+            return {"lock_waiting_max": None, "lock_waiting_avg": None, "lock_wait_share": None,
+                    "deadlocks": self.deadlocks}
+        return {
+            "lock_waiting_max": max(self.samples),
+            "lock_waiting_avg": round(statistics.mean(self.samples), 2),
+            # доля опросов, в которых хоть один бэкенд ждал блокировку
+            "lock_wait_share": round(sum(1 for s in self.samples if s) / len(self.samples), 3),
+            "deadlocks": self.deadlocks,
+        }
+
+
+async def load_catalog(base_url, count, stats):
+    """{product_id: цена} первых count товаров каталога"""
+    client = Client(base_url, stats)
+    prices, page = {}, 1
+    while len(prices) < count:
+        data = await client.request("catalog", "GET", f"/api/products/?ordering=id&page_size=100&page={page}")
+        for product in data["results"]:
+            prices[product["id"]] = Decimal(str(product["price"]))
+        if not data.get("next"):
+            break
+        page += 1
+    return dict(list(prices.items())[:count])
+
+
+async def run_user(index, args, prices, stats, run_id):
+    rng = random.Random(args.seed + index)
+    name = f"load-{run_id}-{index}"
+    client = Client(args.base_url, stats)
+
+    await client.request("register", "POST", "/api/auth/register/",
+                         {"username": name, "email": f"{name}@example.com", "password": PASSWORD}, expect=(201,))
+    tokens = await client.request("login", "POST", "/api/auth/login/", {"username": name, "password": PASSWORD})
+    client.token = tokens["access"]
+
+    async def add(product_id):
+        """True, если add подтверждён ответом 201"""
+        try:
+            await client.request("add", "POST", "/api/cart/add/", {"product_id": product_id, "quantity": 1},
+                                 expect=(201,))
+            return True
+        except HTTPError:
+            return False
+
+    # параллельные add одного товара бьют в одну строку корзины: проверка на потерянные инкременты
+    expected = Counter()
+    for product_id in rng.sample(list(prices), min(args.lines, len(prices))):
+        results = await asyncio.gather(*(add(product_id) for _ in range(args.parallel_adds)))
+        expected[product_id] += sum(results)
+
+    cart = await client.request("cart", "GET", "/api/cart/")
+    actual = Counter({item["product"]["id"]: item["quantity"] for item in cart})
+    for product_id in expected.keys() | actual.keys():
+        if actual[product_id] < expected[product_id]:
+            stats.violation("lost_increment", name, product_id=product_id,
+                            expected=expected[product_id], actual=actual[product_id])
+        elif actual[product_id] > expected[product_id]:
+            stats.violation("cart_mismatch", name, product_id=product_id,
+                            expected=expected[product_id], actual=actual[product_id])
+    if not actual:
+        return
+
+    # add параллельно с checkout: каждый успешный add обязан оказаться либо в заказе, либо в корзине
+    racing = rng.sample(list(prices), min(args.racing_adds, len(prices)))
+    checkout, *raced = await asyncio.gather(
+        client.request("checkout", "POST", "/api/orders/create_order/", expect=(201,)),
+        *(add(product_id) for product_id in racing),
+        return_exceptions=True,
+    )
+    if isinstance(checkout, BaseException):
+        if not isinstance(checkout, HTTPError):
+            raise checkout
+        return
+
+    ordered = Counter()
+    for item in checkout["items"]:
+        ordered[item["product"]["id"]] += item["quantity"]
+    total = sum(prices[product_id] * quantity for product_id, quantity in ordered.items())
+    if Decimal(str(checkout["total"])) != total:
+        stats.violation("total_mismatch", name, order_id=checkout["id"],
+                        total=str(checkout["total"]), expected=str(total))
+
+    leftover = Counter({item["product"]["id"]: item["quantity"]
+                        for item in await client.request("cart", "GET", "/api/cart/")})
+    for product_id, ok in zip(racing, raced):
+        expected[product_id] += ok is True
+    for product_id in expected.keys() | ordered.keys() | leftover.keys():
+        if ordered[product_id] + leftover[product_id] != expected[product_id]:
+            stats.violation("lost_racing_add", name, product_id=product_id, expected=expected[product_id],
+                            ordered=ordered[product_id], leftover=leftover[product_id])
+
+    history = await client.request("history", "GET", "/api/orders/my/")
+    entry = next((o for o in history["results"] if o["id"] == checkout["id"]), None)
+    if entry is None or Decimal(entry["total"]) != Decimal(str(checkout["total"])):
+        stats.violation("history_missing", name, order_id=checkout["id"])
+
+
+def summarize(latencies):
+    latencies = sorted(latencies)
+    pick = lambda q: round(latencies[max(0, int(len(latencies) * q) - 1)] * 1000, 2)  # noqa: E731
+    return {
+        "count": len(latencies),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+
+async def run(args, stats):
+    prices = await load_catalog(args.base_url, args.products, stats)
+    if not prices:
+        raise SystemExit("каталог пуст: засидируйте товары перед прогоном")
+    run_id = uuid.uuid4().hex[:8]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    failures = Counter()
+
+    async def one(index):
+        async with semaphore:
+            try:
+                await run_user(index, args, prices, stats, run_id)
+            except HTTPError as exc:
+                failures[exc.status] += 1
+            except OSError as exc:
+                failures[type(exc).__name__] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.users)))
+    return time.perf_counter() - started, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20, help="одновременно активных пользователей")
+    parser.add_argument("--products", type=int, default=20, help="размер горячего набора товаров")
+    parser.add_argument("--lines", type=int, default=5, help="товаров в корзине")
+    parser.add_argument("--parallel-adds", type=int, default=4, help="параллельных add на товар")
+    parser.add_argument("--racing-adds", type=int, default=2, help="add, отправляемых вместе с checkout")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db-stats", action="store_true", help="опрашивать pg_stat_activity / pg_stat_database")
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--output", help="куда записать отчёт (JSON)")
+    args = parser.parse_args()
+
+    monitor = None
+    if args.db_stats:
+        setup_django()
+        monitor = LockMonitor(args.poll_interval)
+        monitor.start()
+
+    stats = Stats()
+    wall, failures = asyncio.run(run(args, stats))
+    if monitor:
+        monitor.stopped.set()
+        monitor.join()
+
+    steps = {step: summarize(lat) for step, lat in stats.latencies.items() if step != "catalog"}
+    requests = sum(s["count"] for s in steps.values())
+    report = {
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "wall_s": round(wall, 2),
+        "rps": round(requests / wall, 1),
+        "checkouts_per_s": round(stats.statuses[("checkout", 201)] / wall, 1),
+        "steps": steps,
+        "statuses": {f"{step} {status}": n for (step, status), n in sorted(stats.statuses.items()) if step != "catalog"},
+        "failed_users": dict(failures),
+        "db": monitor.report() if monitor else None,
+        "violations": Counter(v["kind"] for v in stats.violations),
+        "violation_examples": stats.violations[:20],
+    }
+
+    print(f"users={args.users} concurrency={args.concurrency} wall={report['wall_s']}s "
+          f"rps={report['rps']} checkouts/s={report['checkouts_per_s']}")
+    print_table([{"step": step, **s} for step, s in steps.items()],
+                ["step", "count", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+    print("\nответы:", ", ".join(f"{k}: {v}" for k, v in report["statuses"].items()))
+    if failures:
+        print("прерванные пользователи:", dict(failures))
+    if report["db"]:
+        print("БД:", ", ".join(f"{k}={v}" for k, v in report["db"].items()))
+    print("нарушения целостности:", dict(report["violations"]) or "нет")
+    for example in report["violation_examples"]:
+        print("  ", example)
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+    if stats.violations:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Поиск товаров: icontains (старый путь) против search_products (tsvector + pg_trgm).
+
+    python -m benchmarks.search --products 1000000
+"""
+from benchmarks.common import (
+    analyze,
+    base_parser,
+    bench_database,
+    measure,
+    print_table,
+    seed_products,
+    setup_django,
+)
+
+QUERIES = ["phone", "pho", "wireless charger", "tripod lens", "nothing-matches"]
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument("--products", type=int, default=200_000)
+    args = parser.parse_args()
+    setup_django()
+
+    from django.db.models import Q
+
+    from shop.models import Product
+    from shop.search import search_products
+
+    def icontains_page(q):
+        qs = Product.objects.filter(Q(name__icontains=q) | Q(description__icontains=q)).order_by("id")
+        return qs.count(), list(qs[:10])
+
+    def search_page(q):
+        qs = search_products(Product.objects.defer("search_vector"), q)
+        if "rank" in qs.query.annotations:
+            qs = qs.order_by("-rank", "id")
+        return qs.count(), list(qs[:10])
+
+    with bench_database(keepdb=args.keepdb) as connection:
+        if not Product.objects.exists():
+            seed_products(args.products, seed=args.seed)
+        analyze(connection)
+
+        rows = []
+        for q in QUERIES:
+            for label, fn in (("icontains", icontains_page), ("search", search_page)):
+                stats = measure(lambda: fn(q), args.repeat)
+                rows.append({"query": q, "path": label, "hits": fn(q)[0], **stats})
+        print(f"vendor={connection.vendor} products={Product.objects.count()}")
+        print_table(rows, ["query", "path", "hits", "min_ms", "median_ms", "p95_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -3,5 +3,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+# до загрузки настроек: под ASGI постоянные соединения с БД по умолчанию выключены
+os.environ["DJANGO_ASGI"] = "1"
 
 application = get_asgi_application()
@@ -0,0 +1,81 @@
+"""
+JWT-аутентификация без запроса пользователя к БД на каждый запрос.
+
+Поля пользователя, нужные правам доступа, лежат в кэше Django (Redis)
+AUTH_USER_CACHE_SEC секунд; остальные поля у восстановленного объекта
+отложенные (deferred) и подгружаются при обращении, а save() пишет только
+загруженные. Запись удаляется при сохранении и удалении User (shop.signals),
+т.е. деактивация и смена пароля действуют сразу; изменения через
+QuerySet.update() — не позже чем через AUTH_USER_CACHE_SEC.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+USER_FIELDS = ("id", "username", "email", "first_name", "last_name", "is_active", "is_staff", "is_superuser")
+USER_CACHE_KEY = "auth:user:{user_id}"
+
+
+def forget_user(user_id):
+    cache.delete(USER_CACHE_KEY.format(user_id=user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, которая берёт пользователя из кэша; те же проверки is_active и отзыва токена"""
+
+    def get_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        key = USER_CACHE_KEY.format(user_id=user_id)
+        entry = cache.get(key)
+        if entry is None:
+            entry = self._entry(self._users(user_id).first())
+            cache.set(key, entry, settings.AUTH_USER_CACHE_SEC)
+        return self._user(validated_token, entry)
+
+    async def aget_user(self, validated_token):
+        """get_user для async-вьюх"""
+        user_id = self._user_id(validated_token)
+        key = USER_CACHE_KEY.format(user_id=user_id)
+        entry = await cache.aget(key)
+        if entry is None:
+            entry = self._entry(await self._users(user_id).afirst())
+            await cache.aset(key, entry, settings.AUTH_USER_CACHE_SEC)
+        return self._user(validated_token, entry)
+
+    @staticmethod
+    def _user_id(validated_token):
+        try:
+            return validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def _users(self, user_id):
+        return self.user_model.objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}).values_list(
+            *USER_FIELDS, "password"
+        )
+
+    @staticmethod
+    def _entry(row):
+        """(значения USER_FIELDS, md5 хэша пароля) — сам хэш в кэш не попадает"""
+        if row is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        *values, password = row
+        return tuple(values), get_md5_hash_password(password)
+
+    def _user(self, validated_token, entry):
+        values, password_md5 = entry
+        fields = dict(zip(USER_FIELDS, values))
+        # from_db ждёт значения в порядке полей модели
+        names = [f.attname for f in self.user_model._meta.concrete_fields if f.attname in fields]
+        user = self.user_model.from_db(DEFAULT_DB_ALIAS, names, [fields[name] for name in names])
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if jwt_settings.CHECK_REVOKE_TOKEN and validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != password_md5:
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
@@ -1,9 +1,36 @@
 import os
+import tempfile
 
 from celery import Celery
+from celery.signals import worker_init, worker_process_shutdown
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 app = Celery("config")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+
+@worker_init.connect
+def serve_worker_metrics(**kwargs):
+    """
+    Метрики воркера (публикация outbox в брокер, задержка outbox) на CELERY_METRICS_PORT.
+
+    Задачи выполняются в дочерних процессах prefork: они пишут метрики в
+    собственный каталог воркера, HTTP-сервер главного процесса их складывает.
+    """
+    from django.conf import settings
+
+    from .metrics import registry, serve
+
+    if not settings.CELERY_METRICS_PORT:
+        return
+    registry.share(tempfile.mkdtemp(prefix="celery-metrics-"), settings.METRICS_FLUSH_SEC)
+    serve(settings.CELERY_METRICS_PORT)
+
+
+@worker_process_shutdown.connect
+def dump_worker_metrics(**kwargs):
+    from .metrics import registry
+
+    registry.dump()
@@ -0,0 +1,131 @@
+"""
+Чтение с реплик для выбранных вьюх.
+
+По умолчанию всё идёт в primary (default). Запрос становится «репличным»,
+только если вьюха явно попросила об этом (read_from_replica); записи и любые
+чтения после записи в том же запросе остаются на primary.
+
+Read-your-writes: после запроса с записью пользователь на
+settings.REPLICA_STICKY_SEC секунд закрепляется за primary (ключ в общем
+кэше, т.е. на всех инстансах). Так же закрепляется весь каталог после
+изменения Product: иначе отстающая реплика попадёт в кэш под новой версией.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+PRIMARY = "default"
+PIN_KEY = "db:primary:{scope}"
+
+# состояние текущего запроса (ставит replica_routing_middleware); вне запроса — None
+_routing = ContextVar("db_routing", default=None)
+
+
+class RoutingState:
+    __slots__ = ("replica", "wrote")
+
+    def __init__(self):
+        self.replica = None   # alias реплики, выбранной для запроса
+        self.wrote = False
+
+
+def replicas():
+    return getattr(settings, "DATABASE_REPLICAS", ())
+
+
+def begin_request():
+    """Новое состояние маршрутизации на время запроса; возвращает токен для end_request"""
+    return _routing.set(RoutingState())
+
+
+def end_request(token):
+    """Сбросить состояние; True, если запрос что-то писал в БД"""
+    state = _routing.get()
+    _routing.reset(token)
+    return state is not None and state.wrote
+
+
+def pin_to_primary(scope):
+    """Чтения scope («user:<id>», «catalog») идут в primary ближайшие REPLICA_STICKY_SEC секунд"""
+    if replicas():
+        cache.set(PIN_KEY.format(scope=scope), 1, timeout=settings.REPLICA_STICKY_SEC)
+
+
+async def apin_to_primary(scope):
+    """pin_to_primary без блокирующего обращения к кэшу в event loop"""
+    if replicas():
+        await cache.aset(PIN_KEY.format(scope=scope), 1, timeout=settings.REPLICA_STICKY_SEC)
+
+
+def _pin_keys(user, scopes):
+    """Ключи закрепления для проверки или None, если реплика запросу не положена"""
+    state = _routing.get()
+    if state is None or not replicas() or state.wrote:
+        return None
+    scopes = list(scopes)
+    if user is not None and user.is_authenticated:
+        scopes.append(f"user:{user.pk}")
+    return [PIN_KEY.format(scope=scope) for scope in scopes]
+
+
+def _use_replica():
+    _routing.get().replica = random.choice(replicas())
+    return True
+
+
+def read_from_replica(user=None, scopes=()):
+    """
+    Остаток текущего запроса читает с реплики, если реплики настроены
+    и ни пользователь, ни scopes не закреплены за primary.
+    """
+    keys = _pin_keys(user, scopes)
+    if keys is None or (keys and cache.get_many(keys)):
+        return False
+    return _use_replica()
+
+
+async def aread_from_replica(user=None, scopes=()):
+    """read_from_replica для async-вьюх: проверка закрепления через cache.aget_many"""
+    keys = _pin_keys(user, scopes)
+    if keys is None or (keys and await cache.aget_many(keys)):
+        return False
+    return _use_replica()
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is not None and state.replica and not state.wrote:
+            return state.replica
+        return None  # дальше как без роутера: БД экземпляра из hints или default
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплики — копии primary, объекты с любых alias'ов совместимы
+        return True
+
+
+class ReplicaReadMixin:
+    """Действия вьюсета из replica_actions на GET/HEAD читают с реплики"""
+    replica_actions = ()
+    replica_scopes = ()
+    defer_replica_routing = False  # async-вьюха выбирает реплику сама (aroute_reads)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not self.defer_replica_routing and self.reads_replica(request):
+            read_from_replica(request.user, self.replica_scopes)
+
+    def reads_replica(self, request):
+        return self.action in self.replica_actions and request.method in ("GET", "HEAD")
+
+    async def aroute_reads(self, request):
+        if self.reads_replica(request):
+            await aread_from_replica(request.user, self.replica_scopes)
@@ -0,0 +1,58 @@
+"""
+Проверка БД и Redis для балансировщика.
+
+Результат живёт HEALTH_CACHE_SEC секунд в памяти процесса; пока он свежий,
+проба не трогает ни БД, ни Redis. Устаревший результат перепроверяет один
+поток, остальные отдают прежний — частые пробы не умножают нагрузку во время
+инцидента. Кэш локальный, а не в Redis: упавший Redis не должен ломать ответ,
+а каждый инстанс отвечает за свои соединения.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .redis import get_redis
+
+_lock = threading.Lock()
+_result = None        # {"db": bool, "redis": bool}
+_expires = 0.0
+
+
+def probe_db():
+    try:
+        with connection.cursor() as cur:
+            cur.execute("SELECT 1;")
+        return True
+    except Exception:
+        return False
+
+
+def probe_redis():
+    try:
+        return bool(get_redis().ping())
+    except Exception:
+        return False
+
+
+def check():
+    """{"db": bool, "redis": bool}, не чаще раза в HEALTH_CACHE_SEC"""
+    global _result, _expires
+    if _result is not None and time.monotonic() < _expires:
+        return _result
+    if not _lock.acquire(blocking=_result is None):
+        return _result  # проверяет другой поток
+    try:
+        if _result is None or time.monotonic() >= _expires:
+            _result = {"db": probe_db(), "redis": probe_redis()}
+            _expires = time.monotonic() + settings.HEALTH_CACHE_SEC
+        return _result
+    finally:
+        _lock.release()
+
+
+def reset():
+    global _result, _expires
+    with _lock:
+        _result, _expires = None, 0.0
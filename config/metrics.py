@@ -0,0 +1,286 @@
+"""
+Метрики процесса в текстовом формате Prometheus.
+
+Каждый поток пишет в собственный словарь без блокировок (пишет только
+владелец); при чтении /metrics словари всех потоков суммируются. Данные
+завершившихся потоков сворачиваются в общий итог, поэтому короткоживущие
+потоки (sync_to_async под ASGI) не копятся.
+
+Несколько процессов (воркеры gunicorn, дочерние процессы Celery) сводятся
+через общий каталог (Registry.share): каждый процесс раз в interval секунд
+пишет в свой файл накопленные итоги, /metrics складывает файлы всех
+процессов. Файлы завершившихся процессов остаются, поэтому счётчики не
+убывают; каталог очищают при старте развёртывания.
+
+Процессы без HTTP (celery worker, relay_outbox) отдают метрики своим
+HTTP-сервером (serve) на отдельном порту.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.directory = None  # общий каталог процессов (share)
+        self.interval = None
+        self._reset()
+
+    def _reset(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._threads = {}   # поток -> его словарь
+        self._retired = {}   # сумма по завершившимся потокам
+        self._dump_lock = threading.Lock()
+        self._file = None
+        self._flusher = None
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(self, name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labels, buckets))
+
+    def _register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def store(self):
+        """Словарь текущего потока: (метрика, метки) -> список значений"""
+        try:
+            return self._local.store
+        except AttributeError:
+            store = self._local.store = {}
+            with self._lock:
+                self._threads[threading.current_thread()] = store
+            return store
+
+    def collect(self):
+        """Сумма по всем потокам: {(метрика, метки): [значения]}"""
+        with self._lock:
+            for thread in [t for t in self._threads if not t.is_alive()]:
+                _merge(self._retired, self._threads.pop(thread))
+            total = {}
+            _merge(total, self._retired)
+            for store in self._threads.values():
+                _merge(total, store.copy())  # dict.copy атомарен под GIL
+        return total
+
+    def share(self, directory, interval=5.0):
+        """Сводить метрики процессов через каталог directory; свой файл пишется раз в interval секунд"""
+        if self.directory == directory and self._flusher is not None:
+            return
+        os.makedirs(directory, exist_ok=True)
+        self.directory, self.interval = directory, interval
+        self._start_flusher()
+
+    def _start_flusher(self):
+        self._file = os.path.join(self.directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+        self._flusher = threading.Thread(target=self._flush_forever, name="metrics-flush", daemon=True)
+        self._flusher.start()
+
+    def _flush_forever(self):
+        while True:
+            time.sleep(self.interval)
+            self.dump()
+
+    def _after_fork(self):
+        """В дочернем процессе: свои счётчики с нуля, свой файл и поток записи"""
+        self._reset()
+        if self.directory is not None:
+            self._start_flusher()
+
+    def dump(self):
+        """Записать итоги процесса в его файл (атомарно, через os.replace)"""
+        if self._file is None:
+            return
+        with self._dump_lock:
+            rows = [[name, list(labels), values] for (name, labels), values in self.collect().items()]
+            tmp = f"{self._file}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(rows, f)
+            os.replace(tmp, self._file)
+
+    def collect_all(self):
+        """Итоги всех процессов общего каталога (или только этого, если каталога нет)"""
+        if self.directory is None:
+            return self.collect()
+        self.dump()
+        total = {}
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                with open(entry.path) as f:
+                    rows = json.load(f)
+            except (OSError, ValueError):
+                continue
+            _merge(total, {(name, tuple(labels)): values for name, labels, values in rows})
+        return total
+
+    def render(self):
+        samples = {}
+        for (name, labels), values in self.collect_all().items():
+            samples.setdefault(name, []).append((labels, values))
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for labels, values in sorted(samples.get(name, ())):
+                lines.extend(metric.expose(labels, values))
+        return "\n".join(lines) + "\n"
+
+
+def _merge(target, source):
+    for key, values in source.items():
+        current = target.get(key)
+        if current is None:
+            target[key] = list(values)
+        else:
+            for i, value in enumerate(values):
+                current[i] += value
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, registry, name, documentation, labels):
+        self.registry, self.name, self.documentation, self.labels = registry, name, documentation, labels
+
+    def label_text(self, labels, extra=()):
+        pairs = [*zip(self.labels, labels), *extra]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount=1):
+        store = self.registry.store()
+        key = (self.name, labels)
+        try:
+            store[key][0] += amount
+        except KeyError:
+            store[key] = [amount]
+
+    def expose(self, labels, values):
+        yield f"{self.name}{self.label_text(labels)} {_format(values[0])}"
+
+
+class Histogram(Metric):
+    """Значения: счётчики по корзинам (последняя — +Inf), затем сумма."""
+    type = "histogram"
+
+    def __init__(self, registry, name, documentation, labels, buckets):
+        super().__init__(registry, name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        store = self.registry.store()
+        key = (self.name, labels)
+        values = store.get(key)
+        if values is None:
+            values = store[key] = [0] * (len(self.buckets) + 1) + [0]
+        values[bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    def expose(self, labels, values):
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), values):
+            cumulative += count
+            le = bound if bound == "+Inf" else _format(float(bound))
+            yield f"{self.name}_bucket{self.label_text(labels, [('le', le)])} {cumulative}"
+        yield f"{self.name}_sum{self.label_text(labels)} {_format(values[-1])}"
+        yield f"{self.name}_count{self.label_text(labels)} {cumulative}"
+
+
+registry = Registry()
+os.register_at_fork(after_in_child=registry._after_fork)
+
+
+def serve(port, addr=""):
+    """Отдавать метрики на http://addr:port/ из фонового потока (для процессов без Django HTTP)"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+REQUESTS = registry.counter(
+    "http_requests_total", "HTTP-запросы по маршруту, методу и статусу.", ("route", "method", "status")
+)
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "Время обработки запроса.", ("route", "method")
+)
+REQUEST_QUERIES = registry.histogram(
+    "http_request_db_queries", "SQL-запросов на HTTP-запрос.", ("route", "method"), buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_TIME = registry.histogram(
+    "http_request_db_duration_seconds", "Суммарное время SQL на HTTP-запрос.", ("route", "method")
+)
+CACHE_REQUESTS = registry.counter(
+    "catalog_cache_requests_total", "Обращения к кэшу каталога: hit, miss, wait_hit, wait_timeout.", ("result",)
+)
+THROTTLE_DECISIONS = registry.counter(
+    "throttle_decisions_total", "Решения rate limit: allowed, throttled, error (Redis недоступен, пропущено).",
+    ("scope", "result"),
+)
+OUTBOX_ENQUEUE = registry.histogram(
+    "outbox_enqueue_duration_seconds", "Постановка задачи Celery в outbox (INSERT) из запроса.", ("task",)
+)
+CELERY_PUBLISH = registry.histogram(
+    "celery_publish_duration_seconds", "Отправка задачи в брокер релеем outbox.", ("task",)
+)
+OUTBOX_LAG = registry.histogram(
+    "outbox_delivery_lag_seconds", "От записи в outbox до отправки в брокер.", ("task",),
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+
+# [число запросов, время] текущего HTTP-запроса; копируется в sync_to_async
+request_db_stats = ContextVar("request_db_stats", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper соединений: считает SQL текущего HTTP-запроса"""
+    stats = request_db_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - started
@@ -0,0 +1,123 @@
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.decorators import sync_and_async_middleware
+
+from . import db_router
+from .metrics import (
+    REQUEST_DB_TIME,
+    REQUEST_LATENCY,
+    REQUEST_QUERIES,
+    REQUESTS,
+    record_query,
+    registry,
+    request_db_stats,
+)
+
+KNOWN_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+@sync_and_async_middleware
+def asgi_urlconf_middleware(get_response):
+    """
+    Под ASGI (async-цепочка middleware) маршруты берутся из settings.ASGI_URLCONF:
+    те же URL, но чтение каталога и корзины — async-вьюхи. Под WSGI ничего не меняет.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            request.urlconf = settings.ASGI_URLCONF
+            return await get_response(request)
+    else:
+        def middleware(request):
+            return get_response(request)
+    return middleware
+
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    """
+    Состояние маршрутизации реплик на время запроса (config.db_router).
+
+    Если запрос писал в БД, пользователь (DRF подменяет request.user на
+    аутентифицированного) закрепляется за primary на REPLICA_STICKY_SEC.
+    """
+    def written_by(request, token):
+        """Пользователь, которого надо закрепить за primary, или None"""
+        wrote = db_router.end_request(token)
+        user = getattr(request, "user", None)
+        if wrote and user is not None and user.is_authenticated:
+            return user
+        return None
+
+    def finish(request, token):
+        user = written_by(request, token)
+        if user is not None:
+            db_router.pin_to_primary(f"user:{user.pk}")
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = db_router.begin_request()
+            try:
+                return await get_response(request)
+            finally:
+                user = written_by(request, token)
+                if user is not None:
+                    await db_router.apin_to_primary(f"user:{user.pk}")
+    else:
+        def middleware(request):
+            token = db_router.begin_request()
+            try:
+                return get_response(request)
+            finally:
+                finish(request, token)
+    return middleware
+
+
+def _install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """
+    Время запроса, число и время SQL — в гистограммы по имени маршрута (config.metrics).
+
+    SQL считается execute_wrapper'ом каждого соединения; счётчик запроса лежит
+    в ContextVar, поэтому учитываются и запросы async ORM из sync_to_async.
+    С METRICS_MULTIPROC_DIR метрики воркеров сводятся в общий /metrics.
+    """
+    if settings.METRICS_MULTIPROC_DIR:
+        registry.share(settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_SEC)
+    connection_created.connect(_install_query_recorder, dispatch_uid="config.metrics.record_query")
+
+    def start():
+        for connection in connections.all(initialized_only=True):
+            _install_query_recorder(connection)
+        stats = [0, 0.0]
+        return stats, request_db_stats.set(stats), time.perf_counter()
+
+    def finish(request, response, stats, token, started):
+        elapsed = time.perf_counter() - started
+        request_db_stats.reset(token)
+        match = getattr(request, "resolver_match", None)
+        route = match.view_name if match is not None else "unresolved"
+        method = request.method if request.method in KNOWN_METHODS else "other"
+        REQUESTS.inc(route, method, response.status_code)
+        REQUEST_LATENCY.observe(elapsed, route, method)
+        REQUEST_QUERIES.observe(stats[0], route, method)
+        REQUEST_DB_TIME.observe(stats[1], route, method)
+        return response
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            state = start()
+            return finish(request, await get_response(request), *state)
+    else:
+        def middleware(request):
+            state = start()
+            return finish(request, get_response(request), *state)
+    return middleware
@@ -1,5 +1,13 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class DefaultPagination(PageNumberPagination):
@@ -15,3 +23,226 @@ class DefaultPagination(PageNumberPagination):
             "previous": self.get_previous_link(),
             "results": data,
         })
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset для async-вьюх: COUNT через acount, страница через aiterator"""
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()  # cached_property: Paginator сам не пойдёт в БД
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        self.page.object_list = [row async for row in self.page.object_list.aiterator()]
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset-пагинация по паре (поле сортировки, id).
+
+    Курсор хранит значения ключа последней/первой строки страницы, поэтому
+    любая страница — это один диапазонный запрос по индексу, без COUNT(*)
+    и OFFSET. Поле сортировки берётся из order_by запроса (после OrderingFilter).
+    """
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    tiebreak_field = "id"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self._page_queryset(queryset, request)
+        return self._set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self._page_queryset(queryset, request)
+        return self._set_page([row async for row in queryset.aiterator()])
+
+    def paginate_querysets(self, querysets, request, view=None):
+        """
+        Одна лента из нескольких запросов, идущих друг за другом в порядке ключа
+        (например, свежие партиции, старые, архив): следующий запрос выполняется,
+        только если страница ещё не набрана.
+        """
+        pages = [self._page_queryset(queryset, request) for queryset in querysets]
+        if self._reverse:
+            pages.reverse()
+        results = []
+        for page in pages:
+            results += page[:self.page_size + 1 - len(results)]
+            if len(results) > self.page_size:
+                break
+        return self._set_page(results)
+
+    def _page_queryset(self, queryset, request):
+        """Запрос страницы (page_size + 1 строк после позиции курсора)"""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+
+        position, reverse = self.decode_cursor(request)
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._invert(f) for f in ordering]
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            position = self._to_python(queryset, position)
+            queryset = queryset.filter(self._after(ordering, position))
+        self._position, self._reverse = position, reverse
+        return queryset[:self.page_size + 1]
+
+    def _set_page(self, results):
+        position, reverse = self._position, self._reverse
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        """Ключ сортировки: первое поле order_by + id в том же направлении."""
+        order_by = [f for f in queryset.query.order_by if isinstance(f, str)]
+        field = order_by[0] if order_by else self.tiebreak_field
+        if field.lstrip("-") == self.tiebreak_field:
+            return [field]
+        tiebreak = f"-{self.tiebreak_field}" if field.startswith("-") else self.tiebreak_field
+        return [field, tiebreak]
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, item, reverse):
+        payload = {"p": [self._value(item, f.lstrip("-")) for f in self.ordering]}
+        if reverse:
+            payload["r"] = 1
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        token = urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            raw = urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            payload = json.loads(raw)
+            position = payload["p"]
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(payload.get("r"))
+
+    def _to_python(self, queryset, position):
+        """Значения курсора, приведённые к типам полей сортировки; неприводимые — 404"""
+        values = []
+        for field_name, value in zip(self.ordering, position):
+            name = field_name.lstrip("-")
+            annotation = queryset.query.annotations.get(name)
+            field = annotation.output_field if annotation is not None else queryset.model._meta.get_field(name)
+            try:
+                value = field.to_python(value)
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            values.append(value)
+        return values
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Курсор keyset-пагинации (пустое значение — первая страница).",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Размер страницы.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    @staticmethod
+    def _value(item, field):
+        value = item[field] if isinstance(item, dict) else getattr(item, field)
+        return value if isinstance(value, (int, str)) else str(value)
+
+    @staticmethod
+    def _after(ordering, position):
+        """Условие «строго после позиции» вида a >= v AND (a > v OR id > pk)."""
+        lookups = [
+            (f.lstrip("-"), "lt" if f.startswith("-") else "gt") for f in ordering
+        ]
+        (field, op), values = lookups[0], position
+        if len(lookups) == 1:
+            return Q(**{f"{field}__{op}": values[0]})
+        tie_field, tie_op = lookups[1]
+        return Q(**{f"{field}__{op}e": values[0]}) & (
+            Q(**{f"{field}__{op}": values[0]}) | Q(**{f"{tie_field}__{tie_op}": values[1]})
+        )
@@ -0,0 +1,62 @@
+"""
+Один пул соединений Redis на процесс.
+
+Django создаёт бэкенд кэша на каждый поток (и контекст), поэтому у обычного
+RedisCache пул свой в каждом потоке. SharedPoolRedisCache берёт пулы из
+общего для процесса реестра (shared_pool): кэш, health и throttling делят
+одни соединения, а max_connections ограничивает весь процесс. Без Redis-кэша
+пул строится по REDIS_URL один раз. redis-py сам пересоздаёт пул в дочернем
+процессе после fork.
+"""
+import os
+import re
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+from django.core.cache.backends.redis import RedisCache, RedisCacheClient
+
+CACHE_BACKEND = "config.redis.SharedPoolRedisCache"
+
+
+@lru_cache(maxsize=None)
+def _pool(url):
+    return redis.ConnectionPool.from_url(url, socket_connect_timeout=1, socket_timeout=1)
+
+
+@lru_cache(maxsize=None)
+def _shared_pool(pool_class, url, options):
+    return pool_class.from_url(url, **dict(options))
+
+
+def shared_pool(pool_class, url, options):
+    """Пул процесса для (класс пула, URL, параметры); одинаковые параметры — один пул"""
+    return _shared_pool(pool_class, url, tuple(sorted(options.items())))
+
+
+class SharedPoolRedisCacheClient(RedisCacheClient):
+    def _get_connection_pool(self, write):
+        index = self._get_connection_pool_index(write)
+        return shared_pool(self._pool_class, self._servers[index], self._pool_options)
+
+
+class SharedPoolRedisCache(RedisCache):
+    """RedisCache, у которого все потоки процесса работают через общий пул"""
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self._class = SharedPoolRedisCacheClient
+
+
+def get_redis():
+    """redis.Redis на общем пуле; ValueError, если Redis не настроен"""
+    conf = settings.CACHES["default"]
+    if conf["BACKEND"] == CACHE_BACKEND:
+        location = conf["LOCATION"]
+        servers = re.split("[;,]", location) if isinstance(location, str) else location
+        # тот же пул, что у записи в кэш: клиент без соединений строится по тем же настройкам
+        return SharedPoolRedisCacheClient(servers, **conf.get("OPTIONS", {})).get_client(write=True)
+    url = os.getenv("REDIS_URL")
+    if not url:
+        raise ValueError("REDIS_URL is not set")
+    return redis.Redis(connection_pool=_pool(url))
@@ -20,6 +20,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 
     # Third-party apps
     "rest_framework",
@@ -31,6 +32,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "config.middleware.metrics_middleware",
+    "config.middleware.asgi_urlconf_middleware",
+    "config.middleware.replica_routing_middleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -41,6 +45,7 @@ MIDDLEWARE = [
 ]
 
 ROOT_URLCONF = "config.urls"
+ASGI_URLCONF = "config.urls_asgi"  # async-чтение каталога и корзины под ASGI
 
 TEMPLATES = [
     {
@@ -59,6 +64,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "config.wsgi.application"
+# выставляет config.asgi
+ASGI = os.getenv("DJANGO_ASGI") == "1"
 
 DATABASES = {
     "default": {
@@ -68,9 +75,28 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST", "127.0.0.1"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        # постоянные соединения под WSGI: без переподключения на каждый запрос, битые отбрасываются проверкой.
+        # Под ASGI sync-код каждого запроса идёт в своём потоке, и постоянные соединения не
+        # переиспользовались бы, а копились — там по умолчанию 0 (DB_CONN_MAX_AGE_ASGI).
+        "CONN_MAX_AGE": int(
+            os.getenv("DB_CONN_MAX_AGE_ASGI", "0") if ASGI else os.getenv("DB_CONN_MAX_AGE", "60")
+        ),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Реплики только для чтения: DB_REPLICA_HOSTS=10.0.0.2,10.0.0.3 (остальное — как у default).
+# Чтения каталога, истории заказов и списков админки идут туда через config.db_router.
+DATABASE_REPLICAS = []
+for number, host in enumerate(filter(None, os.getenv("DB_REPLICA_HOSTS", "").split(",")), start=1):
+    alias = f"replica_{number}"
+    DATABASES[alias] = {**DATABASES["default"], "HOST": host.strip(), "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["config.db_router.PrimaryReplicaRouter"]
+# сколько секунд после записи пользователь читает с primary (больше типичного лага реплик)
+REPLICA_STICKY_SEC = int(os.getenv("REPLICA_STICKY_SEC", "5"))
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -89,11 +115,53 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Cache (Redis, если задан REDIS_URL)
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "config.redis.SharedPoolRedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+            "KEY_PREFIX": "shop",
+            # пул соединений процесса, общий с health и throttling (config.redis)
+            "OPTIONS": {
+                "max_connections": int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+                "socket_connect_timeout": 1,
+                "socket_timeout": 1,
+                "health_check_interval": 30,
+            },
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# сколько секунд /health/ отдаёт результат прошлой проверки
+HEALTH_CACHE_SEC = float(os.getenv("HEALTH_CACHE_SEC", "2"))
+
+# общий каталог метрик процессов (несколько воркеров gunicorn); пусто — /metrics только своего процесса
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+# как часто процесс пишет свои метрики в общий каталог, сек
+METRICS_FLUSH_SEC = float(os.getenv("METRICS_FLUSH_SEC", "5"))
+
+# история заказов сначала читает партиции последних N месяцев (shop.partitions)
+ORDER_RECENT_MONTHS = int(os.getenv("ORDER_RECENT_MONTHS", "3"))
+
+# агрегаты продаж учитывают заказы старше стольких секунд (shop.rollups)
+ROLLUP_LAG_SEC = int(os.getenv("ROLLUP_LAG_SEC", "60"))
+
+# Корзины: "db" — CartItem, "redis" — hash в Redis с отложенной записью в CartItem (shop.carts)
+CART_BACKEND = os.getenv("CART_BACKEND", "db")
+# сколько живёт неактивная корзина в Redis (потом читается из CartItem заново)
+CART_REDIS_TTL_SEC = int(os.getenv("CART_REDIS_TTL_SEC", str(7 * 24 * 3600)))
+
 # DRF settings
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "config.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny",
@@ -103,6 +171,17 @@ REST_FRAMEWORK = {
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ],
+    # лимиты по throttle_scope вьюх, счётчики в Redis (config.throttling)
+    "DEFAULT_THROTTLE_CLASSES": ["config.throttling.ScopedRedisThrottle"],
+    "DEFAULT_THROTTLE_RATES": {
+        "login": os.getenv("THROTTLE_LOGIN", "20/min"),
+        "register": os.getenv("THROTTLE_REGISTER", "10/hour"),
+        "cart": os.getenv("THROTTLE_CART", "120/min"),
+        "checkout": os.getenv("THROTTLE_CHECKOUT", "10/min"),
+    },
+    # сколько доверенных прокси перед приложением: IP клиента для лимитов берётся из
+    # X-Forwarded-For только при > 0, иначе заголовок подделывается и лимит обходится
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", "0")),
     "DEFAULT_PAGINATION_CLASS": "config.pagination.DefaultPagination",
     "PAGE_SIZE": 10,
     "EXCEPTION_HANDLER": "config.exceptions.custom_exception_handler",
@@ -110,15 +189,17 @@ REST_FRAMEWORK = {
 
 if DEBUG:
     REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = (
-        "rest_framework.renderers.JSONRenderer",
+        "config.renderers.FastJSONRenderer",
         "rest_framework.renderers.BrowsableAPIRenderer",
     )
 else:
     REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = (
-        "rest_framework.renderers.JSONRenderer",
+        "config.renderers.FastJSONRenderer",
     )
 
 ACCESS_MIN = int(os.getenv("ACCESS_TOKEN_LIFETIME_MIN", "60"))
+# сколько секунд пользователь JWT берётся из кэша без запроса к БД
+AUTH_USER_CACHE_SEC = int(os.getenv("AUTH_USER_CACHE_SEC", "60"))
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=ACCESS_MIN),
     "AUTH_HEADER_TYPES": ("Bearer",),
@@ -134,3 +215,20 @@ SPECTACULAR_SETTINGS = {
 # Celery
 CELERY_BROKER_URL = os.getenv("REDIS_URL")
 CELERY_RESULT_BACKEND = os.getenv("REDIS_URL")
+# порт HTTP-метрик celery worker (релей outbox, задачи); 0 — не отдавать
+CELERY_METRICS_PORT = int(os.getenv("CELERY_METRICS_PORT", "0"))
+CELERY_BEAT_SCHEDULE = {
+    "relay-outbox": {
+        "task": "shop.tasks.relay_outbox",
+        "schedule": float(os.getenv("OUTBOX_RELAY_INTERVAL_SEC", "1")),
+    },
+    "update-sales-rollups": {
+        "task": "shop.tasks.update_sales_rollups",
+        "schedule": float(os.getenv("ROLLUP_INTERVAL_SEC", "60")),
+    },
+}
+if CART_BACKEND == "redis":
+    CELERY_BEAT_SCHEDULE["flush-carts"] = {
+        "task": "shop.tasks.flush_carts",
+        "schedule": float(os.getenv("CART_FLUSH_INTERVAL_SEC", "5")),
+    }
@@ -0,0 +1,133 @@
+"""
+Rate limit на Redis: скользящее окно со взвешенным прошлым окном.
+
+Решение принимает Lua-скрипт в Redis за один EVALSHA: счётчики текущего и
+прошлого окна лежат в одном hash, время берётся из Redis (TIME), поэтому
+часы инстансов не важны. При недоступном Redis запросы пропускаются
+(fail open), и на FAIL_OPEN_SEC обращения к нему не делаются, чтобы
+таймауты не копились на каждом запросе.
+"""
+import logging
+import math
+import time
+
+import redis
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from .metrics import THROTTLE_DECISIONS
+from .redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+FAIL_OPEN_SEC = 5
+
+# KEYS[1] — hash {w: номер окна, cur, prev}; ARGV: лимит, длина окна в мс.
+# Возвращает {1, 0} или {0, через сколько мс повторить}.
+SLIDING_WINDOW = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local current = math.floor(now / window)
+local elapsed = now - current * window
+
+local state = redis.call('HMGET', KEYS[1], 'w', 'cur', 'prev')
+local w, cur, prev = tonumber(state[1]), tonumber(state[2]) or 0, tonumber(state[3]) or 0
+if w ~= current then
+    if w == current - 1 then prev = cur else prev = 0 end
+    cur = 0
+end
+
+local remaining = (window - elapsed) / window
+if prev * remaining + cur >= limit then
+    local retry
+    if cur < limit then
+        -- оценка опустится ниже лимита, когда вес прошлого окна уменьшится на (limit - cur) / prev
+        retry = (window - elapsed) - (limit - cur) * window / prev
+    else
+        -- в текущем окне не опустится; в следующем cur станет прошлым окном с весом, падающим от 1
+        retry = (window - elapsed) + (cur - limit) * window / cur
+    end
+    return {0, math.floor(retry) + 1}
+end
+
+redis.call('HSET', KEYS[1], 'w', current, 'cur', cur + 1, 'prev', prev)
+redis.call('PEXPIRE', KEYS[1], window * 2)
+return {1, 0}
+"""
+
+_skip_until = 0.0
+
+
+class ScopedRedisThrottle(SimpleRateThrottle):
+    """
+    Лимит по throttle_scope вьюхи (или действия: @action(throttle_scope=...)),
+    ключ — пользователь или IP (REMOTE_ADDR; X-Forwarded-For — только при
+    REST_FRAMEWORK["NUM_PROXIES"] > 0). Вьюхи без throttle_scope не ограничиваются.
+    Лимиты — REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"], None снимает лимит scope.
+    """
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    def __init__(self):
+        # rate зависит от вьюхи и определяется в allow_request
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, "throttle_scope", None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.retry_after = None
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        allowed = self.acquire(key)
+        if allowed is None:
+            THROTTLE_DECISIONS.inc(self.scope, "error")
+            return True
+        THROTTLE_DECISIONS.inc(self.scope, "allowed" if allowed else "throttled")
+        return allowed
+
+    def get_rate(self):
+        # из настроек при каждом запросе, а не один раз при импорте, как у SimpleRateThrottle
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        if self.scope not in rates:
+            raise ImproperlyConfigured(f"No default throttle rate set for '{self.scope}' scope")
+        return rates[self.scope]
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+    def acquire(self, key):
+        """True/False или None, если Redis недоступен"""
+        global _skip_until
+        if time.monotonic() < _skip_until:
+            return None
+        try:
+            client = get_redis()
+        except ValueError:
+            return None  # Redis не настроен (локальная разработка): без лимитов
+        try:
+            allowed, retry_ms = client.register_script(SLIDING_WINDOW)(
+                keys=[key], args=[self.num_requests, self.duration * 1000]
+            )
+        except redis.RedisError as exc:
+            _skip_until = time.monotonic() + FAIL_OPEN_SEC
+            logger.warning("throttling disabled for %ss, redis error: %s", FAIL_OPEN_SEC, exc)
+            return None
+        if not allowed:
+            self.retry_after = retry_ms / 1000
+        return bool(allowed)
+
+    def wait(self):
+        return math.ceil(self.retry_after) if self.retry_after else None
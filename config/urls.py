@@ -1,34 +1,29 @@
-import os
-
-import redis
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.db import connection
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.urls import include, path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from . import health as health_probe
+from .metrics import CONTENT_TYPE, registry
+
+
+class LoginView(TokenObtainPairView):
+    throttle_scope = "login"
+
 
 def health(request):
-    ok_db = ok_redis = False
-    try:
-        with connection.cursor() as cur:
-            cur.execute("SELECT 1;")
-        ok_db = True
-    except Exception:
-        ok_db = False
+    """Состояние БД и Redis; результат проб кэшируется на HEALTH_CACHE_SEC (config.health)"""
+    state = health_probe.check()
+    status_code = 200 if (state["db"] and state["redis"]) else 503
+    return JsonResponse(state, status=status_code)
 
-    try:
-        r = redis.from_url(os.getenv("REDIS_URL"))
-        r.ping()
-        ok_redis = True
-    except Exception:
-        ok_redis = False
 
-    status_code = 200 if (ok_db and ok_redis) else 503
-    return JsonResponse({"db": ok_db, "redis": ok_redis}, status=status_code)
+def metrics(request):
+    """Метрики для Prometheus: этого процесса или всех процессов METRICS_MULTIPROC_DIR"""
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
 
 
 urlpatterns = [
@@ -39,7 +34,7 @@ urlpatterns = [
     path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="docs"),
 
     # Auth (JWT)
-    path("api/auth/login/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
+    path("api/auth/login/", LoginView.as_view(), name="token_obtain_pair"),
     path("api/auth/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
 
     # App routes
@@ -47,6 +42,7 @@ urlpatterns = [
 
     # Healthcheck
     path("health/", health),
+    path("metrics", metrics),
 ]
 
 if settings.DEBUG:
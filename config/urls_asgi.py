@@ -0,0 +1,14 @@
+"""Маршруты для ASGI: async-чтение каталога и корзины поверх config.urls."""
+from django.urls import path
+
+from shop import async_views
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path("api/products/", async_views.product_list, name="products-list"),
+    path("api/products/<int:pk>/", async_views.product_detail, name="products-detail"),
+    path("api/products-cached/", async_views.products_cached, name="products-cached"),
+    path("api/cart/", async_views.cart_list, name="cart-list"),
+    *sync_urlpatterns,
+]
@@ -1,5 +1,17 @@
 from django.contrib import admin
-from .models import Product, CartItem, Order, OrderItem
 
+from config.db_router import read_from_replica
 
-admin.site.register([Product, CartItem, Order, OrderItem])
+from .models import Product, CartItem, Order, OrderItem, OutboxMessage
+
+
+class ReplicaReadAdmin(admin.ModelAdmin):
+    """Списки (GET) читаются с реплики; формы и действия — с primary"""
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method == "GET":
+            read_from_replica(request.user)
+        return super().changelist_view(request, extra_context)
+
+
+admin.site.register([Product, CartItem, Order, OrderItem, OutboxMessage], ReplicaReadAdmin)
@@ -0,0 +1,127 @@
+"""
+Async-версии GET-действий вьюсетов для ASGI.
+
+Вьюха берёт у вьюсета всё, что не ходит в БД (фильтры, права, пагинатор,
+рендерер, обработку ошибок), а запросы делает через async ORM (a<action>
+вьюсета). Остальные методы того же URL уходят в обычный sync-вьюсет.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.translation import gettext_lazy as _
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from config.authentication import CachedJWTAuthentication
+from config.db_router import ReplicaReadMixin
+
+from .views import CartViewSet, ProductViewSet
+
+ASYNC_METHODS = ("GET", "HEAD")
+
+
+async def _jwt_authenticate(authenticator, request):
+    """JWTAuthentication.authenticate с пользователем из кэша (CachedJWTAuthentication) или aget"""
+    header = authenticator.get_header(request)
+    if header is None:
+        return None
+    raw_token = authenticator.get_raw_token(header)
+    if raw_token is None:
+        return None
+    token = authenticator.get_validated_token(raw_token)
+
+    if isinstance(authenticator, CachedJWTAuthentication):
+        return await authenticator.aget_user(token), token
+
+    try:
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(_("Token contained no recognizable user identification"))
+    user_model = authenticator.user_model
+    try:
+        user = await user_model.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+    except user_model.DoesNotExist:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+    if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    if jwt_settings.CHECK_REVOKE_TOKEN and (
+        token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+    ):
+        raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+    return user, token
+
+
+async def aauthenticate(request):
+    """Request._authenticate для async-вьюх; неизвестные классы выполняются в потоке"""
+    for authenticator in request.authenticators:
+        if isinstance(authenticator, JWTAuthentication):
+            result = await _jwt_authenticate(authenticator, request)
+        else:
+            result = await sync_to_async(authenticator.authenticate)(request)
+        if result is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = result
+            return
+    request._not_authenticated()
+
+
+def _plain(response):
+    """Отрендерить ответ DRF здесь: иначе Django отрендерит его через sync_to_async"""
+    if not isinstance(response, Response):
+        return response
+    response.render()
+    plain = HttpResponse(response.content, status=response.status_code)
+    for header, value in response.items():
+        plain[header] = value
+    return plain
+
+
+def async_view(viewset, actions, **initkwargs):
+    """
+    Async Django view для маршрута вьюсета: GET -> a<action>, остальное -> viewset.as_view(actions).
+    """
+    sync_view = viewset.as_view(actions, **initkwargs)
+    action = actions["get"]
+
+    async def view(request, *args, **kwargs):
+        if request.method not in ASYNC_METHODS:
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+        self = viewset(**initkwargs)
+        self.action_map = actions
+        self.args, self.kwargs = args, kwargs
+        self.headers = self.default_response_headers
+        request = self.request = self.initialize_request(request, *args, **kwargs)
+        self.action = action  # в т.ч. для HEAD
+        routes_reads = isinstance(self, ReplicaReadMixin)
+        self.defer_replica_routing = routes_reads  # проверка закрепления — без блокировки event loop
+        try:
+            await aauthenticate(request)
+            self.initial(request, *args, **kwargs)
+            if routes_reads:
+                await self.aroute_reads(request)
+            response = await getattr(self, f"a{action}")(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        return _plain(self.finalize_response(request, response, *args, **kwargs))
+
+    view.cls = viewset
+    view.initkwargs = initkwargs
+    view.actions = actions
+    return csrf_exempt(view)
+
+
+product_list = async_view(ProductViewSet, {"get": "list", "post": "create"}, basename="products", detail=False)
+product_detail = async_view(
+    ProductViewSet,
+    {"get": "retrieve", "put": "update", "patch": "partial_update", "delete": "destroy"},
+    basename="products",
+    detail=True,
+)
+products_cached = async_view(ProductViewSet, {"get": "list"})
+cart_list = async_view(CartViewSet, {"get": "list"}, basename="cart", detail=False)
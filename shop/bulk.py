@@ -0,0 +1,108 @@
+import csv
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Product
+
+IMPORT_FIELDS = ("sku", "name", "price", "description")
+UPDATE_FIELDS = ["name", "price", "description", "updated_at"]
+EXPORT_FIELDS = ("id", "sku", "name", "price", "description")
+FORMATS = ("csv", "jsonl")
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    if str(path).endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return "csv"
+
+
+def read_rows(stream, fmt):
+    """Строки файла по одной: (номер строки, dict). Память не зависит от размера файла."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for lineno, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    yield lineno, json.loads(line)
+                except ValueError as exc:
+                    yield lineno, exc
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def validate_row(raw):
+    """Значения полей Product из сырой строки; правила — валидаторы полей модели."""
+    if not isinstance(raw, dict):
+        raise ValidationError(f"некорректная строка: {raw}")
+    values, errors = {}, {}
+    for name in IMPORT_FIELDS:
+        field = Product._meta.get_field(name)
+        value = raw.get(name)
+        if value in ("", None) and field.null:
+            value = None
+        try:
+            values[name] = field.clean(value, None)
+        except ValidationError as exc:
+            errors[name] = exc.messages
+    if not values.get("sku") and "sku" not in errors:
+        errors["sku"] = ["Обязательное поле."]
+    if errors:
+        raise ValidationError(errors)
+    return values
+
+
+def upsert_chunk(rows):
+    """
+    Проверить и записать пачку строк одним bulk_create(update_conflicts=True) по sku.
+
+    Возвращает (число записанных, [(номер строки, ошибки)]).
+    """
+    products, errors = {}, []
+    for lineno, raw in rows:
+        try:
+            values = validate_row(raw)
+        except ValidationError as exc:
+            errors.append((lineno, exc.message_dict if hasattr(exc, "error_dict") else exc.messages))
+            continue
+        products[values["sku"]] = Product(**values)  # повтор sku в пачке: побеждает последняя строка
+
+    if products:
+        with transaction.atomic():
+            Product.objects.bulk_create(
+                [products[sku] for sku in sorted(products)],
+                update_conflicts=True,
+                unique_fields=["sku"],
+                update_fields=UPDATE_FIELDS,
+            )
+    return len(products), errors
+
+
+def write_rows(stream, fmt, chunk_size=2000):
+    """Выгрузить каталог потоком; .iterator() на PostgreSQL читает через серверный курсор."""
+    rows = Product.objects.order_by("id").values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(stream)
+        writer.writerow(EXPORT_FIELDS)
+        for row in rows:
+            writer.writerow(["" if v is None else v for v in row])
+            count += 1
+    else:
+        for row in rows:
+            record = dict(zip(EXPORT_FIELDS, row))
+            record["price"] = str(record["price"])
+            stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    return count
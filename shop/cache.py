@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+from config.db_router import pin_to_primary
+from config.metrics import CACHE_REQUESTS
+
+from .models import Product
+
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_MODIFIED_KEY = "catalog:modified"
+CATALOG_CACHE_TIMEOUT = 60 * 60       # записи старых версий просто доживают TTL
+REBUILD_LOCK_TIMEOUT = 10             # сколько держится блокировка пересборки, сек
+REBUILD_WAIT = 2.0                    # сколько остальные ждут результат, сек
+REBUILD_POLL = 0.05
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, 1, timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY, 1)
+    return version
+
+
+def get_catalog_state():
+    """(версия, unix-время последнего изменения) каталога; пока кэш тёплый — без запросов к БД"""
+    state = cache.get_many([CATALOG_VERSION_KEY, CATALOG_MODIFIED_KEY])
+    version = state.get(CATALOG_VERSION_KEY) or get_catalog_version()
+    modified = state.get(CATALOG_MODIFIED_KEY)
+    if modified is None:
+        latest = Product.objects.aggregate(latest=Max("updated_at"))["latest"]
+        cache.add(CATALOG_MODIFIED_KEY, int(latest.timestamp()) if latest else int(time.time()), timeout=None)
+        modified = cache.get(CATALOG_MODIFIED_KEY)
+    return version, modified
+
+
+async def aget_catalog_state():
+    """get_catalog_state для async-вьюх"""
+    state = await cache.aget_many([CATALOG_VERSION_KEY, CATALOG_MODIFIED_KEY])
+    version = state.get(CATALOG_VERSION_KEY)
+    if not version:
+        await cache.aadd(CATALOG_VERSION_KEY, 1, timeout=None)
+        version = await cache.aget(CATALOG_VERSION_KEY, 1)
+    modified = state.get(CATALOG_MODIFIED_KEY)
+    if modified is None:
+        latest = (await Product.objects.aaggregate(latest=Max("updated_at")))["latest"]
+        await cache.aadd(CATALOG_MODIFIED_KEY, int(latest.timestamp()) if latest else int(time.time()), timeout=None)
+        modified = await cache.aget(CATALOG_MODIFIED_KEY)
+    return version, modified
+
+
+def bump_catalog_version():
+    """Новая версия каталога: все ранее закэшированные ответы становятся недостижимы."""
+    # пока реплики догоняют, новую версию собираем с primary
+    pin_to_primary("catalog")
+    # Last-Modified с точностью до секунды: две записи за секунду всё равно сдвигают его вперёд,
+    # иначе клиент только с If-Modified-Since получил бы 304 на новую версию
+    previous = cache.get(CATALOG_MODIFIED_KEY)
+    cache.set(CATALOG_MODIFIED_KEY, max(int(time.time()), previous + 1 if previous else 0), timeout=None)
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOG_VERSION_KEY, 2, timeout=None)
+        return cache.get(CATALOG_VERSION_KEY)
+
+
+def request_digest(request, **kwargs):
+    """
+    Хост и путь (абсолютные URL картинок и ссылки пагинации) + аргументы маршрута
+    + нормализованные параметры запроса
+    """
+    params = sorted((k, sorted(v)) for k, v in request.query_params.lists())
+    raw = repr((request.scheme, request.get_host(), request.path, sorted(kwargs.items()), params))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def catalog_cache_key(kind, request, version=None, **kwargs):
+    """Ключ ответа: версия каталога + request_digest."""
+    if version is None:
+        version = get_catalog_version()
+    return f"catalog:v{version}:{kind}:{request_digest(request, **kwargs)}"
+
+
+def get_or_build(key, build, timeout=CATALOG_CACHE_TIMEOUT):
+    """
+    Значение из кэша или build().
+
+    Защита от stampede: пересобирает только тот, кто взял блокировку через cache.add,
+    остальные до REBUILD_WAIT секунд ждут готовое значение.
+    """
+    value = cache.get(key)
+    if value is not None:
+        CACHE_REQUESTS.inc("hit")
+        return value
+
+    lock_key = f"{key}:lock"
+    if not cache.add(lock_key, 1, timeout=REBUILD_LOCK_TIMEOUT):
+        deadline = time.monotonic() + REBUILD_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(REBUILD_POLL)
+            value = cache.get(key)
+            if value is not None:
+                CACHE_REQUESTS.inc("wait_hit")
+                return value
+        CACHE_REQUESTS.inc("wait_timeout")
+        return build()
+
+    CACHE_REQUESTS.inc("miss")
+    try:
+        value = build()
+        if value is not None:
+            cache.set(key, value, timeout)
+        return value
+    finally:
+        cache.delete(lock_key)
+
+
+async def aget_or_build(key, build, timeout=CATALOG_CACHE_TIMEOUT):
+    """get_or_build для async-вьюх; build — корутинная функция"""
+    value = await cache.aget(key)
+    if value is not None:
+        CACHE_REQUESTS.inc("hit")
+        return value
+
+    lock_key = f"{key}:lock"
+    if not await cache.aadd(lock_key, 1, timeout=REBUILD_LOCK_TIMEOUT):
+        deadline = time.monotonic() + REBUILD_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(REBUILD_POLL)
+            value = await cache.aget(key)
+            if value is not None:
+                CACHE_REQUESTS.inc("wait_hit")
+                return value
+        CACHE_REQUESTS.inc("wait_timeout")
+        return await build()
+
+    CACHE_REQUESTS.inc("miss")
+    try:
+        value = await build()
+        if value is not None:
+            await cache.aset(key, value, timeout)
+        return value
+    finally:
+        await cache.adelete(lock_key)
+
+
+class CatalogCacheMixin:
+    """
+    list/retrieve отдаются из кэша до первой записи в Product.
+
+    ETag и Last-Modified берутся из состояния каталога, поэтому совпавший
+    If-None-Match / If-Modified-Since получает 304 без обращения к БД.
+    """
+
+    def list(self, request, *args, **kwargs):
+        parent = super().list
+        return self._cached_response("list", request, lambda: parent(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        parent = super().retrieve
+        return self._cached_response(
+            "detail", request, lambda: parent(request, *args, **kwargs), **kwargs
+        )
+
+    async def alist(self, request, *args, **kwargs):
+        parent = super().alist
+        return await self._acached_response("list", request, lambda: parent(request, *args, **kwargs))
+
+    async def aretrieve(self, request, *args, **kwargs):
+        parent = super().aretrieve
+        return await self._acached_response(
+            "detail", request, lambda: parent(request, *args, **kwargs), **kwargs
+        )
+
+    def _cached_response(self, kind, request, handler, **kwargs):
+        version, modified = get_catalog_state()
+        key, etag = self._validators(kind, request, version, **kwargs)
+        not_modified = self._not_modified(request, etag, modified)
+        if not_modified is not None:
+            return not_modified
+        return self._with_validators(self._build_response(key, handler), etag, modified)
+
+    async def _acached_response(self, kind, request, handler, **kwargs):
+        version, modified = await aget_catalog_state()
+        key, etag = self._validators(kind, request, version, **kwargs)
+        not_modified = self._not_modified(request, etag, modified)
+        if not_modified is not None:
+            return not_modified
+        return self._with_validators(await self._abuild_response(key, handler), etag, modified)
+
+    @staticmethod
+    def _validators(kind, request, version, **kwargs):
+        """(ключ кэша, ETag) ответа"""
+        key = catalog_cache_key(kind, request, version=version, **kwargs)
+        representation = hashlib.md5(f"{key}|{request.accepted_media_type}".encode()).hexdigest()
+        return key, f'"{version}-{representation[:16]}"'
+
+    @staticmethod
+    def _not_modified(request, etag, modified):
+        response = get_conditional_response(request._request, etag=etag, last_modified=modified)
+        if response is not None:
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(modified)
+        return response
+
+    @staticmethod
+    def _with_validators(response, etag, modified):
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(modified)
+        return response
+
+    def _build_response(self, key, handler):
+        responses = {}
+
+        def build():
+            response = handler()
+            responses["fresh"] = response
+            # кэшируем только данные успешных ответов, рендер остаётся за DRF
+            return response.data if response.status_code == status.HTTP_200_OK else None
+
+        data = get_or_build(key, build)
+        if "fresh" in responses:
+            return responses["fresh"]
+        return Response(data)
+
+    async def _abuild_response(self, key, handler):
+        responses = {}
+
+        async def build():
+            response = await handler()
+            responses["fresh"] = response
+            return response.data if response.status_code == status.HTTP_200_OK else None
+
+        data = await aget_or_build(key, build)
+        if "fresh" in responses:
+            return responses["fresh"]
+        return Response(data)
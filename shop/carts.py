@@ -0,0 +1,233 @@
+"""
+Хранилища корзин: CartItem в БД (по умолчанию) или Redis (CART_BACKEND=redis).
+
+В Redis корзина — hash cart:{user_id} {product_id: quantity} плюс поле-метка
+"_" (корзина загружена из БД, в т.ч. пустая). Изменения идут только в Redis,
+пользователь попадает в множество cart:dirty, а задача flush_carts (celery beat)
+переписывает его строки CartItem по hash'у. При оформлении заказа корзина
+атомарно забирается из Redis, записывается в CartItem и переносится в заказ
+обычным checkout_cart. Id позиции в Redis-корзине — id товара.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.db import router, transaction
+
+from config.redis import get_redis
+
+from .checkout import checkout_cart
+from .models import CartItem, Product
+
+CART_KEY = "cart:{user_id}"
+DIRTY_KEY = "cart:dirty"
+LOADED = b"_"
+
+# KEYS[1] — hash корзины; ARGV: ttl, затем пары product_id, quantity из БД.
+# Загружает, только если корзины ещё нет: уже начатые в Redis изменения не затираются.
+LOAD = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('HSET', KEYS[1], '_', 1, unpack(ARGV, 2))
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+"""
+
+# Забрать содержимое и оставить пустую загруженную корзину; nil, если корзины нет.
+TAKE = """
+local lines = redis.call('HGETALL', KEYS[1])
+if #lines == 0 then
+    return false
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], '_', 1)
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return lines
+"""
+
+
+def _products(ids):
+    return Product.objects.defer("search_vector").in_bulk(ids)
+
+
+class DatabaseCartStore:
+    """Корзина в таблице CartItem"""
+    in_database = True
+
+    def items(self, user_id):
+        return CartItem.objects.filter(user_id=user_id).select_related("product")
+
+    def add(self, user_id, product_id, quantity):
+        """CartItem с итоговым количеством или None, если товара нет"""
+        row = CartItem.objects.add_quantity(user_id, product_id, quantity)
+        if row is None:
+            return None
+        item_id, total = row
+        product = Product.objects.defer("search_vector").get(id=product_id)
+        return CartItem(id=item_id, user_id=user_id, product=product, quantity=total)
+
+    def update(self, user_id, quantities, increment, remove):
+        """{product_id: quantity} (товары проверены) прибавить или записать, remove — удалить"""
+        with transaction.atomic(using=router.db_for_write(CartItem)):
+            CartItem.objects.upsert_quantities(user_id, quantities, increment=increment)
+            if remove:
+                CartItem.objects.filter(user_id=user_id, product_id__in=remove).delete()
+
+    def remove_item(self, user_id, item_id):
+        deleted, _ = CartItem.objects.filter(pk=item_id, user_id=user_id).delete()
+        return bool(deleted)
+
+    def remove_product(self, user_id, product_id):
+        deleted, _ = CartItem.objects.filter(user_id=user_id, product_id=product_id).delete()
+        return bool(deleted)
+
+    def checkout(self, user):
+        return checkout_cart(user)
+
+
+class RedisCartStore:
+    """Корзина в Redis hash с отложенной записью в CartItem"""
+    in_database = False
+
+    def items(self, user_id):
+        lines = self._load(user_id)
+        products = _products(lines)
+        return [
+            CartItem(id=pid, user_id=user_id, product=products[pid], quantity=qty)
+            for pid, qty in sorted(lines.items())
+            if pid in products
+        ]
+
+    def add(self, user_id, product_id, quantity):
+        product = _products([product_id]).get(product_id)
+        if product is None:
+            return None
+        self._load(user_id)
+        total = self._write(user_id, lambda pipe, key: pipe.hincrby(key, product_id, quantity))[0]
+        return CartItem(id=product_id, user_id=user_id, product=product, quantity=total)
+
+    def update(self, user_id, quantities, increment, remove):
+        self._load(user_id)
+
+        def apply(pipe, key):
+            for product_id, quantity in sorted(quantities.items()):
+                if increment:
+                    pipe.hincrby(key, product_id, quantity)
+                else:
+                    pipe.hset(key, product_id, quantity)
+            if remove:
+                pipe.hdel(key, *remove)
+
+        if quantities or remove:
+            self._write(user_id, apply)
+
+    def remove_item(self, user_id, item_id):
+        return self.remove_product(user_id, item_id)
+
+    def remove_product(self, user_id, product_id):
+        if not str(product_id).isdigit():
+            return False
+        self._load(user_id)
+        return bool(self._write(user_id, lambda pipe, key: pipe.hdel(key, product_id))[0])
+
+    def checkout(self, user):
+        """
+        Забрать корзину из Redis, записать в CartItem и оформить заказ в одной транзакции.
+
+        Добавления во время оформления попадают в новую пустую корзину; при ошибке
+        забранные позиции возвращаются обратно.
+        """
+        self._load(user.pk)
+        client = get_redis()
+        raw = client.register_script(TAKE)(keys=[self._key(user.pk)], args=[settings.CART_REDIS_TTL_SEC])
+        if raw is None:
+            return checkout_cart(user)  # корзина истекла в Redis между вызовами: данные в БД
+        lines = self._decode(dict(zip(raw[::2], raw[1::2])))
+        try:
+            with transaction.atomic(using=router.db_for_write(CartItem)):
+                self._lock_user(user.pk)
+                self._write_rows(user.pk, lines)
+                order = checkout_cart(user)
+        except BaseException:
+            self._restore(user.pk, lines)
+            raise
+        if order is None:
+            self._restore(user.pk, lines)
+        return order
+
+    def flush(self, batch_size=500):
+        """Записать в CartItem до batch_size изменённых корзин; возвращает их число"""
+        client = get_redis()
+        user_ids = [int(uid) for uid in client.spop(DIRTY_KEY, batch_size) or []]
+        for index, user_id in enumerate(user_ids):
+            try:
+                with transaction.atomic(using=router.db_for_write(CartItem)):
+                    # hash читается под блокировкой, иначе можно записать корзину, уже ушедшую в заказ
+                    if not self._lock_user(user_id):
+                        continue
+                    raw = client.hgetall(self._key(user_id))
+                    if raw:  # истёкшую корзину не трогаем: в БД последнее записанное состояние
+                        self._write_rows(user_id, self._decode(raw))
+            except Exception:
+                client.sadd(DIRTY_KEY, *user_ids[index:])
+                raise
+        return len(user_ids)
+
+    @staticmethod
+    def _key(user_id):
+        return CART_KEY.format(user_id=user_id)
+
+    @staticmethod
+    def _decode(raw):
+        return {int(pid): int(qty) for pid, qty in raw.items() if pid != LOADED}
+
+    def _load(self, user_id):
+        """{product_id: quantity}; при первом обращении корзина загружается из CartItem"""
+        client = get_redis()
+        key = self._key(user_id)
+        raw = client.hgetall(key)
+        if not raw:
+            rows = CartItem.objects.filter(user_id=user_id).values_list("product_id", "quantity")
+            args = [value for row in rows for value in row]
+            client.register_script(LOAD)(keys=[key], args=[settings.CART_REDIS_TTL_SEC, *args])
+            raw = client.hgetall(key)
+        return self._decode(raw)
+
+    def _write(self, user_id, apply):
+        """Изменение hash'а + продление TTL + отметка для flush_carts одной транзакцией Redis"""
+        key = self._key(user_id)
+        with get_redis().pipeline() as pipe:
+            apply(pipe, key)
+            pipe.expire(key, settings.CART_REDIS_TTL_SEC)
+            pipe.sadd(DIRTY_KEY, user_id)
+            return pipe.execute()
+
+    def _restore(self, user_id, lines):
+        def apply(pipe, key):
+            for product_id, quantity in lines.items():
+                pipe.hincrby(key, product_id, quantity)
+
+        if lines:
+            self._write(user_id, apply)
+
+    @staticmethod
+    def _lock_user(user_id):
+        """Блокировка строки пользователя: flush и оформление одной корзины идут по очереди"""
+        return User.objects.select_for_update().filter(pk=user_id).values_list("pk", flat=True).first() is not None
+
+    @staticmethod
+    def _write_rows(user_id, lines):
+        """Строки CartItem пользователя = lines; вызывается под _lock_user"""
+        # удалённые товары пропускаем: для них в CartItem нет строк (CASCADE)
+        existing = set(Product.objects.filter(id__in=lines).values_list("id", flat=True))
+        known = {pid: qty for pid, qty in lines.items() if pid in existing}
+        CartItem.objects.filter(user_id=user_id).exclude(product_id__in=known).delete()
+        CartItem.objects.upsert_quantities(user_id, known, increment=False)
+
+
+STORES = {"db": DatabaseCartStore(), "redis": RedisCartStore()}
+
+
+def get_cart_store():
+    try:
+        return STORES[settings.CART_BACKEND]
+    except KeyError:
+        raise ImproperlyConfigured(f"CART_BACKEND must be one of {sorted(STORES)}")
@@ -0,0 +1,120 @@
+import json
+from decimal import Decimal
+
+from django.db import connections, router, transaction
+
+from .models import CartItem, Order, OrderItem, Product
+from .outbox import enqueue
+from .snapshots import build_snapshots
+
+CENTS = Decimal("0.01")
+
+
+def _tables(connection):
+    qn = connection.ops.quote_name
+    return {
+        "cart": qn(CartItem._meta.db_table),
+        "product": qn(Product._meta.db_table),
+        "order": qn(Order._meta.db_table),
+        "item": qn(OrderItem._meta.db_table),
+    }
+
+
+def _move_cart_postgresql(cursor, t, user_id, order_id, using):
+    """Одна инструкция: DELETE корзины -> INSERT позиций -> UPDATE суммы и снимка заказа"""
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM {t['cart']} WHERE user_id = %s
+            RETURNING product_id, quantity
+        ), items AS (
+            INSERT INTO {t['item']} (order_id, product_id, price, quantity)
+            SELECT %s, m.product_id, p.price, m.quantity
+            FROM moved m JOIN {t['product']} p ON p.id = m.product_id
+            RETURNING id, product_id, price, quantity
+        )
+        UPDATE {t['order']}
+        SET total = (SELECT COALESCE(SUM(price * quantity), 0) FROM items),
+            item_count = (SELECT COALESCE(SUM(quantity), 0) FROM items),
+            items_snapshot = (
+                SELECT COALESCE(
+                    jsonb_agg(
+                        jsonb_build_object(
+                            'product_id', i.product_id,
+                            'product_name', p.name,
+                            'price', i.price::text,
+                            'quantity', i.quantity
+                        )
+                        ORDER BY i.id
+                    ),
+                    '[]'::jsonb
+                )
+                FROM items i JOIN {t['product']} p ON p.id = i.product_id
+            )
+        WHERE id = %s
+        RETURNING total, (SELECT COUNT(*) FROM items)
+        """,
+        [user_id, order_id, order_id],
+    )
+    return cursor.fetchone()
+
+
+def _move_cart_generic(cursor, t, user_id, order_id, using):
+    """То же для СУБД без DML в CTE (SQLite): INSERT ... SELECT, DELETE, UPDATE"""
+    cursor.execute(
+        f"""
+        INSERT INTO {t['item']} (order_id, product_id, price, quantity)
+        SELECT %s, c.product_id, p.price, c.quantity
+        FROM {t['cart']} c JOIN {t['product']} p ON p.id = c.product_id
+        WHERE c.user_id = %s
+        """,
+        [order_id, user_id],
+    )
+    count = cursor.rowcount
+    cursor.execute(f"DELETE FROM {t['cart']} WHERE user_id = %s", [user_id])
+    snapshot = build_snapshots([order_id], using=using)[order_id]
+    cursor.execute(
+        f"""
+        UPDATE {t['order']}
+        SET total = (SELECT COALESCE(SUM(price * quantity), 0) FROM {t['item']} WHERE order_id = %s),
+            item_count = %s,
+            items_snapshot = %s
+        WHERE id = %s
+        RETURNING total
+        """,
+        [order_id, sum(line["quantity"] for line in snapshot), json.dumps(snapshot), order_id],
+    )
+    return cursor.fetchone()[0], count
+
+
+def checkout_cart(user):
+    """
+    Перенести корзину пользователя в новый заказ.
+
+    Позиции переносятся INSERT ... SELECT, сумма считается агрегатом в БД,
+    в заказ пишется снимок позиций, уведомление — в outbox; всё в одной короткой транзакции.
+    Возвращает Order или None для пустой корзины.
+    """
+    using = router.db_for_write(Order)
+    connection = connections[using]
+    move = _move_cart_postgresql if connection.vendor == "postgresql" else _move_cart_generic
+
+    with transaction.atomic(using=using):
+        order = Order.objects.using(using).create(user=user, total=Decimal("0"))
+        with connection.cursor() as cursor:
+            total, count = move(cursor, _tables(connection), user.pk, order.pk, using)
+        if not count:
+            transaction.set_rollback(True, using=using)
+            return None
+
+        order.total = Decimal(str(total)).quantize(CENTS)
+        # уведомление уходит в брокер релеем outbox и только если заказ закоммичен
+        enqueue(
+            "shop.tasks.send_order_notification",
+            using=using,
+            order_id=order.pk,
+            username=user.get_username(),
+            total=str(order.total),
+        )
+
+    return order
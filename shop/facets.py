@@ -0,0 +1,124 @@
+"""
+Фасеты каталога: число товаров, min/max и гистограмма цен для текущих
+?q=/?search= и фильтров — одним сгруппированным запросом (на PostgreSQL;
+на остальных СУБД двумя: агрегаты и CASE по корзинам), из кэша
+до следующей версии каталога.
+"""
+import hashlib
+from decimal import Decimal
+
+from django.db import connections
+from django.db.models import Case, Count, F, Max, Min, Value, When
+from rest_framework.exceptions import ValidationError
+
+from .cache import get_catalog_version
+
+DEFAULT_BUCKETS = 10
+MAX_BUCKETS = 50
+SEARCH_PARAMS = ("search", "q")
+CENT = Decimal("0.01")
+
+# CTE f читается дважды, поэтому PostgreSQL материализует его: один проход по товарам.
+# Товары с ценой max попадают в последнюю корзину, а не в width_bucket = buckets + 1.
+HISTOGRAM_SQL = """
+WITH f AS ({filtered}),
+     s AS (SELECT MIN(price) AS lo, MAX(price) AS hi, COUNT(*) AS n FROM f)
+SELECT s.lo, s.hi, s.n,
+       CASE WHEN s.hi = s.lo THEN 1 ELSE LEAST(width_bucket(f.price, s.lo, s.hi, %s), %s) END AS bucket,
+       COUNT(f.price)
+FROM s LEFT JOIN f ON TRUE
+GROUP BY s.lo, s.hi, s.n, bucket
+ORDER BY bucket
+"""
+
+
+def bucket_count(request):
+    raw = request.query_params.get("buckets", DEFAULT_BUCKETS)
+    try:
+        buckets = int(raw)
+    except (TypeError, ValueError):
+        buckets = 0
+    if not 1 <= buckets <= MAX_BUCKETS:
+        raise ValidationError({"buckets": [f"Целое число от 1 до {MAX_BUCKETS}."]})
+    return buckets
+
+
+def facets_cache_key(request, filterset_class, buckets):
+    """
+    Ключ: версия каталога + только влияющие на выборку параметры.
+
+    Пагинация, сортировка и формат отбрасываются, значения без пробелов по краям
+    и в нижнем регистре (поиск и фильтры каталога регистронезависимы), пустые —
+    как отсутствующие.
+    """
+    names = set(filterset_class.base_filters) | set(SEARCH_PARAMS)
+    params = sorted(
+        (name, sorted(v.strip().lower() for v in values if v.strip()))
+        for name, values in request.query_params.lists()
+        if name in names
+    )
+    digest = hashlib.md5(repr(([p for p in params if p[1]], buckets)).encode()).hexdigest()
+    return f"catalog:v{get_catalog_version()}:facets:{digest}"
+
+
+def price_facets(queryset, buckets):
+    """{"count", "price": {"min", "max", "histogram": [{"min", "max", "count"}, ...]}}"""
+    if connections[queryset.db].vendor == "postgresql":
+        lo, hi, total, counts = _histogram_postgresql(queryset, buckets)
+    else:
+        lo, hi, total, counts = _histogram_generic(queryset, buckets)
+    if not total:
+        return {"count": 0, "price": {"min": None, "max": None, "histogram": []}}
+
+    if lo == hi:
+        buckets = 1
+    width = (hi - lo) / buckets
+    histogram = [
+        {
+            "min": _money(lo + width * i),
+            "max": _money(hi if i == buckets - 1 else lo + width * (i + 1)),
+            "count": counts.get(i + 1, 0),
+        }
+        for i in range(buckets)
+    ]
+    return {"count": total, "price": {"min": _money(lo), "max": _money(hi), "histogram": histogram}}
+
+
+def _histogram_postgresql(queryset, buckets):
+    """(min, max, count, {корзина: число}) одним запросом с width_bucket"""
+    sql, params = queryset.order_by().values("price").query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(HISTOGRAM_SQL.format(filtered=sql), (*params, buckets, buckets))
+        rows = cursor.fetchall()
+    lo, hi, total = rows[0][:3]
+    return lo, hi, total, {bucket: count for *_, bucket, count in rows}
+
+
+def _histogram_generic(queryset, buckets):
+    """
+    То же для СУБД без width_bucket (SQLite): агрегаты, затем CASE по границам корзин.
+
+    Сравнивается price * buckets с lo * buckets + (hi - lo) * i — границы без
+    округления до копеек, корзины те же, что у width_bucket.
+    """
+    queryset = queryset.order_by()
+    stats = queryset.aggregate(lo=Min("price"), hi=Max("price"), total=Count("id"))
+    lo, hi, total = stats["lo"], stats["hi"], stats["total"]
+    if not total or lo == hi:
+        return lo, hi, total, {1: total}
+    bucket = Case(
+        *[When(scaled__lt=lo * buckets + (hi - lo) * i, then=Value(i)) for i in range(1, buckets)],
+        default=Value(buckets),
+    )
+    rows = (
+        queryset.alias(scaled=F("price") * buckets)
+        .annotate(bucket=bucket)
+        .values("bucket")
+        .annotate(count=Count("id"))
+        .values_list("bucket", "count")
+    )
+    return lo, hi, total, dict(rows)
+
+
+def _money(value):
+    return str(value.quantize(CENT))
@@ -0,0 +1,153 @@
+from functools import lru_cache
+
+from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist, ValidationError
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.http import Http404
+from django.utils.encoding import filepath_to_uri
+from rest_framework import serializers
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from .serializers import ProductSerializer
+
+# SerializerMethodField, которые план умеет читать: поле -> (колонка-источник, вид)
+METHOD_FIELDS = {
+    (ProductSerializer, "image_url"): ("image", "media"),
+    (ProductSerializer, "image_variants"): ("image_variants", "media_map"),
+}
+
+
+class MediaURLs:
+    """URL файлов из имён в БД; абсолютный префикс MEDIA считается один раз на запрос."""
+
+    def __init__(self, request=None):
+        self.request = request
+        self.prefix = None
+        # быстрый путь только для обычного FileSystemStorage, у остальных url() может быть любым
+        if isinstance(default_storage, FileSystemStorage) and default_storage.__class__.url is FileSystemStorage.url:
+            base = default_storage.url("")
+            self.prefix = request.build_absolute_uri(base) if request is not None else base
+
+    def __call__(self, name):
+        if not name:
+            return None
+        if self.prefix is not None:
+            return self.prefix + filepath_to_uri(name).lstrip("/")
+        url = default_storage.url(name)
+        return self.request.build_absolute_uri(url) if self.request is not None else url
+
+
+class RowPlan:
+    """
+    Предкомпилированный план сериализатора для строк .values().
+
+    Для каждого поля хранится колонка и функция представления (to_representation
+    поля DRF), поэтому вывод совпадает с serializer.data без создания полей на строку.
+    """
+
+    def __init__(self, serializer_class, prefix=""):
+        self.entries = []
+        serializer = serializer_class()
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.BaseSerializer):
+                if isinstance(field, serializers.ListSerializer):
+                    raise ImproperlyConfigured(f"{serializer_class.__name__}.{name}: many=True не поддерживается")
+                nested = RowPlan(type(field), prefix=f"{prefix}{field.source}__")
+                self.entries.append((name, f"{prefix}{field.source}__id", "nested", nested))
+            elif isinstance(field, serializers.SerializerMethodField):
+                try:
+                    source, kind = METHOD_FIELDS[(serializer_class, name)]
+                except KeyError:
+                    raise ImproperlyConfigured(f"{serializer_class.__name__}.{name}: нет плана для метода")
+                self.entries.append((name, f"{prefix}{source}", kind, None))
+            elif isinstance(field, serializers.FileField):
+                self.entries.append((name, f"{prefix}{field.source}", "media", None))
+            elif "." in field.source or field.source == "*" or isinstance(field, serializers.RelatedField):
+                raise ImproperlyConfigured(f"{serializer_class.__name__}.{name}: поле не поддерживается")
+            else:
+                self.entries.append((name, f"{prefix}{field.source}", "value", field.to_representation))
+
+    @property
+    def columns(self):
+        cols = []
+        for _, column, kind, extra in self.entries:
+            cols.append(column)
+            if kind == "nested":
+                cols.extend(extra.columns)
+        return list(dict.fromkeys(cols))
+
+    def values(self, queryset):
+        """queryset.values() с нужными колонками (и аннотациями для сортировки/курсора)."""
+        return queryset.values(*self.columns, *queryset.query.annotations)
+
+    def dump(self, row, media):
+        out = {}
+        for name, column, kind, extra in self.entries:
+            value = row[column]
+            if value is None:
+                out[name] = None
+            elif kind == "value":
+                out[name] = extra(value)
+            elif kind == "media":
+                out[name] = media(value)
+            elif kind == "media_map":
+                out[name] = {key: media(path) for key, path in value.items()}
+            else:
+                out[name] = extra.dump(row, media)
+        return out
+
+    def dump_many(self, rows, media):
+        return [self.dump(row, media) for row in rows]
+
+
+@lru_cache(maxsize=None)
+def get_plan(serializer_class):
+    return RowPlan(serializer_class)
+
+
+class FastReadMixin:
+    """
+    GET list/retrieve через .values() и RowPlan вместо ModelSerializer на каждую строку.
+
+    alist/aretrieve — те же действия на async ORM для ASGI (см. shop.async_views).
+    """
+
+    def list(self, request, *args, **kwargs):
+        plan = get_plan(self.get_serializer_class())
+        media = MediaURLs(request)
+        rows = plan.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.dump_many(page, media))
+        return Response(plan.dump_many(rows, media))
+
+    def retrieve(self, request, *args, **kwargs):
+        plan = get_plan(self.get_serializer_class())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        rows = plan.values(self.filter_queryset(self.get_queryset()))
+        row = get_object_or_404(rows, **{self.lookup_field: kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, row)
+        return Response(plan.dump(row, MediaURLs(request)))
+
+    async def alist(self, request, *args, **kwargs):
+        plan = get_plan(self.get_serializer_class())
+        media = MediaURLs(request)
+        rows = plan.values(self.filter_queryset(self.get_queryset()))
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(rows, request, view=self)
+            if page is not None:
+                return self.get_paginated_response(plan.dump_many(page, media))
+        return Response(plan.dump_many([row async for row in rows.aiterator()], media))
+
+    async def aretrieve(self, request, *args, **kwargs):
+        plan = get_plan(self.get_serializer_class())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        rows = plan.values(self.filter_queryset(self.get_queryset()))
+        try:
+            row = await rows.aget(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+        except (ObjectDoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(request, row)
+        return Response(plan.dump(row, MediaURLs(request)))
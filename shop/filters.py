@@ -0,0 +1,19 @@
+import django_filters
+
+from .models import Product
+
+
+class ProductFilter(django_filters.FilterSet):
+    """
+    ?price= — точная цена, ?price_min= / ?price_max= — диапазон (включительно),
+    ?name_prefix= — начало названия без учёта регистра.
+
+    Каждый фильтр обслуживается индексом (см. Product.Meta.indexes).
+    """
+    price_min = django_filters.NumberFilter(field_name="price", lookup_expr="gte")
+    price_max = django_filters.NumberFilter(field_name="price", lookup_expr="lte")
+    name_prefix = django_filters.CharFilter(field_name="name", lookup_expr="istartswith")
+
+    class Meta:
+        model = Product
+        fields = ["price"]
@@ -0,0 +1,77 @@
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import bump_catalog_version
+from .models import Product
+
+# вариант -> (максимальная сторона, формат Pillow, расширение, параметры сохранения)
+VARIANTS = {
+    "thumbnail": (200, "JPEG", "jpg", {"quality": 80, "optimize": True, "progressive": True}),
+    "medium": (800, "JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+    "webp": (800, "WEBP", "webp", {"quality": 80, "method": 4}),
+}
+
+
+def variant_name(image_name, variant):
+    """products/a.png -> products/variants/a.thumbnail.jpg"""
+    directory, filename = posixpath.split(image_name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, "variants", f"{stem}.{variant}.{VARIANTS[variant][2]}")
+
+
+def _flatten(image):
+    """RGB без альфа-канала (прозрачность -> белый фон) для JPEG"""
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def render_variants(image_name, storage=default_storage):
+    """Создать все варианты изображения в storage. Возвращает {вариант: имя файла}."""
+    with storage.open(image_name, "rb") as fh:
+        source = ImageOps.exif_transpose(Image.open(fh))
+        source.load()
+
+    result = {}
+    for variant, (size, fmt, _, options) in VARIANTS.items():
+        image = source.copy()
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        if fmt == "JPEG":
+            image = _flatten(image)
+        buffer = BytesIO()
+        image.save(buffer, fmt, **options)
+
+        name = variant_name(image_name, variant)
+        if storage.exists(name):
+            storage.delete(name)
+        result[variant] = storage.save(name, ContentFile(buffer.getvalue()))
+    return result
+
+
+def build_variants(product_id):
+    """
+    Пересобрать варианты изображения товара.
+
+    Результат записывается, только если image не сменилось, пока шла обработка.
+    """
+    image_name = Product.objects.filter(pk=product_id).values_list("image", flat=True).first()
+    if not image_name:
+        return {}
+
+    variants = render_variants(image_name)
+    updated = Product.objects.filter(pk=product_id, image=image_name).update(
+        image_variants=variants, updated_at=timezone.now()
+    )
+    if updated:
+        # .update() не шлёт сигналов, поэтому кэш каталога сбрасываем сами
+        transaction.on_commit(bump_catalog_version)
+    return variants
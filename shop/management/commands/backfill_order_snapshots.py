@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from shop.models import Order
+from shop.snapshots import build_snapshots
+
+
+class Command(BaseCommand):
+    help = "Строит снимки позиций (items_snapshot, item_count) для заказов, у которых их нет"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, batch_size, **options):
+        last_id, done = 0, 0
+        while True:
+            orders = list(
+                Order.objects.filter(items_snapshot__isnull=True, id__gt=last_id)
+                .order_by("id")
+                .only("id")[:batch_size]
+            )
+            if not orders:
+                break
+            snapshots = build_snapshots([o.id for o in orders])
+            for o in orders:
+                o.items_snapshot = snapshots[o.id]
+                o.item_count = sum(line["quantity"] for line in o.items_snapshot)
+            with transaction.atomic():
+                Order.objects.bulk_update(orders, ["items_snapshot", "item_count"])
+            last_id = orders[-1].id
+            done += len(orders)
+            self.stdout.write(f"backfilled {done}")
+        self.stdout.write(self.style.SUCCESS(f"done: {done} orders"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from shop.bulk import FORMATS, detect_format, write_rows
+
+
+class Command(BaseCommand):
+    help = "Потоковая выгрузка каталога в CSV/JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="файл или '-' для stdout")
+        parser.add_argument("--format", choices=FORMATS)
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, path, format, chunk_size, **options):
+        fmt = detect_format(path, format)
+        if path == "-":
+            count = write_rows(self.stdout, fmt, chunk_size=chunk_size)
+        else:
+            with open(path, "w", encoding="utf-8", newline="") as stream:
+                count = write_rows(stream, fmt, chunk_size=chunk_size)
+            self.stdout.write(self.style.SUCCESS(f"exported {count}"))
@@ -0,0 +1,66 @@
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.bulk import FORMATS, chunked, detect_format, read_rows, upsert_chunk
+from shop.cache import bump_catalog_version
+from shop.management.workers import process_pool
+
+
+class Command(BaseCommand):
+    help = "Потоковый импорт товаров из CSV/JSONL с upsert по sku"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="файл или '-' для stdin")
+        parser.add_argument("--format", choices=FORMATS)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--workers", type=int, default=1, help="процессов для проверки и записи пачек")
+        parser.add_argument("--max-errors", type=int, default=100, help="сколько ошибок строк вывести")
+
+    def handle(self, *args, path, format, batch_size, workers, max_errors, **options):
+        fmt = detect_format(path, format)
+        stream = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+        started = time.monotonic()
+        self.written = self.failed = 0
+        self.max_errors = max_errors
+        try:
+            chunks = chunked(read_rows(stream, fmt), batch_size)
+            if workers <= 1:
+                for chunk in chunks:
+                    self._report(*upsert_chunk(chunk))
+            else:
+                self._run_parallel(chunks, workers)
+        except OSError as exc:
+            raise CommandError(exc)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            bump_catalog_version()
+
+        elapsed = time.monotonic() - started
+        rate = self.written / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"imported {self.written}, rejected {self.failed} in {elapsed:.1f}s ({rate:,.0f} rows/s)"
+        ))
+
+    def _run_parallel(self, chunks, workers):
+        # не больше 2 пачек на процесс в полёте, чтобы память не росла с размером файла
+        with process_pool(workers) as pool:
+            pending = set()
+            for chunk in chunks:
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._report(*future.result())
+                pending.add(pool.submit(upsert_chunk, chunk))
+            for future in wait(pending).done:
+                self._report(*future.result())
+
+    def _report(self, written, errors):
+        self.written += written
+        for lineno, detail in errors:
+            if self.failed < self.max_errors:
+                self.stderr.write(f"line {lineno}: {detail}")
+            self.failed += 1
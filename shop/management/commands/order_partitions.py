@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from shop.partitions import (
+    ORDER_TABLE,
+    add_months,
+    archive_partition,
+    ensure_partitions,
+    month_start,
+    partitions,
+    split_default,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Создаёт помесячные партиции shop_order на --ahead месяцев вперёд и переносит "
+        "месяцы старше --archive-after в архив (PostgreSQL)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ahead", type=int, default=3, help="сколько будущих месяцев держать готовыми")
+        parser.add_argument(
+            "--archive-after", type=int, default=None,
+            help="архивировать месяцы, закончившиеся больше N месяцев назад",
+        )
+        parser.add_argument(
+            "--detach", action="store_true",
+            help="не подключать к shop_order_archive, оставить отдельными таблицами (для выгрузки/удаления)",
+        )
+
+    def handle(self, *args, ahead, archive_after, detach, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("секционирование заказов есть только на PostgreSQL")
+        current = month_start(timezone.now())
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            created = ensure_partitions(cursor, current, add_months(current, ahead)) + split_default(cursor)
+        for name in created:
+            self.stdout.write(f"created {name}")
+
+        if archive_after is None:
+            return
+        cutoff = add_months(current, -archive_after)
+        with connection.cursor() as cursor:
+            old = sorted((month, name) for month, name in partitions(cursor, ORDER_TABLE).items() if month < cutoff)
+        # по месяцу на транзакцию: блокировка shop_order держится недолго
+        for month, name in old:
+            with transaction.atomic(), connection.cursor() as cursor:
+                archive_partition(cursor, month, name, detach_only=detach)
+            self.stdout.write(f"{'detached' if detach else 'archived'} {name}")
+        self.stdout.write(self.style.SUCCESS(f"done: {len(old)} partitions archived"))
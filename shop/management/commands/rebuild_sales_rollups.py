@@ -0,0 +1,33 @@
+import time
+from concurrent.futures import wait
+
+from django.core.management.base import BaseCommand
+
+from shop.management.workers import process_pool
+from shop.rollups import add_orders, reset_for_rebuild, roll_up
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает дневные агрегаты продаж с нуля диапазонами id заказов, параллельно"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=50000, help="заказов в одном диапазоне")
+        parser.add_argument("--workers", type=int, default=1, help="процессов для пересчёта диапазонов")
+
+    def handle(self, *args, chunk_size, workers, **options):
+        started = time.monotonic()
+        chunks = reset_for_rebuild(chunk_size)
+        if workers <= 1:
+            for chunk in chunks:
+                add_orders(*chunk)
+        else:
+            # диапазоны пишут в одни и те же дни; строки идут в порядке ключа, так что без deadlock'ов
+            with process_pool(workers) as pool:
+                for future in wait([pool.submit(add_orders, *chunk) for chunk in chunks]).done:
+                    future.result()
+        # заказы, появившиеся за время пересчёта
+        while roll_up():
+            pass
+        self.stdout.write(self.style.SUCCESS(
+            f"rebuilt {len(chunks)} chunks in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from shop.images import build_variants
+from shop.management.workers import process_pool
+from shop.models import Product
+
+
+def _build(product_id):
+    try:
+        build_variants(product_id)
+        return product_id, None
+    except Exception as exc:
+        return product_id, repr(exc)
+
+
+class Command(BaseCommand):
+    help = "Пересоздаёт варианты изображений (thumbnail/medium/webp) для всего каталога"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="число процессов (1 — в текущем)")
+        parser.add_argument("--missing-only", action="store_true", help="только товары без вариантов")
+
+    def handle(self, *args, workers, missing_only, **options):
+        products = Product.objects.exclude(image="").exclude(image__isnull=True)
+        if missing_only:
+            products = products.filter(image_variants={})
+        ids = list(products.order_by("id").values_list("id", flat=True))
+
+        if workers <= 1:
+            failed = self._report(map(_build, ids))
+        else:
+            with process_pool(workers) as pool:
+                failed = self._report(pool.map(_build, ids, chunksize=max(1, len(ids) // (workers * 8))))
+        self.stdout.write(self.style.SUCCESS(f"done: {len(ids) - failed} ok, {failed} failed"))
+
+    def _report(self, results):
+        failed = 0
+        for product_id, error in results:
+            if error:
+                failed += 1
+                self.stderr.write(f"product {product_id}: {error}")
+        return failed
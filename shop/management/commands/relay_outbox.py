@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from config.metrics import serve
+from shop.outbox import DEFAULT_BATCH_SIZE, relay_pending
+
+
+class Command(BaseCommand):
+    help = "Пересылает сообщения transactional outbox в брокер Celery пачками"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--loop", action="store_true", help="работать постоянно")
+        parser.add_argument("--interval", type=float, default=1.0, help="пауза между проходами, сек")
+        parser.add_argument(
+            "--metrics-port", type=int, default=None,
+            help="отдавать метрики релея (публикация в брокер, задержка outbox) на этом порту",
+        )
+
+    def handle(self, *args, batch_size, loop, interval, metrics_port, **options):
+        if metrics_port:
+            serve(metrics_port)
+        while True:
+            sent = relay_pending(batch_size=batch_size)
+            if sent:
+                self.stdout.write(f"relayed {sent}")
+            if not loop:
+                break
+            time.sleep(interval)
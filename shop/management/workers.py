@@ -0,0 +1,15 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import connections
+
+
+def _init_worker():
+    django.setup()
+    connections.close_all()
+
+
+def process_pool(workers):
+    """Пул процессов для management-команд: соединения родителя в дочерние не попадают."""
+    connections.close_all()
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
@@ -0,0 +1,57 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Вектор поддерживается триггером, чтобы bulk_create/update тоже его обновляли.
+FORWARD_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE OR REPLACE FUNCTION shop_product_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER shop_product_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description ON shop_product
+    FOR EACH ROW EXECUTE FUNCTION shop_product_search_vector_update()
+    """,
+    "UPDATE shop_product SET name = name",
+    "CREATE INDEX shop_product_search_vector_gin ON shop_product USING gin (search_vector)",
+    "CREATE INDEX shop_product_name_trgm ON shop_product USING gin (name gin_trgm_ops)",
+]
+
+BACKWARD_SQL = [
+    "DROP INDEX IF EXISTS shop_product_name_trgm",
+    "DROP INDEX IF EXISTS shop_product_search_vector_gin",
+    "DROP TRIGGER IF EXISTS shop_product_search_vector_trigger ON shop_product",
+    "DROP FUNCTION IF EXISTS shop_product_search_vector_update()",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0004_auto_20250918_1431'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(_run(FORWARD_SQL), _run(BACKWARD_SQL)),
+    ]
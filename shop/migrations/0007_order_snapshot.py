@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0006_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='items_snapshot',
+            field=models.JSONField(editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# ?name_prefix=: UPPER(name) LIKE 'ABC%' по индексу при любой локали БД; opclass есть только в PostgreSQL
+NAME_PREFIX_SQL = 'CREATE INDEX "shop_product_name_prefix" ON "shop_product" ((UPPER("name")) text_pattern_ops)'
+DROP_NAME_PREFIX_SQL = 'DROP INDEX IF EXISTS "shop_product_name_prefix"'
+
+
+def _run(sql):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0010_product_sku'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-id'], name='shop_order_user_id_desc'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['order', 'id'], include=('product', 'price', 'quantity'), name='shop_orderitem_order_cover'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['price', 'id'], name='shop_product_price_id'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['name', 'id'], name='shop_product_name_id'),
+        ),
+        migrations.RunPython(_run(NAME_PREFIX_SQL), _run(DROP_NAME_PREFIX_SQL)),
+        migrations.AlterField(
+            model_name='order',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='orders', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='order',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='shop.order'),
+        ),
+    ]
@@ -0,0 +1,151 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:20
+
+from datetime import datetime, timezone
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+PARTITIONS_AHEAD = 3
+
+
+# копии помощников shop.partitions на момент миграции: она не должна зависеть от кода приложения
+def month_start(moment):
+    moment = moment.astimezone(timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def create_partitions(cursor, first, last):
+    """Партиции shop_order_pYYYYMM месяцев first..last (default-партиция ещё пуста)"""
+    month = month_start(first)
+    while month <= last:
+        cursor.execute(
+            f"CREATE TABLE shop_order_p{month:%Y%m} PARTITION OF shop_order FOR VALUES FROM (%s) TO (%s)",
+            [month, add_months(month, 1)],
+        )
+        month = add_months(month, 1)
+
+# shop_order -> RANGE (created_at); id берётся из обычной последовательности,
+# т.к. identity у секционированных таблиц есть только с PostgreSQL 17.
+TO_PARTITIONED_SQL = [
+    "ALTER TABLE shop_order RENAME TO shop_order_unpartitioned",
+    "ALTER INDEX shop_order_pkey RENAME TO shop_order_unpartitioned_pkey",
+    "ALTER INDEX shop_order_user_id_desc RENAME TO shop_order_unpartitioned_user_id_desc",
+    "ALTER TABLE shop_order_unpartitioned ALTER COLUMN id DROP IDENTITY",
+    "CREATE SEQUENCE shop_order_id_seq",
+    """
+    CREATE TABLE shop_order (LIKE shop_order_unpartitioned INCLUDING CONSTRAINTS)
+    PARTITION BY RANGE (created_at)
+    """,
+    "ALTER TABLE shop_order ALTER COLUMN id SET DEFAULT nextval('shop_order_id_seq')",
+    "ALTER SEQUENCE shop_order_id_seq OWNED BY shop_order.id",
+    "ALTER TABLE shop_order ADD CONSTRAINT shop_order_pkey PRIMARY KEY (id, created_at)",
+    "CREATE INDEX shop_order_user_id_desc ON shop_order (user_id, id DESC)",
+    """
+    ALTER TABLE shop_order ADD CONSTRAINT shop_order_user_id_fk_auth_user_id
+    FOREIGN KEY (user_id) REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED
+    """,
+    "CREATE TABLE shop_order_default PARTITION OF shop_order DEFAULT",
+    # архив: та же структура; партиции переносит order_partitions
+    """
+    CREATE TABLE shop_order_archive (LIKE shop_order INCLUDING CONSTRAINTS)
+    PARTITION BY RANGE (created_at)
+    """,
+    "ALTER TABLE shop_order_archive ADD CONSTRAINT shop_order_archive_pkey PRIMARY KEY (id, created_at)",
+    "CREATE INDEX shop_order_archive_user_id_desc ON shop_order_archive (user_id, id DESC)",
+    "CREATE TABLE shop_orderitem_archive (LIKE shop_orderitem INCLUDING CONSTRAINTS)",
+    "ALTER TABLE shop_orderitem_archive ADD CONSTRAINT shop_orderitem_archive_pkey PRIMARY KEY (id)",
+    "CREATE INDEX shop_orderitem_archive_order_id ON shop_orderitem_archive (order_id, id)",
+]
+
+COPY_SQL = [
+    "INSERT INTO shop_order SELECT * FROM shop_order_unpartitioned",
+    "DROP TABLE shop_order_unpartitioned",
+    "SELECT setval('shop_order_id_seq', COALESCE((SELECT MAX(id) FROM shop_order), 0) + 1, false)",
+]
+
+# обратно в одну таблицу; архив возвращается в основные таблицы
+TO_PLAIN_SQL = [
+    "ALTER TABLE shop_order RENAME TO shop_order_partitioned",
+    "ALTER INDEX shop_order_pkey RENAME TO shop_order_partitioned_pkey",
+    "ALTER INDEX shop_order_user_id_desc RENAME TO shop_order_partitioned_user_id_desc",
+    "CREATE TABLE shop_order (LIKE shop_order_partitioned INCLUDING CONSTRAINTS)",
+    "ALTER TABLE shop_order ADD CONSTRAINT shop_order_pkey PRIMARY KEY (id)",
+    "CREATE INDEX shop_order_user_id_desc ON shop_order (user_id, id DESC)",
+    """
+    ALTER TABLE shop_order ADD CONSTRAINT shop_order_user_id_fk_auth_user_id
+    FOREIGN KEY (user_id) REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED
+    """,
+    "INSERT INTO shop_order SELECT * FROM shop_order_partitioned",
+    "INSERT INTO shop_order SELECT * FROM shop_order_archive",
+    "INSERT INTO shop_orderitem SELECT * FROM shop_orderitem_archive",
+    "DROP TABLE shop_order_partitioned, shop_order_archive, shop_orderitem_archive",
+    """
+    ALTER TABLE shop_order ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY
+    (START WITH 1)
+    """,
+    """
+    SELECT setval(pg_get_serial_sequence('shop_order', 'id'),
+                  COALESCE((SELECT MAX(id) FROM shop_order), 0) + 1, false)
+    """,
+]
+
+
+def forward(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        # без секционирования: архив — обычная таблица с той же структурой
+        schema_editor.create_model(apps.get_model("shop", "ArchivedOrder"))
+        return
+    for sql in TO_PARTITIONED_SQL:
+        schema_editor.execute(sql)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT MIN(created_at) FROM shop_order_unpartitioned")
+        first = cursor.fetchone()[0] or datetime.now(timezone.utc)
+        create_partitions(cursor, first, add_months(month_start(datetime.now(timezone.utc)), PARTITIONS_AHEAD))
+    for sql in COPY_SQL:
+        schema_editor.execute(sql)
+
+
+def backward(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        schema_editor.delete_model(apps.get_model("shop", "ArchivedOrder"))
+        return
+    for sql in TO_PLAIN_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0011_catalog_order_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='orderitem',
+            name='order',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='shop.order'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('item_count', models.PositiveIntegerField(default=0, editable=False)),
+                ('items_snapshot', models.JSONField(editable=False, null=True)),
+                ('user', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_orders', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'shop_order_archive',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(forward, backward),
+    ]
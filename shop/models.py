@@ -1,9 +1,12 @@
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connections, models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 
 
 class Product(models.Model):
+    # артикул поставщика — ключ upsert для import_products
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
     name = models.CharField(max_length=100)
     price = models.DecimalField(
         max_digits=10,
@@ -12,28 +15,196 @@ class Product(models.Model):
     )
     description = models.TextField(blank=True, null=True)
     image = models.ImageField(upload_to="products/", blank=True, null=True)
+    # {вариант: имя файла} от shop.images.build_variants, сбрасывается при смене image
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # заполняется триггером PostgreSQL (см. миграцию 0005), в SQLite всегда NULL
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # ?ordering=price|name (и keyset-курсор по ним с id) и диапазоны ?price_min/?price_max
+            models.Index(fields=["price", "id"], name="shop_product_price_id"),
+            models.Index(fields=["name", "id"], name="shop_product_name_id"),
+            # индекс для ?name_prefix= (UPPER(name) text_pattern_ops) только PostgreSQL: миграция 0011
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "image" in field_names:
+            instance._loaded_image = values[field_names.index("image")] or ""
+        return instance
+
+    @property
+    def image_changed(self):
+        """image отличается от загруженного из БД (для новых — задан ли вообще)"""
+        if not hasattr(self, "_loaded_image"):
+            return self._state.adding and bool(self.image)
+        return (self.image.name or "") != self._loaded_image
+
+    def save(self, *args, **kwargs):
+        self._image_was_changed = self.image_changed
+        if self._image_was_changed:
+            self.image_variants = {}
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "image_variants"}
+        super().save(*args, **kwargs)
+        self._loaded_image = self.image.name or ""
+
+
+class CartItemQuerySet(models.QuerySet):
+    def add_quantity(self, user_id, product_id, quantity):
+        """
+        Атомарно прибавить quantity одним INSERT ... ON CONFLICT DO UPDATE.
+
+        Строка вставляется через SELECT из таблицы товаров, поэтому несуществующий
+        product_id ничего не вставляет. Возвращает (id, quantity) или None.
+        """
+        self._for_write = True  # db_for_write, как у update()/delete()
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        cart, product = qn(self.model._meta.db_table), qn(Product._meta.db_table)
+        sql = (
+            f"INSERT INTO {cart} (user_id, product_id, quantity) "
+            f"SELECT %s, p.id, %s FROM {product} p WHERE p.id = %s "
+            f"ON CONFLICT (user_id, product_id) "
+            f"DO UPDATE SET quantity = {cart}.quantity + EXCLUDED.quantity "
+            f"RETURNING id, quantity"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user_id, quantity, product_id])
+            row = cursor.fetchone()
+        return tuple(row) if row else None
+
+    def upsert_quantities(self, user_id, quantities, increment=True):
+        """
+        Многострочный upsert {product_id: quantity} для одного пользователя.
+
+        increment=True прибавляет к текущему количеству, иначе перезаписывает.
+        Товары должны быть проверены заранее; строки идут в порядке product_id,
+        чтобы конкурентные пакеты брали блокировки в одном порядке.
+        """
+        if not quantities:
+            return
+        self._for_write = True
+        connection = connections[self.db]
+        cart = connection.ops.quote_name(self.model._meta.db_table)
+        rows = sorted(quantities.items())
+        new_quantity = f"{cart}.quantity + EXCLUDED.quantity" if increment else "EXCLUDED.quantity"
+        sql = (
+            f"INSERT INTO {cart} (user_id, product_id, quantity) "
+            f"VALUES {', '.join(['(%s, %s, %s)'] * len(rows))} "
+            f"ON CONFLICT (user_id, product_id) DO UPDATE SET quantity = {new_quantity}"
+        )
+        params = [value for pid, qty in rows for value in (user_id, pid, qty)]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
 
 class CartItem(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="cart_items")
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="in_carts")
     quantity = models.PositiveIntegerField(default=1)
 
+    objects = CartItemQuerySet.as_manager()
+
     class Meta:
         unique_together = ("user", "product")
 
 
 class Order(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="orders")
+    """
+    На PostgreSQL таблица секционирована по месяцам created_at (shop.partitions):
+    первичный ключ в БД — (id, created_at), id уникален за счёт общей последовательности.
+    """
+    # отдельный индекс по user не нужен: его заменяет (user, -id)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="orders", db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
     total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # неизменяемый снимок позиций на момент оформления (для истории без JOIN), NULL — ещё не построен
+    item_count = models.PositiveIntegerField(default=0, editable=False)
+    items_snapshot = models.JSONField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # история заказов: WHERE user_id = ? ORDER BY id DESC
+            models.Index(fields=["user", "-id"], name="shop_order_user_id_desc"),
+        ]
 
 
 class OrderItem(models.Model):
-    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
+    # внешний ключ без ограничения в БД: на секционированную shop_order по одному id не сослаться
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items", db_index=False, db_constraint=False)
     product = models.ForeignKey(Product, on_delete=models.PROTECT)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     quantity = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            # позиции заказа в порядке id без обращения к таблице (PostgreSQL: index-only scan)
+            models.Index(
+                fields=["order", "id"], include=["product", "price", "quantity"], name="shop_orderitem_order_cover"
+            ),
+        ]
+
+
+class ArchivedOrder(models.Model):
+    """Заказ из архивных партиций (shop_order_archive), см. команду order_partitions"""
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="archived_orders", db_index=False, db_constraint=False
+    )
+    created_at = models.DateTimeField()
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    item_count = models.PositiveIntegerField(default=0, editable=False)
+    items_snapshot = models.JSONField(null=True, editable=False)
+
+    class Meta:
+        # таблицу создаёт миграция 0012 (на PostgreSQL — секционированную)
+        managed = False
+        db_table = "shop_order_archive"
+
+
+class ProductDailySales(models.Model):
+    """Продажи товара за день (дата в TIME_ZONE); ведёт shop.rollups"""
+    day = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.PROTECT, related_name="daily_sales", db_index=False)
+    units = models.PositiveBigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # ключ upsert'а; он же обслуживает выборку по диапазону дней
+            models.UniqueConstraint(fields=["day", "product"], name="shop_productdailysales_day_product"),
+        ]
+
+
+class DailySales(models.Model):
+    """Продажи магазина за день: число заказов не выводится из построчных ProductDailySales"""
+    day = models.DateField(unique=True)
+    units = models.PositiveBigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.PositiveIntegerField(default=0)
+
+
+class RollupState(models.Model):
+    """Верхняя граница (id заказа), до которой заказы уже учтены в агрегатах"""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_order_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class OutboxMessage(models.Model):
+    """Задача Celery, записанная в той же транзакции, что и данные (transactional outbox)"""
+    task = models.CharField(max_length=200)
+    kwargs = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+
+    def __str__(self):
+        return f"{self.task} #{self.pk}"
@@ -0,0 +1,83 @@
+import logging
+import time
+
+from celery import current_app
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from config.metrics import CELERY_PUBLISH, OUTBOX_ENQUEUE, OUTBOX_LAG
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+
+
+def enqueue(task, using=None, **kwargs):
+    """Записать задачу в outbox; вызывать внутри транзакции бизнес-операции."""
+    started = time.perf_counter()
+    message = OutboxMessage.objects.using(using).create(task=task, kwargs=kwargs)
+    OUTBOX_ENQUEUE.observe(time.perf_counter() - started, task)
+    return message
+
+
+def publish(messages):
+    """
+    Отправить сообщения в брокер через одно соединение.
+
+    Возвращает (id отправленных, ошибка или None); на первой ошибке останавливается,
+    остальные сообщения уйдут следующим проходом.
+    """
+    sent = []
+    try:
+        with current_app.producer_or_acquire() as producer:
+            for message in messages:
+                started = time.perf_counter()
+                current_app.send_task(message.task, kwargs=message.kwargs, producer=producer)
+                CELERY_PUBLISH.observe(time.perf_counter() - started, message.task)
+                OUTBOX_LAG.observe((timezone.now() - message.created_at).total_seconds(), message.task)
+                sent.append(message.id)
+    except Exception as exc:
+        return sent, exc
+    return sent, None
+
+
+def relay_batch(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Переслать одну пачку outbox в брокер (at-least-once).
+
+    Строки блокируются через SKIP LOCKED, поэтому несколько релеев не мешают
+    друг другу; отправленные удаляются после публикации, при падении между
+    публикацией и коммитом сообщение будет отправлено повторно.
+    """
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True).order_by("id")[:batch_size]
+        )
+        if not messages:
+            return 0
+
+        sent, error = publish(messages)
+        if sent:
+            OutboxMessage.objects.filter(id__in=sent).delete()
+        if error is not None:
+            logger.warning("outbox relay: %s sent, failed on next: %s", len(sent), error)
+            failed = messages[len(sent)]
+            OutboxMessage.objects.filter(id=failed.id).update(
+                attempts=F("attempts") + 1, last_error=repr(error)[:1000]
+            )
+        return len(sent)
+
+
+def relay_pending(batch_size=DEFAULT_BATCH_SIZE, max_batches=None):
+    """Гонять relay_batch, пока очередь не опустеет (или max_batches). Возвращает число отправленных."""
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        sent = relay_batch(batch_size)
+        total += sent
+        batches += 1
+        if sent < batch_size:
+            break
+    return total
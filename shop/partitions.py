@@ -0,0 +1,130 @@
+"""
+Помесячные партиции заказов (PostgreSQL).
+
+shop_order секционирована RANGE (created_at) по месяцам UTC: shop_order_pYYYYMM
+плюс shop_order_default для строк вне созданных месяцев. Старые месяцы
+переезжают в shop_order_archive (DETACH + ATTACH, без копирования строк),
+их позиции — в shop_orderitem_archive. Обслуживает команда order_partitions.
+"""
+import re
+from datetime import datetime, timezone
+
+from .models import Order
+from .snapshots import build_snapshots
+
+ORDER_TABLE = "shop_order"
+ARCHIVE_TABLE = "shop_order_archive"
+ITEM_TABLE = "shop_orderitem"
+ARCHIVE_ITEM_TABLE = "shop_orderitem_archive"
+DEFAULT_PARTITION = "shop_order_default"
+PARTITION_RE = re.compile(r"^shop_order_p(\d{4})(\d{2})$")
+
+
+def month_start(moment):
+    moment = moment.astimezone(timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def recent_months_start(months):
+    """Начало самой ранней из последних months помесячных партиций (включая текущую)"""
+    return add_months(month_start(datetime.now(timezone.utc)), 1 - months)
+
+
+def partition_name(month):
+    return f"{ORDER_TABLE}_p{month:%Y%m}"
+
+
+def partitions(cursor, parent):
+    """{месяц: имя} партиций parent (кроме default)"""
+    cursor.execute(
+        """
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+        """,
+        [parent],
+    )
+    found = {}
+    for (name,) in cursor.fetchall():
+        match = PARTITION_RE.match(name)
+        if match:
+            found[datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc)] = name
+    return found
+
+
+def create_partition(cursor, month):
+    """
+    Партиция месяца в shop_order.
+
+    Таблица создаётся отдельно, в неё переносятся строки месяца из default-партиции,
+    затем она подключается: ATTACH не падает, если в default уже есть такие заказы.
+    """
+    name, lo, hi = partition_name(month), month, add_months(month, 1)
+    cursor.execute(f"CREATE TABLE {name} (LIKE {ORDER_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved",
+        [lo, hi],
+    )
+    cursor.execute(f"ALTER TABLE {ORDER_TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", [lo, hi])
+    return name
+
+
+def ensure_partitions(cursor, first, last):
+    """Создать недостающие партиции месяцев first..last; возвращает имена созданных"""
+    existing = partitions(cursor, ORDER_TABLE)
+    created = []
+    month = month_start(first)
+    while month <= last:
+        if month not in existing:
+            created.append(create_partition(cursor, month))
+        month = add_months(month, 1)
+    return created
+
+
+def split_default(cursor):
+    """Партиции для месяцев, строки которых попали в default-партицию; возвращает имена созданных"""
+    cursor.execute(f"SELECT DISTINCT date_trunc('month', created_at, 'UTC') FROM {DEFAULT_PARTITION}")
+    months = sorted(month_start(month) for (month,) in cursor.fetchall())
+    existing = partitions(cursor, ORDER_TABLE)
+    return [create_partition(cursor, month) for month in months if month not in existing]
+
+
+def fill_snapshots(cursor, name):
+    """Снимки позиций для заказов партиции name, у которых их нет; возвращает число заказов"""
+    cursor.execute(f"SELECT id FROM {name} WHERE items_snapshot IS NULL")
+    orders = [Order(id=order_id) for (order_id,) in cursor.fetchall()]
+    if not orders:
+        return 0
+    alias = cursor.db.alias
+    snapshots = build_snapshots([o.id for o in orders], using=alias)
+    for o in orders:
+        o.items_snapshot = snapshots[o.id]
+        o.item_count = sum(line["quantity"] for line in o.items_snapshot)
+    Order.objects.using(alias).bulk_update(orders, ["items_snapshot", "item_count"], batch_size=1000)
+    return len(orders)
+
+
+def archive_partition(cursor, month, name, detach_only=False):
+    """
+    Убрать партицию месяца из shop_order.
+
+    Позиции её заказов переносятся в shop_orderitem_archive; сама партиция
+    подключается к shop_order_archive или (detach_only) остаётся отдельной таблицей.
+    Заказам без снимка (до backfill_order_snapshots) он строится до переноса позиций:
+    история архива достраивает снимки только из живой shop_orderitem.
+    """
+    fill_snapshots(cursor, name)
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {ITEM_TABLE} WHERE order_id IN (SELECT id FROM {name}) RETURNING *) "
+        f"INSERT INTO {ARCHIVE_ITEM_TABLE} SELECT * FROM moved"
+    )
+    cursor.execute(f"ALTER TABLE {ORDER_TABLE} DETACH PARTITION {name}")
+    if not detach_only:
+        lo, hi = month, add_months(month, 1)
+        cursor.execute(f"ALTER TABLE {ARCHIVE_TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", [lo, hi])
@@ -0,0 +1,134 @@
+"""
+Агрегаты продаж по дням: ProductDailySales (товар × день) и DailySales (день).
+
+Заказы учитываются по возрастанию id от верхней границы RollupState: каждый проход
+добавляет к агрегатам заказы (граница, upto] одним INSERT ... SELECT ... ON CONFLICT
+и сдвигает границу в той же транзакции. Берутся только заказы старше ROLLUP_LAG_SEC:
+id выдаются до коммита, и заказ с меньшим id может стать видимым позже соседнего.
+"""
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailySales, Order, OrderItem, ProductDailySales, RollupState
+from .partitions import ARCHIVE_ITEM_TABLE, month_start
+
+STATE_NAME = "sales"
+
+
+def _upsert(connection, cursor, table, key, queryset):
+    """INSERT ... SELECT queryset ... ON CONFLICT (key): прибавить к строкам агрегата"""
+    compiler = queryset.query.get_compiler(connection=connection)
+    sql, params = compiler.as_sql()
+    columns = [alias for _, _, alias in compiler.select]  # порядок столбцов SELECT
+    qn = connection.ops.quote_name
+    table = qn(table)
+    increments = ", ".join(
+        f"{qn(column)} = {table}.{qn(column)} + EXCLUDED.{qn(column)}" for column in columns if column not in key
+    )
+    cursor.execute(
+        f"INSERT INTO {table} ({', '.join(map(qn, columns))}) {sql} "
+        f"ON CONFLICT ({', '.join(map(qn, key))}) DO UPDATE SET {increments}",
+        params,
+    )
+
+
+def add_orders(after_id, upto_id, since=None, using=None):
+    """
+    Прибавить к агрегатам заказы с id в (after_id, upto_id] (и созданные не раньше since).
+
+    SELECT строит ORM (день — TruncDate в TIME_ZONE), поэтому запрос работает на любой
+    СУБД с ON CONFLICT; строки вставляются в порядке ключа.
+    """
+    using = using or router.db_for_write(ProductDailySales)
+    connection = connections[using]
+    items = OrderItem.objects.using(using).filter(order_id__gt=after_id, order_id__lte=upto_id)
+    if since is not None:
+        items = items.filter(order__created_at__gte=since)
+    items = items.annotate(day=TruncDate("order__created_at", tzinfo=ZoneInfo(settings.TIME_ZONE)))
+    totals = {
+        "units": Sum("quantity"),
+        "revenue": Sum(F("price") * F("quantity")),
+        "order_count": Count("order_id", distinct=True),
+    }
+    by_product = items.values("day", "product_id").annotate(**totals).order_by("day", "product_id")
+    by_day = items.values("day").annotate(**totals).order_by("day")
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        _upsert(connection, cursor, ProductDailySales._meta.db_table, ("day", "product_id"), by_product)
+        _upsert(connection, cursor, DailySales._meta.db_table, ("day",), by_day)
+
+
+def _settled_orders():
+    return Order.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=settings.ROLLUP_LAG_SEC))
+
+
+def _state():
+    state, _ = RollupState.objects.select_for_update().get_or_create(name=STATE_NAME)
+    return state
+
+
+def roll_up(batch_size=10000):
+    """Учесть до batch_size новых заказов; возвращает их число"""
+    with transaction.atomic(using=router.db_for_write(RollupState)):
+        # блокировка строки состояния: параллельный проход ждёт и продолжит с новой границы
+        state = _state()
+        ids = list(
+            _settled_orders().filter(id__gt=state.last_order_id).order_by("id").values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+        add_orders(state.last_order_id, ids[-1])
+        state.last_order_id = ids[-1]
+        state.save(update_fields=["last_order_id", "updated_at"])
+    return len(ids)
+
+
+def _first_live_day(first_at, using):
+    """
+    Первый местный день, все заказы которого ещё в shop_order.
+
+    order_partitions архивирует целые месяцы UTC, а дни агрегатов — местные: первый
+    живой местный день может начинаться в уже архивном месяце. Тогда берётся следующий.
+    """
+    day = timezone.localdate(first_at)
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return day  # без секционирования заказы не архивируются
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {ARCHIVE_ITEM_TABLE})")
+        if not cursor.fetchone()[0]:
+            return day
+    live_from = timezone.localtime(month_start(first_at))
+    return live_from.date() if live_from.time() == time.min else live_from.date() + timedelta(days=1)
+
+
+def reset_for_rebuild(chunk_size):
+    """
+    Сбросить агрегаты дней, все заказы которых в shop_order, и вернуть аргументы add_orders.
+
+    Граница сразу ставится на последний учитываемый заказ: пока диапазоны пересчитываются,
+    roll_up учитывает только более новые заказы. Дни, заказы которых хотя бы частично уже
+    в архиве (order_partitions), не трогаются.
+    """
+    using = router.db_for_write(RollupState)
+    with transaction.atomic(using=using):
+        state = _state()
+        first_at = _settled_orders().aggregate(first_at=Min("created_at"))["first_at"]
+        if first_at is None:
+            return []
+        first_day = _first_live_day(first_at, using)
+        since = timezone.make_aware(datetime.combine(first_day, time.min))
+        bounds = _settled_orders().aggregate(last_id=Max("id"), first_id=Min("id", filter=Q(created_at__gte=since)))
+        ProductDailySales.objects.filter(day__gte=first_day).delete()
+        DailySales.objects.filter(day__gte=first_day).delete()
+        state.last_order_id = bounds["last_id"]
+        state.save(update_fields=["last_order_id", "updated_at"])
+    if bounds["first_id"] is None:
+        return []
+    start, last = bounds["first_id"] - 1, bounds["last_id"]
+    return [(lo, min(lo + chunk_size, last), since) for lo in range(start, last, chunk_size)]
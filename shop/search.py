@@ -0,0 +1,75 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connections
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+SEARCH_CONFIG = "simple"
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _prefix_tsquery(query):
+    """'wire charg' -> 'wire:* & charg:*' (поиск по мере набора)"""
+    return " & ".join(f"{token}:*" for token in TOKEN_RE.findall(query.lower()))
+
+
+def search_products(queryset, *terms):
+    """
+    Поиск товаров по name/description (все terms должны совпасть).
+
+    PostgreSQL: префиксный tsquery по search_vector (GIN) или похожесть
+    слов в name (GIN gin_trgm_ops), результат аннотирован полем rank.
+    Остальные СУБД (SQLite в тестах): обычный icontains без ранжирования.
+    """
+    terms = [t.strip() for t in terms if t and t.strip()]
+    if not terms:
+        return queryset
+
+    query = " ".join(terms)
+    raw_tsquery = _prefix_tsquery(query)
+    if connections[queryset.db].vendor != "postgresql" or not raw_tsquery:
+        for term in terms:
+            queryset = queryset.filter(Q(name__icontains=term) | Q(description__icontains=term))
+        return queryset
+
+    ts_query = SearchQuery(raw_tsquery, config=SEARCH_CONFIG, search_type="raw")
+    # real -> double precision: значение rank в курсоре keyset-пагинации сравнивается точно
+    rank = Cast(SearchRank(F("search_vector"), ts_query) + TrigramWordSimilarity(query, "name"), FloatField())
+    return (
+        queryset
+        .annotate(rank=rank)
+        .filter(Q(search_vector=ts_query) | Q(name__trigram_word_similar=query))
+    )
+
+
+class ProductSearchFilter(SearchFilter):
+    """?search= и ?q= через search_products; без ?ordering= — сортировка по релевантности"""
+
+    extra_search_param = "q"
+
+    def get_search_terms(self, request):
+        params = request.query_params
+        parts = [params.get(self.search_param, ""), params.get(self.extra_search_param, "")]
+        return [p.replace("\x00", "") for p in parts if p]
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        queryset = search_products(queryset, *terms)
+        if "rank" in queryset.query.annotations and OrderingFilter.ordering_param not in request.query_params:
+            queryset = queryset.order_by("-rank", "id")
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.extra_search_param,
+                "required": False,
+                "in": "query",
+                "description": "Синоним search.",
+                "schema": {"type": "string"},
+            },
+        ]
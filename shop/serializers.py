@@ -1,4 +1,7 @@
+from datetime import timedelta
+
 from django.contrib.auth.models import User
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 from .models import Product, CartItem, Order, OrderItem
@@ -25,10 +28,11 @@ class RegisterSerializer(serializers.ModelSerializer):
 class ProductSerializer(serializers.ModelSerializer):
 
     image_url = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
-        fields = ["id", "name", "description", "price", "image", "image_url"]
+        fields = ["id", "name", "description", "price", "image", "image_url", "image_variants"]
 
     def get_image_url(self, obj):
         request = self.context.get("request")
@@ -36,6 +40,14 @@ class ProductSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.image.url)
         return obj.image.url if obj.image else None
 
+    def get_image_variants(self, obj):
+        request = self.context.get("request")
+        urls = {}
+        for variant, name in (obj.image_variants or {}).items():
+            url = obj.image.storage.url(name)
+            urls[variant] = request.build_absolute_uri(url) if request else url
+        return urls
+
 
 class CartItemSerializer(serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
@@ -69,8 +81,36 @@ class OrderSerializer(serializers.ModelSerializer):
 class AddToCartSerializer(serializers.Serializer):
     product_id = serializers.IntegerField(required=True)
     quantity = serializers.IntegerField(min_value=1, required=True)
+    # существование товара проверяет сам upsert (CartItem.objects.add_quantity)
+
+
+class CartBatchItemSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField(required=True)
+    quantity = serializers.IntegerField(min_value=1, required=True)
+
+
+class CartBatchSerializer(serializers.Serializer):
+    MAX_ITEMS = 500
+
+    mode = serializers.ChoiceField(choices=("increment", "set"), default="increment")
+    # позиции валидируются по одной во вьюхе, чтобы ошибки возвращались поштучно
+    items = serializers.ListField(child=serializers.DictField(), default=list, max_length=MAX_ITEMS)
+    remove = serializers.ListField(child=serializers.IntegerField(), default=list, max_length=MAX_ITEMS)
+
+
+class SalesReportQuerySerializer(serializers.Serializer):
+    """Параметры отчётов о продажах; по умолчанию — последние DEFAULT_DAYS дней"""
+    DEFAULT_DAYS = 30
+
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+    by = serializers.ChoiceField(choices=("revenue", "units"), default="revenue")
+    interval = serializers.ChoiceField(choices=("day", "week", "month"), default="day")
 
-    def validate_product_id(self, value):
-        if not Product.objects.filter(id=value).exists():
-            raise serializers.ValidationError("Товар с таким ID не найден.")
-        return value
+    def validate(self, attrs):
+        attrs.setdefault("end", timezone.localdate())
+        attrs.setdefault("start", attrs["end"] - timedelta(days=self.DEFAULT_DAYS - 1))
+        if attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError({"start": ["Начало периода позже конца."]})
+        return attrs
@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.authentication import forget_user
+
+from .cache import bump_catalog_version
+from .models import Product
+from .outbox import enqueue
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_catalog_cache(sender, **kwargs):
+    # после коммита, иначе конкурентный читатель закэширует старые данные под новой версией
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Product)
+def schedule_image_variants(sender, instance, **kwargs):
+    if getattr(instance, "_image_was_changed", False) and instance.image:
+        enqueue("shop.tasks.generate_image_variants", product_id=instance.pk)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # и сразу (этот процесс), и после коммита: иначе между ними кэш заполнится старой строкой
+    forget_user(instance.pk)
+    transaction.on_commit(lambda: forget_user(instance.pk))
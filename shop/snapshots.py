@@ -0,0 +1,47 @@
+from .models import OrderItem
+
+
+def snapshot_line(product_id, product_name, price, quantity):
+    return {
+        "product_id": product_id,
+        "product_name": product_name,
+        "price": str(price),
+        "quantity": quantity,
+    }
+
+
+def build_snapshots(order_ids, using=None):
+    """{order_id: [строки снимка]} одним запросом по OrderItem + Product"""
+    snapshots = {order_id: [] for order_id in order_ids}
+    rows = (
+        OrderItem.objects.using(using)
+        .filter(order_id__in=order_ids)
+        .order_by("order_id", "id")
+        .values_list("order_id", "product_id", "product__name", "price", "quantity")
+    )
+    for order_id, *line in rows:
+        snapshots[order_id].append(snapshot_line(*line))
+    return snapshots
+
+
+def order_history(orders):
+    """
+    Заказы в формате истории, только из полей Order.
+
+    Заказы без снимка (до backfill_order_snapshots) достраиваются одним запросом.
+    """
+    missing = [o.id for o in orders if o.items_snapshot is None]
+    built = build_snapshots(missing) if missing else {}
+    data = []
+    for o in orders:
+        items = o.items_snapshot if o.items_snapshot is not None else built[o.id]
+        data.append(
+            {
+                "id": o.id,
+                "total": str(o.total),
+                "created_at": o.created_at.isoformat() if o.created_at else None,
+                "item_count": o.item_count if o.items_snapshot is not None else sum(it["quantity"] for it in items),
+                "items": items,
+            }
+        )
+    return data
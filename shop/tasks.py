@@ -10,3 +10,48 @@ def send_order_notification(order_id: int, username: str, total: str):
     """Уведомление о создании заказа"""
     logger.info(f"[ORDER] #{order_id} by {username}, total={total}")
     return True
+
+
+@shared_task(ignore_result=True)
+def relay_outbox(batch_size=500, max_batches=20):
+    """Переслать накопившиеся сообщения outbox в брокер (запускается celery beat)"""
+    from .outbox import relay_pending
+
+    return relay_pending(batch_size=batch_size, max_batches=max_batches)
+
+
+@shared_task(ignore_result=True)
+def flush_carts(batch_size=500, max_batches=20):
+    """Записать изменённые Redis-корзины в CartItem (CART_BACKEND=redis, запускается celery beat)"""
+    from .carts import RedisCartStore
+
+    store = RedisCartStore()
+    flushed = 0
+    for _ in range(max_batches):
+        count = store.flush(batch_size=batch_size)
+        flushed += count
+        if count < batch_size:
+            break
+    return flushed
+
+
+@shared_task(ignore_result=True)
+def update_sales_rollups(batch_size=10000, max_batches=20):
+    """Учесть новые заказы в дневных агрегатах продаж (запускается celery beat)"""
+    from .rollups import roll_up
+
+    counted = 0
+    for _ in range(max_batches):
+        count = roll_up(batch_size=batch_size)
+        counted += count
+        if count < batch_size:
+            break
+    return counted
+
+
+@shared_task(ignore_result=True)
+def generate_image_variants(product_id: int):
+    """Уменьшенные/WebP варианты изображения товара"""
+    from .images import build_variants
+
+    build_variants(product_id)
@@ -1,9 +1,19 @@
+import fakeredis
 import pytest
 from decimal import Decimal
+from django.core.cache import cache
 from rest_framework.test import APIClient
+from shop import carts
 from shop.models import Product
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -24,3 +34,31 @@ def product_factory(db):
             made.append(Product.objects.create(**data))
         return made
     return _make
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix):
+    """Отдельная БД-«реплика» (без репликации) для тестов config.db_router"""
+    from django.db import connections
+
+    primary = connections.settings["default"]
+    test = {**primary["TEST"], "MIRROR": None}
+    if primary["ENGINE"] != "django.db.backends.sqlite3":
+        test["NAME"] = f"{test['NAME'] or 'test_' + primary['NAME']}_replica"
+    connections.settings["replica"] = {**primary, "TEST": test}
+
+
+@pytest.fixture
+def replica(settings):
+    """Чтения через роутер идут в alias «replica»; данные туда пишутся явно (.using)"""
+    settings.DATABASE_REPLICAS = ["replica"]
+    return "replica"
+
+
+@pytest.fixture(params=["db", "redis"])
+def cart_backend(request, settings, monkeypatch):
+    """Тест корзины выполняется с обоими хранилищами; Redis — fakeredis"""
+    settings.CART_BACKEND = request.param
+    server = fakeredis.FakeRedis()
+    monkeypatch.setattr(carts, "get_redis", lambda: server)
+    return server if request.param == "redis" else None
@@ -30,6 +30,7 @@ def test_products_list_search_and_detail():
     assert resp.status_code == 200
 
 @pytest.mark.django_db
+@pytest.mark.usefixtures("cart_backend")
 def test_cart_and_order_flow():
     p = Product.objects.create(name="P1", price="10.00")
     u = User.objects.create_user(username="u2", password="password123")
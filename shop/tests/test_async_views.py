@@ -0,0 +1,79 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import AsyncClient
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from shop import async_views
+from shop.models import CartItem
+
+
+def aget(path, **extra):
+    return async_to_sync(AsyncClient().get)(path, **extra)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", [
+    "",
+    "?page=2&page_size=2",
+    "?ordering=-price&page_size=3",
+    "?price=2.00",
+    "?search=Product 4",
+    "?cursor=&page_size=2",
+])
+def test_async_product_list_matches_sync(product_factory, api_client, query):
+    product_factory(count=5)
+    r = aget(f"/api/products/{query}")
+    assert r.status_code == 200
+    assert r.resolver_match.func is async_views.product_list
+    assert r.json() == api_client.get(f"/api/products/{query}").json()
+
+
+@pytest.mark.django_db
+def test_async_keyset_pages_follow_cursor(product_factory):
+    product_factory(count=5)
+    page = aget("/api/products/?cursor=&page_size=2").json()
+    ids = [p["id"] for p in page["results"]]
+    while page["next"]:
+        page = aget(page["next"].split("testserver", 1)[1]).json()
+        ids += [p["id"] for p in page["results"]]
+    assert len(ids) == 5 and ids == sorted(ids)
+
+
+@pytest.mark.django_db
+def test_async_product_detail_and_not_modified(product_factory, api_client):
+    p = product_factory(count=1)[0]
+    r = aget(f"/api/products/{p.id}/")
+    assert r.status_code == 200
+    assert r.json() == api_client.get(f"/api/products/{p.id}/").json()
+
+    r = aget(f"/api/products/{p.id}/", headers={"if-none-match": r["ETag"]})
+    assert r.status_code == 304
+    assert aget(f"/api/products/{p.id + 100}/").status_code == 404
+
+
+@pytest.mark.django_db
+def test_async_routes_delegate_writes_to_sync_viewset():
+    r = async_to_sync(AsyncClient().post)("/api/products/", {"name": "X", "price": "1.00"})
+    assert r.status_code == 401
+
+
+@pytest.mark.django_db
+def test_async_cart_list_requires_jwt_and_matches_sync(product_factory):
+    products = product_factory(count=2)
+    user = User.objects.create_user(username="u1", password="password123")
+    for product in products:
+        CartItem.objects.create(user=user, product=product, quantity=2)
+
+    assert aget("/api/cart/").status_code == 401
+    assert aget("/api/cart/", headers={"authorization": "Bearer broken"}).status_code == 401
+
+    token = AccessToken.for_user(user)
+    r = aget("/api/cart/", headers={"authorization": f"Bearer {token}"})
+    assert r.status_code == 200
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    assert r.json() == client.get("/api/cart/").json()
+    assert len(r.json()) == 2
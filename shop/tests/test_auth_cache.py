@@ -0,0 +1,74 @@
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config.authentication import CachedJWTAuthentication
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="u1", password="password123")
+
+
+def jwt_client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    return client
+
+
+@pytest.mark.django_db
+def test_cached_user_saves_a_query_per_request(user, django_assert_num_queries):
+    client = jwt_client(user)
+    with django_assert_num_queries(2):  # пользователь + корзина
+        assert client.get("/api/cart/").status_code == 200
+    with django_assert_num_queries(1):
+        assert client.get("/api/cart/").status_code == 200
+
+
+@pytest.mark.django_db
+def test_deactivation_and_deletion_take_effect_immediately(user, django_capture_on_commit_callbacks):
+    client = jwt_client(user)
+    assert client.get("/api/cart/").status_code == 200
+
+    user.is_active = False
+    with django_capture_on_commit_callbacks(execute=True):
+        user.save()
+    assert client.get("/api/cart/").status_code == 401
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.delete()
+    assert client.get("/api/cart/").status_code == 401
+
+
+@pytest.mark.django_db
+def test_password_change_revokes_tokens(user, monkeypatch):
+    # simplejwt перечитывает SIMPLE_JWT в новый объект, а модули держат ссылку на старый
+    monkeypatch.setattr(jwt_settings, "CHECK_REVOKE_TOKEN", True)
+    client = jwt_client(user)
+    assert client.get("/api/cart/").status_code == 200
+
+    user.set_password("another-password-1")
+    user.save()
+    r = client.get("/api/cart/")
+    assert r.status_code == 401
+    assert "password" in str(r.json()).lower()
+
+
+@pytest.mark.django_db
+def test_cached_user_loads_other_fields_lazily_and_saves_safely(user, django_assert_num_queries):
+    auth = CachedJWTAuthentication()
+    token = AccessToken.for_user(user)
+    auth.get_user(token)
+
+    with django_assert_num_queries(0):
+        cached = auth.get_user(token)
+        assert (cached.pk, cached.username, cached.is_active) == (user.pk, "u1", True)
+    assert cached.date_joined == user.date_joined  # отложенное поле — одним запросом
+
+    cached.first_name = "Changed"
+    cached.save()
+    user.refresh_from_db()
+    assert user.first_name == "Changed"
+    assert user.check_password("password123")
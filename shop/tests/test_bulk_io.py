@@ -0,0 +1,59 @@
+import json
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+
+from shop.models import Product
+
+
+@pytest.mark.django_db
+def test_import_csv_upserts_by_sku_and_reports_bad_rows(tmp_path, capsys):
+    Product.objects.create(sku="A-1", name="Old", price="1.00")
+    path = tmp_path / "feed.csv"
+    path.write_text(
+        "sku,name,price,description\n"
+        "A-1,Phone,999.90,Flagship\n"
+        "B-2,Case,19.00,\n"
+        "C-3,Bad price,-5,\n"
+        ",No sku,1.00,\n"
+        "B-2,Case v2,21.00,Leather\n",
+        encoding="utf-8",
+    )
+
+    call_command("import_products", str(path), batch_size=2)
+
+    assert Product.objects.count() == 2
+    phone = Product.objects.get(sku="A-1")
+    assert (phone.name, phone.price, phone.description) == ("Phone", Decimal("999.90"), "Flagship")
+    case = Product.objects.get(sku="B-2")
+    assert (case.name, case.price, case.description) == ("Case v2", Decimal("21.00"), "Leather")
+    err = capsys.readouterr().err
+    assert "line 4" in err and "line 5" in err
+
+
+@pytest.mark.django_db
+def test_export_jsonl_roundtrip(tmp_path):
+    Product.objects.create(sku="A-1", name="Чехол", price="10.50", description=None)
+    Product.objects.create(sku="B-2", name="Phone", price="999.00", description="x")
+    out = tmp_path / "catalog.jsonl"
+
+    call_command("export_products", str(out))
+    records = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [(r["sku"], r["name"], r["price"]) for r in records] == [
+        ("A-1", "Чехол", "10.50"),
+        ("B-2", "Phone", "999.00"),
+    ]
+
+    Product.objects.all().delete()
+    call_command("import_products", str(out))
+    assert sorted(Product.objects.values_list("sku", "price")) == [("A-1", Decimal("10.50")), ("B-2", Decimal("999.00"))]
+
+
+@pytest.mark.django_db
+def test_export_csv_to_stdout(capsys):
+    Product.objects.create(sku="A-1", name="Phone, new", price="1.00")
+    call_command("export_products", "-", format="csv")
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "id,sku,name,price,description"
+    assert lines[1].endswith(',A-1,"Phone, new",1.00,')
@@ -0,0 +1,104 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from shop import cache as catalog_cache
+from shop.models import Product
+
+
+def test_product_list_and_detail_served_from_cache(api_client, product_factory, django_assert_num_queries):
+    p = product_factory(count=2)[0]
+    first = api_client.get("/api/products/").json()
+    detail = api_client.get(f"/api/products/{p.id}/").json()
+    with django_assert_num_queries(0):
+        assert api_client.get("/api/products/").json() == first
+        assert api_client.get(f"/api/products/{p.id}/").json() == detail
+
+
+def test_cached_routes_keep_their_own_pagination_links(api_client, product_factory):
+    product_factory(count=3)
+    first = api_client.get("/api/products/?page_size=1").json()
+    cached = api_client.get("/api/products-cached/?page_size=1").json()
+    assert first["next"].startswith("http://testserver/api/products/?")
+    assert cached["next"].startswith("http://testserver/api/products-cached/?")
+    assert cached["results"] == first["results"]
+
+
+@pytest.mark.django_db
+def test_product_write_invalidates_cache(api_client, product_factory, django_capture_on_commit_callbacks):
+    p = product_factory(count=1, price="10.00")[0]
+    admin = User.objects.create_user(username="admin", password="pass12345", is_staff=True)
+    api_client.get(f"/api/products/{p.id}/")
+    version = catalog_cache.get_catalog_version()
+
+    api_client.force_authenticate(user=admin)
+    with django_capture_on_commit_callbacks(execute=True):
+        r = api_client.patch(f"/api/products/{p.id}/", {"price": "12.00"}, format="json")
+    assert r.status_code == 200
+    assert catalog_cache.get_catalog_version() == version + 1
+    assert api_client.get(f"/api/products/{p.id}/").json()["price"] == "12.00"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Product.objects.filter(pk=p.pk).first().delete()
+    assert api_client.get(f"/api/products/{p.id}/").status_code == 404
+
+
+def test_get_or_build_respects_foreign_lock(monkeypatch):
+    calls = []
+    monkeypatch.setattr(catalog_cache, "REBUILD_WAIT", 0.2)
+    cache.add("k:lock", 1)
+    cache.set("k", "built-by-other")
+    assert catalog_cache.get_or_build("k", lambda: calls.append(1) or "mine") == "built-by-other"
+
+    cache.delete("k")
+    assert catalog_cache.get_or_build("k", lambda: calls.append(1) or "mine") == "mine"
+    assert calls == [1]
+    assert cache.get("k") is None  # без блокировки результат не публикуется
+
+
+def test_get_or_build_caches_and_releases_lock():
+    assert catalog_cache.get_or_build("k2", lambda: {"a": 1}) == {"a": 1}
+    assert cache.get("k2") == {"a": 1}
+    assert cache.get("k2:lock") is None
+
+
+def test_conditional_get_returns_304_without_queries(api_client, product_factory, django_assert_num_queries):
+    p = product_factory(count=2)[0]
+    for url in ("/api/products/", f"/api/products/{p.id}/"):
+        first = api_client.get(url)
+        assert first.status_code == 200
+        assert first["ETag"] and first["Last-Modified"]
+        with django_assert_num_queries(0):
+            r = api_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        assert r.status_code == 304
+        assert r["ETag"] == first["ETag"]
+        with django_assert_num_queries(0):
+            r = api_client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        assert r.status_code == 304
+
+    other = api_client.get("/api/products/?page_size=1")
+    assert other["ETag"] != api_client.get("/api/products/")["ETag"]
+
+
+@pytest.mark.django_db
+def test_etag_changes_after_product_write(api_client, product_factory, django_capture_on_commit_callbacks):
+    p = product_factory(count=1)[0]
+    etag = api_client.get(f"/api/products/{p.id}/")["ETag"]
+    with django_capture_on_commit_callbacks(execute=True):
+        p.name = "Renamed"
+        p.save()
+    r = api_client.get(f"/api/products/{p.id}/", HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == 200
+    assert r.json()["name"] == "Renamed"
+    assert r["ETag"] != etag
+
+
+def test_last_modified_moves_forward_on_writes_within_a_second(api_client, product_factory, monkeypatch):
+    p = product_factory(count=1)[0]
+    monkeypatch.setattr(catalog_cache.time, "time", lambda: 1_800_000_000.5)
+    catalog_cache.bump_catalog_version()
+    first = api_client.get(f"/api/products/{p.id}/")
+    catalog_cache.bump_catalog_version()  # та же секунда
+    r = api_client.get(f"/api/products/{p.id}/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+    assert r.status_code == 200
+    assert r["Last-Modified"] != first["Last-Modified"]
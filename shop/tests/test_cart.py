@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from rest_framework.test import APIClient
+
+from shop.models import CartItem, Product
+
+
+@pytest.mark.django_db
+def test_cart_add_increments_and_rejects_unknown_product(django_assert_max_num_queries):
+    p = Product.objects.create(name="P1", price="10.00")
+    user = User.objects.create_user(username="u1", password="password123")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    client.post("/api/cart/add/", {"product_id": p.id, "quantity": 2}, format="json")
+    with django_assert_max_num_queries(2):
+        r = client.post("/api/cart/add/", {"product_id": p.id, "quantity": 3}, format="json")
+    assert r.status_code == 201
+    assert r.data["quantity"] == 5
+    assert r.data["product"]["id"] == p.id
+    assert CartItem.objects.get(user=user, product=p).quantity == 5
+
+    r = client.post("/api/cart/add/", {"product_id": p.id + 100, "quantity": 1}, format="json")
+    assert r.status_code == 422
+    assert "product_id" in r.json()["error"]["detail"]
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="параллельные INSERT ... ON CONFLICT (SQLite блокирует таблицу)")
+@pytest.mark.django_db(transaction=True)
+def test_parallel_cart_adds_lose_no_increments():
+    p = Product.objects.create(name="P1", price="10.00")
+    user = User.objects.create_user(username="u1", password="password123")
+    workers, per_worker = 8, 10
+
+    def hammer(_):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        try:
+            for _ in range(per_worker):
+                r = client.post("/api/cart/add/", {"product_id": p.id, "quantity": 1}, format="json")
+                assert r.status_code == 201
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(hammer, range(workers)))
+
+    assert CartItem.objects.get(user=user, product=p).quantity == workers * per_worker
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("cart_backend")
+def test_cart_batch_increment_set_remove_and_item_errors():
+    p1, p2, p3 = (Product.objects.create(name=f"P{i}", price="1.00") for i in range(3))
+    user = User.objects.create_user(username="u1", password="password123")
+    CartItem.objects.create(user=user, product=p1, quantity=1)
+    CartItem.objects.create(user=user, product=p3, quantity=1)
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    r = client.post("/api/cart/batch/", {
+        "items": [
+            {"product_id": p1.id, "quantity": 2},
+            {"product_id": p2.id, "quantity": 4},
+            {"product_id": p1.id, "quantity": 1},
+            {"product_id": 999999, "quantity": 1},
+            {"product_id": p2.id, "quantity": 0},
+        ],
+        "remove": [p3.id],
+    }, format="json")
+    assert r.status_code == 200
+    assert {it["product"]["id"]: it["quantity"] for it in r.data["items"]} == {p1.id: 4, p2.id: 4}
+    assert [e["index"] for e in r.data["errors"]] == [3, 4]
+
+    r = client.post("/api/cart/batch/", {
+        "mode": "set",
+        "items": [{"product_id": p1.id, "quantity": 1}],
+    }, format="json")
+    assert {it["product"]["id"]: it["quantity"] for it in r.data["items"]} == {p1.id: 1, p2.id: 4}
+    assert r.data["errors"] == []
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("cart_backend")
+def test_cart_batch_rejects_malformed_payload():
+    user = User.objects.create_user(username="u1", password="password123")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    r = client.post("/api/cart/batch/", {"mode": "replace", "items": "x"}, format="json")
+    assert r.status_code == 422
@@ -0,0 +1,107 @@
+import fakeredis
+import pytest
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.test import APIClient
+
+from shop import carts
+from shop.models import CartItem, Order, Product
+from shop.tasks import flush_carts
+
+
+@pytest.fixture
+def redis_carts(settings, monkeypatch):
+    settings.CART_BACKEND = "redis"
+    server = fakeredis.FakeRedis()
+    monkeypatch.setattr(carts, "get_redis", lambda: server)
+    return server
+
+
+@pytest.fixture
+def shopper(db):
+    user = User.objects.create_user(username="u1", password="password123")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return user, client
+
+
+def db_cart(user):
+    return dict(CartItem.objects.filter(user=user).values_list("product_id", "quantity"))
+
+
+def test_clicks_stay_in_redis_until_flush(redis_carts, shopper, django_assert_num_queries):
+    user, client = shopper
+    p1, p2 = (Product.objects.create(name=f"P{i}", price="1.00") for i in range(2))
+    CartItem.objects.create(user=user, product=p1, quantity=1)
+
+    assert client.post("/api/cart/add/", {"product_id": p1.id, "quantity": 2}, format="json").data["quantity"] == 3
+    with django_assert_num_queries(1):  # только товар: корзина уже в Redis
+        r = client.post("/api/cart/add/", {"product_id": p2.id, "quantity": 1}, format="json")
+    assert r.status_code == 201
+    assert client.delete(f"/api/cart/{p2.id}/remove/").status_code == 204
+    assert client.delete(f"/api/cart/{p2.id}/remove/").status_code == 404
+    assert [(it["product"]["id"], it["quantity"]) for it in client.get("/api/cart/").data] == [(p1.id, 3)]
+    assert db_cart(user) == {p1.id: 1}
+
+    assert flush_carts() == 1
+    assert db_cart(user) == {p1.id: 3}
+    assert flush_carts() == 0
+
+
+def test_flush_skips_expired_cart_and_deleted_products(redis_carts, shopper):
+    user, client = shopper
+    p1, p2 = (Product.objects.create(name=f"P{i}", price="1.00") for i in range(2))
+    client.post("/api/cart/batch/", {"items": [{"product_id": p1.id, "quantity": 2}, {"product_id": p2.id, "quantity": 1}]},
+                format="json")
+    p2.delete()
+    flush_carts()
+    assert db_cart(user) == {p1.id: 2}
+
+    client.post("/api/cart/add/", {"product_id": p1.id, "quantity": 1}, format="json")
+    redis_carts.delete(carts.CART_KEY.format(user_id=user.id))
+    flush_carts()
+    assert db_cart(user) == {p1.id: 2}
+    # следующая загрузка — из CartItem
+    assert [it["quantity"] for it in client.get("/api/cart/").data] == [2]
+
+
+def test_add_during_checkout_stays_in_new_cart(redis_carts, shopper, monkeypatch):
+    user, client = shopper
+    p1, p2 = (Product.objects.create(name=f"P{i}", price="2.00") for i in range(2))
+    client.post("/api/cart/add/", {"product_id": p1.id, "quantity": 2}, format="json")
+    checkout_cart = carts.checkout_cart
+
+    def racing_checkout(u):
+        carts.RedisCartStore().add(u.id, p2.id, 1)
+        return checkout_cart(u)
+
+    monkeypatch.setattr(carts, "checkout_cart", racing_checkout)
+    r = client.post("/api/orders/create_order/")
+    assert r.status_code == 201
+    assert r.data["total"] == "4.00"
+    assert [(it["product"]["id"], it["quantity"]) for it in r.data["items"]] == [(p1.id, 2)]
+    assert [(it["product"]["id"], it["quantity"]) for it in client.get("/api/cart/").data] == [(p2.id, 1)]
+
+    flush_carts()
+    assert db_cart(user) == {p2.id: 1}
+
+
+def test_failed_checkout_returns_lines_to_cart(redis_carts, shopper, monkeypatch):
+    user, client = shopper
+    p = Product.objects.create(name="P", price="2.00")
+    client.post("/api/cart/add/", {"product_id": p.id, "quantity": 2}, format="json")
+
+    def broken(u):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(carts, "checkout_cart", broken)
+    with pytest.raises(RuntimeError):
+        carts.get_cart_store().checkout(user)
+    assert not Order.objects.exists()
+    assert [it.quantity for it in carts.get_cart_store().items(user.id)] == [2]
+
+
+def test_unknown_backend_is_rejected(settings):
+    settings.CART_BACKEND = "memcached"
+    with pytest.raises(ImproperlyConfigured):
+        carts.get_cart_store()
@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from shop.checkout import checkout_cart
+from shop.models import CartItem, Order, OrderItem, Product
+
+
+@pytest.mark.django_db
+def test_checkout_moves_cart_and_sums_total_in_db():
+    user = User.objects.create_user(username="u1", password="password123")
+    other = User.objects.create_user(username="u2", password="password123")
+    p1 = Product.objects.create(name="P1", price="10.50")
+    p2 = Product.objects.create(name="P2", price="0.99")
+    CartItem.objects.create(user=user, product=p1, quantity=2)
+    CartItem.objects.create(user=user, product=p2, quantity=3)
+    CartItem.objects.create(user=other, product=p1, quantity=1)
+
+    order = checkout_cart(user)
+
+    assert order.total == Decimal("23.97")
+    assert Order.objects.get(pk=order.pk).total == Decimal("23.97")
+    assert sorted(OrderItem.objects.filter(order=order).values_list("product_id", "price", "quantity")) == [
+        (p1.id, Decimal("10.50"), 2),
+        (p2.id, Decimal("0.99"), 3),
+    ]
+    assert not CartItem.objects.filter(user=user).exists()
+    assert CartItem.objects.filter(user=other).count() == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("cart_backend")
+def test_checkout_empty_cart_creates_nothing():
+    user = User.objects.create_user(username="u1", password="password123")
+    assert checkout_cart(user) is None
+    assert not Order.objects.exists()
+
+    client = APIClient()
+    client.force_authenticate(user=user)
+    r = client.post("/api/orders/create_order/")
+    assert r.status_code == 400
+    assert not Order.objects.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("cart_backend")
+def test_create_order_response_lists_items():
+    user = User.objects.create_user(username="u1", password="password123")
+    p = Product.objects.create(name="P1", price="5.00")
+    CartItem.objects.create(user=user, product=p, quantity=4)
+    client = APIClient()
+    client.force_authenticate(user=user)
+    r = client.post("/api/orders/create_order/")
+    assert r.status_code == 201
+    assert r.data["total"] == "20.00"
+    assert [(it["product"]["id"], it["quantity"]) for it in r.data["items"]] == [(p.id, 4)]
@@ -0,0 +1,81 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+
+from shop.models import Product
+
+
+def make(*rows):
+    for name, price in rows:
+        Product.objects.create(name=name, price=price)
+
+
+@pytest.mark.django_db
+def test_facets_histogram_min_max_and_count(api_client, django_assert_num_queries):
+    make(("Phone", "10.00"), ("Phone case", "15.00"), ("Cable", "20.00"), ("Charger", "50.00"))
+
+    # на PostgreSQL один запрос; без width_bucket — агрегаты и гистограмма отдельно
+    with django_assert_num_queries(1 if connection.vendor == "postgresql" else 2):
+        r = api_client.get("/api/products/facets/?buckets=4")
+    assert r.status_code == 200
+    assert r.json() == {
+        "count": 4,
+        "price": {
+            "min": "10.00",
+            "max": "50.00",
+            "histogram": [
+                {"min": "10.00", "max": "20.00", "count": 2},
+                {"min": "20.00", "max": "30.00", "count": 1},
+                {"min": "30.00", "max": "40.00", "count": 0},
+                {"min": "40.00", "max": "50.00", "count": 1},
+            ],
+        },
+    }
+
+
+@pytest.mark.django_db
+def test_facets_follow_search_and_filters(api_client):
+    make(("Phone", "10.00"), ("Phone case", "15.00"), ("Cable", "20.00"))
+
+    body = api_client.get("/api/products/facets/?q=phone&buckets=1").json()
+    assert body["count"] == 2
+    assert body["price"] == {"min": "10.00", "max": "15.00", "histogram": [{"min": "10.00", "max": "15.00", "count": 2}]}
+
+    body = api_client.get("/api/products/facets/?price_min=12&name_prefix=p").json()
+    assert body["count"] == 1
+    assert body["price"]["histogram"] == [{"min": "15.00", "max": "15.00", "count": 1}]
+
+    assert api_client.get("/api/products/facets/?price_min=100").json() == {
+        "count": 0, "price": {"min": None, "max": None, "histogram": []},
+    }
+
+
+@pytest.mark.django_db
+def test_facets_cached_per_normalized_filters_until_catalog_changes(
+    api_client, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    make(("Phone", "10.00"), ("Cable", "20.00"))
+    first = api_client.get("/api/products/facets/?q=Phone&page=2&ordering=price").json()
+
+    with django_assert_num_queries(0):
+        assert api_client.get("/api/products/facets/?ordering=-price&q=phone%20&price_max=").json() == first
+
+    admin = User.objects.create_user(username="admin", password="pass12345", is_staff=True)
+    api_client.force_authenticate(user=admin)
+    with django_capture_on_commit_callbacks(execute=True):
+        api_client.post("/api/products/", {"name": "Phone 2", "price": "30.00"}, format="json")
+    assert api_client.get("/api/products/facets/?q=phone").json()["count"] == 2
+
+
+@pytest.mark.django_db
+def test_facets_bucket_edges_match_width_bucket(api_client):
+    # границы 1.33.. и 1.66..: цена 1.33 в первой корзине, 1.34 — во второй
+    make(("A", "1.00"), ("B", "1.33"), ("C", "1.34"), ("D", "2.00"))
+    histogram = api_client.get("/api/products/facets/?buckets=3").json()["price"]["histogram"]
+    assert [b["count"] for b in histogram] == [2, 1, 1]
+
+
+@pytest.mark.parametrize("buckets", ["0", "51", "x"])
+def test_facets_reject_bad_bucket_count(api_client, buckets, db):
+    r = api_client.get(f"/api/products/facets/?buckets={buckets}")
+    assert r.status_code in (400, 422)
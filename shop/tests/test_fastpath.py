@@ -0,0 +1,83 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.utils.functional import lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from config.renderers import FastJSONRenderer
+from shop.models import CartItem, Product
+from shop.serializers import CartItemSerializer, ProductSerializer
+
+
+@pytest.fixture
+def catalog(db):
+    return [
+        Product.objects.create(name="Phone X", price="999.00", description="Flagship"),
+        Product.objects.create(name="Чехол   «кожа»", price="19.9", description=None),
+        Product.objects.create(name='Quote " \\ \t', price="0", image="products/фото 1 (new).jpg"),
+        Product.objects.create(
+            name="Lens", price="1234567.89", image="products/lens.png",
+            image_variants={"thumbnail": "products/variants/lens.thumbnail.jpg", "webp": "products/variants/lens.webp.webp"},
+        ),
+    ]
+
+
+def test_product_list_is_byte_identical_to_serializer(catalog):
+    client = APIClient()
+    resp = client.get("/api/products/?page_size=100")
+    expected = JSONRenderer().render({
+        "count": len(catalog),
+        "next": None,
+        "previous": None,
+        "results": ProductSerializer(
+            Product.objects.order_by("id"), many=True, context={"request": resp.wsgi_request}
+        ).data,
+    })
+    assert resp.content == expected
+    assert b"http://testserver/media/products/%D1%84" in resp.content
+
+
+def test_product_detail_is_byte_identical_to_serializer(catalog):
+    client = APIClient()
+    for product in catalog:
+        resp = client.get(f"/api/products/{product.id}/")
+        expected = JSONRenderer().render(
+            ProductSerializer(product, context={"request": resp.wsgi_request}).data
+        )
+        assert resp.content == expected
+    assert client.get("/api/products/abc/").status_code == 404
+
+
+def test_cart_list_is_byte_identical_to_serializer(catalog):
+    user = User.objects.create_user(username="u1", password="password123")
+    for i, product in enumerate(catalog, start=1):
+        CartItem.objects.create(user=user, product=product, quantity=i)
+    client = APIClient()
+    client.force_authenticate(user=user)
+    resp = client.get("/api/cart/")
+    items = CartItem.objects.filter(user=user).select_related("product")
+    assert resp.content == JSONRenderer().render(CartItemSerializer(items, many=True).data)
+
+
+def test_fast_renderer_matches_drf_renderer():
+    payload = {
+        "text": "ascii ☃    \x00\x1f\x7f \"q\" \\ / \n\t",
+        "decimal": Decimal("10.50"),
+        "big": 2 ** 63 - 1,
+        "flags": [True, False, None],
+        "nested": {"a": [], "b": {}},
+        "dt": datetime.datetime(2025, 1, 2, 3, 4, 5, 678000, tzinfo=datetime.timezone.utc),
+        "naive": datetime.datetime(2025, 1, 2, 3, 4, 5),
+        "date": datetime.date(2025, 1, 2),
+        "time": datetime.time(3, 4, 5, 600),
+        "lazy": lazy(lambda: "ленивая", str)(),
+        1: "int key",
+    }
+    assert FastJSONRenderer().render(payload) == JSONRenderer().render(payload)
+    assert FastJSONRenderer().render(payload, "application/json; indent=2") == \
+        JSONRenderer().render(payload, "application/json; indent=2")
+    assert FastJSONRenderer().render(None) == b""
+    assert FastJSONRenderer().render({"huge": 2 ** 70}) == JSONRenderer().render({"huge": 2 ** 70})
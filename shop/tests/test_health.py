@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+from django.test import override_settings
+
+from config import health
+from config.redis import get_redis
+
+
+@pytest.fixture(autouse=True)
+def fresh_probe():
+    health.reset()
+    yield
+    health.reset()
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    calls = {"db": 0, "redis": 0}
+    state = {"db": True, "redis": True}
+
+    def make(name):
+        def probe():
+            calls[name] += 1
+            return state[name]
+        return probe
+
+    monkeypatch.setattr(health, "probe_db", make("db"))
+    monkeypatch.setattr(health, "probe_redis", make("redis"))
+    return calls, state
+
+
+def test_health_probes_are_cached(client, probes, settings):
+    calls, state = probes
+    settings.HEALTH_CACHE_SEC = 60
+    for _ in range(5):
+        r = client.get("/health/")
+        assert r.status_code == 200 and r.json() == {"db": True, "redis": True}
+    assert calls == {"db": 1, "redis": 1}
+
+    # пока результат свежий, падение Redis не видно и не вызывает новых проб
+    state["redis"] = False
+    assert client.get("/health/").status_code == 200
+    assert calls == {"db": 1, "redis": 1}
+
+
+def test_health_reprobes_after_interval(client, probes, settings):
+    calls, state = probes
+    settings.HEALTH_CACHE_SEC = 0
+    assert client.get("/health/").status_code == 200
+    state["redis"] = False
+    r = client.get("/health/")
+    assert r.status_code == 503 and r.json() == {"db": True, "redis": False}
+    assert calls == {"db": 2, "redis": 2}
+
+
+@pytest.mark.django_db
+def test_health_reports_real_db(client, settings, monkeypatch):
+    monkeypatch.setattr(health, "probe_redis", lambda: True)
+    assert client.get("/health/").json() == {"db": True, "redis": True}
+
+
+def test_get_redis_shares_cache_pool_across_threads():
+    caches = {
+        "default": {
+            "BACKEND": "config.redis.SharedPoolRedisCache",
+            "LOCATION": "redis://127.0.0.1:6399/0",
+            "OPTIONS": {"max_connections": 7},
+        }
+    }
+    with override_settings(CACHES=caches):
+        from django.core.cache import caches as handler
+
+        pools = []
+
+        def grab():
+            # бэкенд кэша у каждого потока свой, пул — общий
+            pools.append(handler["default"]._cache.get_client(write=True).connection_pool)
+            pools.append(get_redis().connection_pool)
+
+        threads = [threading.Thread(target=grab) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len({id(pool) for pool in pools}) == 1
+        assert pools[0].max_connections == 7
+
+
+def test_get_redis_without_redis_cache_uses_one_pool(monkeypatch):
+    monkeypatch.setenv("REDIS_URL", "redis://127.0.0.1:6399/0")
+    assert get_redis().connection_pool is get_redis().connection_pool
+
+    monkeypatch.delenv("REDIS_URL")
+    with pytest.raises(ValueError):
+        get_redis()
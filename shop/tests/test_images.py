@@ -0,0 +1,78 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+from rest_framework.test import APIClient
+
+from shop.images import build_variants
+from shop.models import OutboxMessage, Product
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def _upload(name="photo.png", size=(1600, 1200)):
+    buffer = BytesIO()
+    Image.new("RGBA", size, (200, 10, 10, 128)).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+@pytest.mark.django_db
+def test_image_change_schedules_variants_once():
+    product = Product.objects.create(name="P", price="1.00", image=_upload())
+    assert OutboxMessage.objects.filter(task="shop.tasks.generate_image_variants").count() == 1
+
+    product = Product.objects.get(pk=product.pk)
+    product.price = "2.00"
+    product.save()
+    assert OutboxMessage.objects.count() == 1
+
+    product.image_variants = {"thumbnail": "x"}
+    product.image = _upload("other.png")
+    product.save()
+    assert product.image_variants == {}
+    assert OutboxMessage.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_build_variants_resizes_and_exposes_urls(media_root):
+    product = Product.objects.create(name="P", price="1.00", image=_upload())
+    variants = build_variants(product.id)
+
+    assert set(variants) == {"thumbnail", "medium", "webp"}
+    with Image.open(media_root / variants["thumbnail"]) as im:
+        assert im.format == "JPEG" and max(im.size) == 200
+    with Image.open(media_root / variants["webp"]) as im:
+        assert im.format == "WEBP" and im.size == (800, 600)
+
+    data = APIClient().get(f"/api/products/{product.id}/").json()
+    assert data["image_variants"]["medium"] == f"http://testserver/media/{variants['medium']}"
+
+
+@pytest.mark.django_db
+def test_build_variants_skips_result_when_image_replaced(media_root, monkeypatch):
+    product = Product.objects.create(name="P", price="1.00", image=_upload())
+    import shop.images
+
+    real_render = shop.images.render_variants
+
+    def render_and_replace(name):
+        Product.objects.filter(pk=product.pk).update(image="products/newer.png")
+        return real_render(name)
+
+    monkeypatch.setattr(shop.images, "render_variants", render_and_replace)
+    build_variants(product.id)
+    assert Product.objects.get(pk=product.pk).image_variants == {}
+
+
+@pytest.mark.django_db
+def test_regenerate_command_in_process():
+    Product.objects.create(name="P1", price="1.00", image=_upload("a.png"))
+    Product.objects.create(name="P2", price="1.00")
+    call_command("regenerate_image_variants", workers=1, missing_only=True)
+    assert set(Product.objects.exclude(image="").get().image_variants) == {"thumbnail", "medium", "webp"}
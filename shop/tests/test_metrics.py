@@ -0,0 +1,126 @@
+import multiprocessing
+import threading
+from urllib.request import urlopen
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+
+from config.metrics import CELERY_PUBLISH, Registry, registry, serve
+
+
+def sample(text, name, **labels):
+    wanted = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    prefix = f"{name}{{{wanted}}} " if labels else f"{name} "
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return 0.0
+
+
+def test_registry_sums_threads_and_keeps_finished_ones():
+    reg = Registry()
+    hits = reg.counter("hits_total", "Hits.", ("kind",))
+    latency = reg.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+
+    def work():
+        for _ in range(1000):
+            hits.inc("a")
+        latency.observe(0.5)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    latency.observe(0.05)
+    latency.observe(3)
+
+    text = reg.render()
+    assert "# TYPE hits_total counter" in text
+    assert sample(text, "hits_total", kind="a") == 4000
+    assert sample(text, "latency_seconds_bucket", le="0.1") == 1
+    assert sample(text, "latency_seconds_bucket", le="1.0") == 5
+    assert sample(text, "latency_seconds_bucket", le="+Inf") == 6
+    assert sample(text, "latency_seconds_count") == 6
+    assert sample(text, "latency_seconds_sum") == pytest.approx(5.05)
+    assert sample(reg.render(), "hits_total", kind="a") == 4000  # повторный сбор не удваивает
+
+
+def test_shared_directory_sums_processes(tmp_path):
+    reg = Registry()
+    hits = reg.counter("hits_total", "Hits.", ("kind",))
+    reg.share(str(tmp_path), interval=60)
+    hits.inc("a", amount=2)
+
+    def worker():
+        reg._after_fork()  # как os.register_at_fork у общего registry
+        hits.inc("a", amount=3)
+        reg.dump()
+
+    child = multiprocessing.get_context("fork").Process(target=worker)
+    child.start()
+    child.join()
+    assert child.exitcode == 0
+
+    assert len(list(tmp_path.glob("*.json"))) == 1  # файл родителя пишется при сборе
+    assert sample(reg.render(), "hits_total", kind="a") == 5  # до fork счёт родителя не удвоен
+    assert sample(reg.render(), "hits_total", kind="a") == 5
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+def test_serve_exposes_metrics_without_django_http():
+    CELERY_PUBLISH.observe(0.01, "t.served")
+    server = serve(0, "127.0.0.1")
+    try:
+        with urlopen(f"http://127.0.0.1:{server.server_address[1]}/") as r:
+            assert r.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            text = r.read().decode()
+    finally:
+        server.shutdown()
+    assert sample(text, "celery_publish_duration_seconds_count", task="t.served") >= 1
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_reports_routes_queries_and_cache(product_factory, api_client, django_assert_num_queries):
+    product_factory(count=3)
+    route = {"route": "products-list", "method": "GET"}
+    before = api_client.get("/metrics").content.decode()
+
+    with django_assert_num_queries(3):  # состояние каталога, COUNT, страница
+        assert api_client.get("/api/products/").status_code == 200
+    api_client.get("/api/products/")
+
+    r = api_client.get("/metrics")
+    assert r.status_code == 200
+    assert r["Content-Type"].startswith("text/plain; version=0.0.4")
+    text = r.content.decode()
+
+    def delta(name, **labels):
+        return sample(text, name, **labels) - sample(before, name, **labels)
+
+    assert delta("http_requests_total", **route, status=200) == 2
+    assert delta("http_request_duration_seconds_count", **route) == 2
+    assert delta("http_request_db_queries_sum", **route) == 3
+    assert delta("http_request_db_queries_bucket", **route, le="0.0") == 1  # второй ответ из кэша
+    assert delta("catalog_cache_requests_total", result="miss") == 1
+    assert delta("catalog_cache_requests_total", result="hit") == 1
+
+
+@pytest.mark.django_db
+def test_metrics_count_async_orm_queries(product_factory):
+    p = product_factory(count=1)[0]
+    route = {"route": "products-detail", "method": "GET"}
+    before = registry.render()
+    assert async_to_sync(AsyncClient().get)(f"/api/products/{p.id}/").status_code == 200
+    text = registry.render()
+    assert sample(text, "http_request_db_queries_sum", **route) - sample(before, "http_request_db_queries_sum", **route) == 2
+
+
+@pytest.mark.django_db
+def test_outbox_enqueue_latency_is_recorded():
+    from shop.outbox import enqueue
+
+    before = sample(registry.render(), "outbox_enqueue_duration_seconds_count", task="t.x")
+    enqueue("t.x", a=1)
+    assert sample(registry.render(), "outbox_enqueue_duration_seconds_count", task="t.x") == before + 1
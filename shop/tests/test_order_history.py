@@ -0,0 +1,76 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from shop.checkout import checkout_cart
+from shop.models import CartItem, Order, OrderItem, Product
+
+
+@pytest.fixture
+def user_with_order(db):
+    user = User.objects.create_user(username="u1", password="password123")
+    p1 = Product.objects.create(name="P1", price="10.50")
+    p2 = Product.objects.create(name="P2", price="2.00")
+    CartItem.objects.create(user=user, product=p1, quantity=2)
+    CartItem.objects.create(user=user, product=p2, quantity=1)
+    order = checkout_cart(user)
+    return user, order, (p1, p2)
+
+
+def test_checkout_stores_snapshot(user_with_order):
+    _, order, (p1, p2) = user_with_order
+    order.refresh_from_db()
+    assert order.item_count == 3
+    assert order.items_snapshot == [
+        {"product_id": p1.id, "product_name": "P1", "price": "10.50", "quantity": 2},
+        {"product_id": p2.id, "product_name": "P2", "price": "2.00", "quantity": 1},
+    ]
+
+
+def test_history_and_detail_are_single_query(user_with_order, django_assert_num_queries):
+    user, order, (p1, _) = user_with_order
+    p1.name = "Renamed"
+    p1.save()
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    # неполная страница из свежих партиций добирается из более старых
+    with django_assert_num_queries(2):
+        history = client.get("/api/orders/my/").json()["results"]
+    with django_assert_num_queries(1):
+        detail = client.get(f"/api/orders/{order.id}/").json()
+
+    assert history == [detail]
+    assert detail["total"] == "23.00"
+    assert detail["item_count"] == 3
+    assert detail["items"][0]["product_name"] == "P1"
+
+
+def test_detail_of_foreign_order_is_404(user_with_order):
+    _, order, _ = user_with_order
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_user(username="u2", password="password123"))
+    assert client.get(f"/api/orders/{order.id}/").status_code == 404
+
+
+def test_detail_with_non_numeric_id_is_404(user_with_order):
+    user, _, _ = user_with_order
+    client = APIClient()
+    client.force_authenticate(user=user)
+    assert client.get("/api/orders/abc/").status_code == 404
+    assert client.get("/api/orders/abc/?archive=1").status_code == 404
+
+
+def test_backfill_command_builds_missing_snapshots(user_with_order):
+    user, _, (p1, _) = user_with_order
+    legacy = Order.objects.create(user=user, total="31.50")
+    OrderItem.objects.create(order=legacy, product=p1, price="10.50", quantity=3)
+
+    call_command("backfill_order_snapshots", batch_size=1)
+
+    legacy.refresh_from_db()
+    assert legacy.item_count == 3
+    assert legacy.items_snapshot == [
+        {"product_id": p1.id, "product_name": "P1", "price": "10.50", "quantity": 3}
+    ]
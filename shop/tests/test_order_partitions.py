@@ -0,0 +1,158 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from shop.models import ArchivedOrder, DailySales, Order, OrderItem, Product, ProductDailySales
+from shop.partitions import (
+    ORDER_TABLE,
+    add_months,
+    archive_partition,
+    month_start,
+    partition_name,
+    partitions,
+    split_default,
+)
+from shop.rollups import roll_up
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(connection.vendor != "postgresql", reason="секционирование только на PostgreSQL"),
+]
+
+
+@pytest.fixture
+def shopper():
+    user = User.objects.create_user(username="u1", password="password123")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return user, client
+
+
+def place(user, months_ago=0, at=None):
+    product = Product.objects.create(name="P", price="1.00")
+    order = Order.objects.create(user=user, total="1.00", item_count=1, items_snapshot=[])
+    OrderItem.objects.create(order=order, product=product, price="1.00", quantity=1)
+    if months_ago:
+        at = timezone.now() - timedelta(days=31 * months_ago)
+    if at:
+        # UPDATE переносит строку в партицию нужного месяца (или в default)
+        Order.objects.filter(pk=order.pk).update(created_at=at)
+    return order
+
+
+def ids(client, url):
+    collected = []
+    while url:
+        body = client.get(url).json()
+        collected += [o["id"] for o in body["results"]]
+        url = body["next"] and body["next"].split("testserver", 1)[1]
+    return collected
+
+
+def test_history_reads_recent_partitions_first(shopper, django_assert_num_queries):
+    user, client = shopper
+    old = place(user, months_ago=8)
+    recent = [place(user) for _ in range(3)]
+
+    with django_assert_num_queries(1):  # страница набрана из свежих партиций
+        body = client.get("/api/orders/my/?page_size=2").json()
+    assert [o["id"] for o in body["results"]] == [recent[2].id, recent[1].id]
+
+    newest_first = [o.id for o in reversed(recent)] + [old.id]
+    assert ids(client, "/api/orders/my/?page_size=2") == newest_first
+    assert ids(client, "/api/orders/my/?page_size=3") == newest_first
+
+
+def test_command_creates_partitions_ahead_and_splits_default(shopper):
+    user, _ = shopper
+    old = place(user, months_ago=30)
+    call_command("order_partitions", ahead=6)
+
+    current = month_start(timezone.now())
+    with connection.cursor() as cursor:
+        existing = partitions(cursor, ORDER_TABLE)
+        cursor.execute("SELECT COUNT(*) FROM shop_order_default")
+        assert cursor.fetchone()[0] == 0
+    assert add_months(current, 6) in existing
+    assert month_start(Order.objects.get(pk=old.pk).created_at) in existing
+
+
+def test_archive_moves_old_months_out_of_history(shopper):
+    user, client = shopper
+    old = place(user, months_ago=30)
+    recent = place(user)
+    old_month = month_start(Order.objects.get(pk=old.pk).created_at)
+
+    call_command("order_partitions", archive_after=24)
+
+    assert not Order.objects.filter(pk=old.pk).exists()
+    assert not OrderItem.objects.filter(order_id=old.pk).exists()
+    assert ArchivedOrder.objects.get(pk=old.pk).user_id == user.id
+    with connection.cursor() as cursor:
+        assert partition_name(old_month) in partitions(cursor, "shop_order_archive").values()
+        cursor.execute("SELECT COUNT(*) FROM shop_orderitem_archive WHERE order_id = %s", [old.pk])
+        assert cursor.fetchone()[0] == 1
+
+    assert ids(client, "/api/orders/my/") == [recent.id]
+    assert ids(client, "/api/orders/my/?archive=1&page_size=1") == [recent.id, old.id]
+    assert client.get(f"/api/orders/{old.pk}/").status_code == 404
+    assert client.get(f"/api/orders/{old.pk}/?archive=1").json()["id"] == old.pk
+
+
+def test_detach_leaves_standalone_table(shopper):
+    user, _ = shopper
+    old = place(user, months_ago=30)
+    name = partition_name(month_start(timezone.now() - timedelta(days=31 * 30)))
+
+    call_command("order_partitions", archive_after=24, detach=True)
+
+    assert not Order.objects.filter(pk=old.pk).exists()
+    assert not ArchivedOrder.objects.filter(pk=old.pk).exists()
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT id FROM {name}")
+        assert cursor.fetchall() == [(old.pk,)]
+
+
+def test_rollup_rebuild_keeps_days_partly_archived(shopper, settings):
+    settings.ROLLUP_LAG_SEC = 0
+    user, _ = shopper
+    boundary = add_months(month_start(timezone.now()), -30)
+    # последний час архивного месяца UTC и первый час следующего — один местный день
+    place(user, at=boundary - timedelta(minutes=30))
+    place(user, at=boundary + timedelta(minutes=30))
+    place(user, at=boundary + timedelta(days=3))
+    roll_up()
+    expected = sorted(DailySales.objects.values_list("day", "order_count"))
+    assert expected[0] == (timezone.localdate(boundary), 2)
+
+    with connection.cursor() as cursor:
+        split_default(cursor)
+        old_month = add_months(boundary, -1)
+        archive_partition(cursor, old_month, partitions(cursor, ORDER_TABLE)[old_month])
+    ProductDailySales.objects.update(units=0)
+    DailySales.objects.filter(day__gt=timezone.localdate(boundary)).delete()
+
+    call_command("rebuild_sales_rollups", chunk_size=1)
+    assert sorted(DailySales.objects.values_list("day", "order_count")) == expected
+    assert ProductDailySales.objects.filter(day__gt=timezone.localdate(boundary), units=1).count() == 1
+
+
+def test_archive_keeps_items_of_orders_without_snapshot(shopper):
+    user, client = shopper
+    old = place(user, months_ago=30)
+    Order.objects.filter(pk=old.pk).update(items_snapshot=None, item_count=0)
+
+    call_command("order_partitions", archive_after=24)
+
+    archived = ArchivedOrder.objects.get(pk=old.pk)
+    assert archived.item_count == 1
+    assert [line["product_name"] for line in archived.items_snapshot] == ["P"]
+    detail = client.get(f"/api/orders/{old.pk}/?archive=1").json()
+    assert (detail["item_count"], len(detail["items"])) == (1, 1)
+    history = client.get("/api/orders/my/?archive=1").json()["results"]
+    assert [(o["id"], o["item_count"], len(o["items"])) for o in history] == [(old.pk, 1, 1)]
@@ -0,0 +1,62 @@
+from contextlib import nullcontext
+
+import pytest
+from celery import current_app
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from shop import outbox
+from shop.checkout import checkout_cart
+from shop.models import CartItem, OutboxMessage, Product
+
+
+@pytest.fixture
+def fake_broker(monkeypatch):
+    published = []
+    monkeypatch.setattr(current_app, "producer_or_acquire", lambda: nullcontext("producer"))
+    monkeypatch.setattr(
+        current_app, "send_task",
+        lambda name, kwargs=None, producer=None: published.append((name, kwargs, producer)),
+    )
+    return published
+
+
+@pytest.mark.django_db
+def test_checkout_writes_notification_to_outbox():
+    user = User.objects.create_user(username="u1", password="password123")
+    p = Product.objects.create(name="P1", price="3.00")
+    CartItem.objects.create(user=user, product=p, quantity=2)
+
+    assert checkout_cart(User.objects.get(pk=user.pk)) is not None
+    assert checkout_cart(user) is None
+
+    message = OutboxMessage.objects.get()
+    assert message.task == "shop.tasks.send_order_notification"
+    assert message.kwargs["username"] == "u1"
+    assert message.kwargs["total"] == "6.00"
+
+
+@pytest.mark.django_db
+def test_relay_publishes_in_order_and_deletes(fake_broker):
+    for i in range(5):
+        outbox.enqueue("shop.tasks.send_order_notification", order_id=i, username="u", total="1.00")
+
+    assert outbox.relay_batch(batch_size=3) == 3
+    call_command("relay_outbox", batch_size=3)
+
+    assert [kw["order_id"] for _, kw, _ in fake_broker] == [0, 1, 2, 3, 4]
+    assert {producer for _, _, producer in fake_broker} == {"producer"}
+    assert not OutboxMessage.objects.exists()
+
+
+@pytest.mark.django_db
+def test_relay_keeps_messages_when_broker_fails(monkeypatch):
+    first = outbox.enqueue("shop.tasks.send_order_notification", order_id=1, username="u", total="1.00")
+    outbox.enqueue("shop.tasks.send_order_notification", order_id=2, username="u", total="1.00")
+    monkeypatch.setattr(outbox, "publish", lambda messages: ([], ConnectionError("broker down")))
+
+    assert outbox.relay_pending() == 0
+    first.refresh_from_db()
+    assert first.attempts == 1
+    assert "broker down" in first.last_error
+    assert OutboxMessage.objects.count() == 2
@@ -0,0 +1,83 @@
+import json
+from base64 import urlsafe_b64encode
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from shop.models import Order
+
+
+def _walk(client, url):
+    seen = []
+    while url:
+        r = client.get(url)
+        assert r.status_code == 200
+        data = r.json()
+        assert "count" not in data
+        seen.extend(data["results"])
+        url = data["next"]
+    return seen
+
+
+def test_products_cursor_walks_all_pages(api_client, product_factory):
+    product_factory(count=7)
+    items = _walk(api_client, "/api/products/?cursor=&page_size=3")
+    assert [p["id"] for p in items] == sorted(p["id"] for p in items)
+    assert len(items) == 7
+
+
+def test_products_cursor_with_ordering_and_ties(api_client, product_factory):
+    product_factory(count=4, price="5.00")
+    product_factory(count=3, price="1.00")
+    items = _walk(api_client, "/api/products/?cursor=&page_size=2&ordering=-price")
+    keys = [(float(p["price"]), p["id"]) for p in items]
+    assert keys == sorted(keys, key=lambda k: (-k[0], -k[1]))
+    assert len({p["id"] for p in items}) == 7
+
+
+def test_products_cursor_previous_link(api_client, product_factory):
+    product_factory(count=5)
+    first = api_client.get("/api/products/?cursor=&page_size=2").json()
+    second = api_client.get(first["next"]).json()
+    back = api_client.get(second["previous"]).json()
+    assert back["results"] == first["results"]
+
+
+def test_products_invalid_cursor_returns_404(api_client, product_factory):
+    product_factory(count=1)
+    r = api_client.get("/api/products/?cursor=garbage")
+    assert r.status_code == 404
+
+
+@pytest.mark.parametrize("position", [["abc"], [None], [[1]], [{"a": 1}], [1, "x"]])
+def test_products_cursor_with_bad_values_returns_404(api_client, product_factory, position):
+    product_factory(count=1)
+    token = urlsafe_b64encode(json.dumps({"p": position}).encode()).decode().rstrip("=")
+    r = api_client.get(f"/api/products/?cursor={token}")
+    assert r.status_code == 404
+    r = api_client.get(f"/api/products/?cursor={token}&ordering=-price")
+    assert r.status_code == 404
+
+
+@pytest.mark.django_db
+def test_my_orders_are_keyset_paginated():
+    user = User.objects.create_user(username="u3", password="password123")
+    for _ in range(12):
+        Order.objects.create(user=user)
+    client = APIClient()
+    client.force_authenticate(user=user)
+    orders = _walk(client, "/api/orders/my/")
+    ids = [o["id"] for o in orders]
+    assert ids == sorted(ids, reverse=True)
+    assert len(ids) == 12
+
+
+@pytest.mark.django_db
+def test_my_orders_cursor_with_bad_value_returns_404():
+    user = User.objects.create_user(username="u4", password="password123")
+    Order.objects.create(user=user)
+    client = APIClient()
+    client.force_authenticate(user=user)
+    token = urlsafe_b64encode(json.dumps({"p": ["abc"]}).encode()).decode().rstrip("=")
+    assert client.get(f"/api/orders/my/?cursor={token}").status_code == 404
@@ -0,0 +1,98 @@
+"""
+Планы запросов каталога и истории заказов (только PostgreSQL).
+
+На тестовых данных планировщик и так выбрал бы Seq Scan, поэтому EXPLAIN
+выполняется с enable_seqscan = off: Seq Scan в плане остаётся, только если
+ни один индекс не подходит к запросу, т.е. на большой таблице был бы полный скан.
+"""
+import json
+import re
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from shop.models import Order, OrderItem, Product
+
+pytestmark = pytest.mark.skipif(connection.vendor != "postgresql", reason="EXPLAIN-планы PostgreSQL")
+
+LARGE_TABLES = {"shop_product", "shop_order", "shop_orderitem"}
+PARTITION_SUFFIX = re.compile(r"_(p\d{6}|default)$")
+
+CATALOG_URLS = [
+    "/api/products/",
+    "/api/products/?ordering=price",
+    "/api/products/?ordering=-price&page=2&page_size=2",
+    "/api/products/?ordering=name",
+    "/api/products/?price=15.00",
+    "/api/products/?price_min=10&price_max=20",
+    "/api/products/?price_min=10&ordering=price",
+    "/api/products/?name_prefix=pho",
+    "/api/products/?cursor=&ordering=price&page_size=2",
+    "/api/products/?cursor=&ordering=-name&page_size=2",
+    "/api/products/?cursor=&price_min=10&page_size=2",
+    "/api/products/facets/",
+    "/api/products/facets/?price_min=10&price_max=20",
+    "/api/products/facets/?name_prefix=pho",
+]
+
+
+def seq_scans(plan):
+    node = plan["Plan"] if "Plan" in plan else plan
+    found = []
+    # партиции shop_order (shop_order_p202601, shop_order_default) считаются самой таблицей
+    table = PARTITION_SUFFIX.sub("", node.get("Relation Name", ""))
+    if node.get("Node Type") == "Seq Scan" and table in LARGE_TABLES:
+        found.append(node["Relation Name"])
+    for child in node.get("Plans", []):
+        found += seq_scans(child)
+    return found
+
+
+def assert_indexed(client, url):
+    """url и все next-страницы курсора не читают большие таблицы полным сканом"""
+    while url:
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        assert response.status_code == 200, url
+        selects = [q["sql"] for q in ctx.captured_queries if q["sql"].lstrip().upper().startswith(("SELECT", "WITH"))]
+        assert selects, url
+        with connection.cursor() as cur:
+            cur.execute("SET enable_seqscan = off")
+            try:
+                for sql in selects:
+                    cur.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+                    plan = cur.fetchone()[0]
+                    plan = json.loads(plan) if isinstance(plan, str) else plan
+                    assert not seq_scans(plan[0]), f"{url}: Seq Scan\n{sql}"
+            finally:
+                cur.execute("RESET enable_seqscan")
+        body = response.json()
+        url = body.get("next") if "cursor=" in url else None
+        if url:
+            url = url.split("testserver", 1)[1]
+
+
+@pytest.mark.django_db
+def test_catalog_list_queries_use_indexes(api_client):
+    for i, name in enumerate(["Phone", "phone case", "Charger", "Cable", "Photo frame"]):
+        Product.objects.create(name=name, price=f"{10 + i * 3}.00")
+    for url in CATALOG_URLS:
+        assert_indexed(api_client, url)
+
+
+@pytest.mark.django_db
+def test_order_history_queries_use_indexes():
+    user = User.objects.create_user(username="u1", password="password123")
+    product = Product.objects.create(name="P", price="1.00")
+    for _ in range(3):
+        order = Order.objects.create(user=user, total="1.00")
+        OrderItem.objects.create(order=order, product=product, price="1.00", quantity=1)
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    assert_indexed(client, "/api/orders/my/?cursor=&page_size=1")
+    assert_indexed(client, "/api/orders/my/?cursor=&page_size=1&archive=1")
+    assert_indexed(client, f"/api/orders/{order.pk}/")
@@ -0,0 +1,129 @@
+from decimal import Decimal
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import router
+from django.test import AsyncClient, Client
+from rest_framework.test import APIClient
+
+from config import db_router
+from shop.models import CartItem, Order, Product
+
+pytestmark = pytest.mark.django_db(databases=["default", "replica"])
+
+
+def names(response):
+    return [p["name"] for p in response.json()["results"]]
+
+
+def make_user(username, using="default", **extra):
+    user = User.objects.create_user(username=username, password="pass12345", **extra)
+    if using != "default":
+        User.objects.using(using).create(pk=user.pk, username=username, password=user.password, **extra)
+    return user
+
+
+def test_catalog_reads_go_to_replica(api_client, replica):
+    Product.objects.create(name="On primary", price="1.00")
+    on_replica = Product.objects.using(replica).create(name="On replica", price="2.00")
+
+    assert names(api_client.get("/api/products/")) == ["On replica"]
+    assert api_client.get(f"/api/products/{on_replica.pk}/").json()["name"] == "On replica"
+    assert names(api_client.get("/api/products-cached/")) == ["On replica"]
+
+
+def test_async_catalog_reads_check_pins_without_sync_cache(replica, monkeypatch):
+    Product.objects.create(name="On primary", price="1.00")
+    Product.objects.using(replica).create(name="On replica", price="2.00")
+
+    def blocking(*args, **kwargs):
+        raise AssertionError("синхронная проверка закрепления в event loop")
+
+    monkeypatch.setattr(db_router, "read_from_replica", blocking)
+    aget = async_to_sync(AsyncClient().get)
+    assert names(aget("/api/products/")) == ["On replica"]
+    cache.set("db:primary:catalog", 1)
+    assert names(aget("/api/products/?page_size=5")) == ["On primary"]
+
+
+def test_without_replicas_everything_reads_primary(api_client):
+    Product.objects.create(name="On primary", price="1.00")
+    Product.objects.using("replica").create(name="On replica", price="2.00")
+    assert names(api_client.get("/api/products/")) == ["On primary"]
+
+
+def test_router_outside_request_uses_primary(replica):
+    assert router.db_for_read(Product) == "default"
+    assert router.db_for_write(Product) == "default"
+
+
+def test_product_write_goes_to_primary_and_pins_catalog(
+    api_client, replica, django_capture_on_commit_callbacks
+):
+    admin = make_user("admin", is_staff=True)
+    api_client.force_authenticate(user=admin)
+    with django_capture_on_commit_callbacks(execute=True):
+        r = api_client.post("/api/products/", {"name": "New", "price": "3.00"}, format="json")
+    assert r.status_code == 201
+    assert Product.objects.filter(name="New").exists()
+    assert not Product.objects.using(replica).exists()
+
+    # реплика ещё не догнала: и автор, и остальные читают каталог с primary
+    assert names(api_client.get("/api/products/")) == ["New"]
+    assert names(APIClient().get("/api/products/?page_size=5")) == ["New"]
+
+    cache.delete("db:primary:catalog")
+    assert names(APIClient().get("/api/products/?page_size=6")) == []
+
+
+def test_checkout_stays_on_primary_and_history_reads_own_writes(replica):
+    product = Product.objects.create(name="P", price="5.00")
+    buyer = make_user("buyer", using=replica)
+    CartItem.objects.create(user=buyer, product=product, quantity=2)
+    client = APIClient()
+    client.force_authenticate(user=buyer)
+
+    r = client.post("/api/orders/create_order/")
+    assert r.status_code == 201
+    assert Order.objects.get(user=buyer).total == Decimal("10.00")
+    assert not Order.objects.using(replica).exists()
+
+    # сразу после записи история читается с primary
+    assert [o["id"] for o in client.get("/api/orders/my/").json()["results"]] == [r.json()["id"]]
+
+    cache.delete(f"db:primary:user:{buyer.pk}")
+    assert client.get("/api/orders/my/").json()["results"] == []
+
+
+def test_history_of_other_users_reads_replica(replica):
+    reader = make_user("reader", using=replica)
+    Order.objects.using(replica).create(user_id=reader.pk, total="7.00", items_snapshot=[])
+    client = APIClient()
+    client.force_authenticate(user=reader)
+    assert [o["total"] for o in client.get("/api/orders/my/").json()["results"]] == ["7.00"]
+
+
+def test_cart_reads_and_writes_stay_on_primary(replica):
+    product = Product.objects.create(name="P", price="5.00")
+    Product.objects.using(replica).create(pk=product.pk, name="P", price="5.00")
+    user = make_user("shopper", using=replica)
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    assert client.post("/api/cart/add/", {"product_id": product.pk, "quantity": 2}, format="json").status_code == 201
+    assert CartItem.objects.get(user=user).quantity == 2
+    assert not CartItem.objects.using(replica).exists()
+    assert [item["quantity"] for item in client.get("/api/cart/").json()] == [2]
+
+
+def test_admin_changelist_reads_replica(replica):
+    admin = make_user("admin", is_staff=True, is_superuser=True)
+    Product.objects.create(name="Primary product", price="1.00")
+    Product.objects.using(replica).create(name="Replica product", price="1.00")
+    client = Client()
+    client.force_login(admin)
+
+    body = client.get("/admin/shop/product/").content.decode()
+    assert "Replica product" in body and "Primary product" not in body
@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from shop.checkout import checkout_cart
+from shop.models import CartItem, DailySales, Order, Product, ProductDailySales, RollupState
+from shop.rollups import roll_up
+from shop.tasks import update_sales_rollups
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def no_lag(settings):
+    settings.ROLLUP_LAG_SEC = 0
+
+
+@pytest.fixture
+def products():
+    return Product.objects.create(name="A", price="10.00"), Product.objects.create(name="B", price="3.00")
+
+
+def buy(username, *lines, days_ago=0):
+    user, _ = User.objects.get_or_create(username=username)
+    for product, quantity in lines:
+        CartItem.objects.create(user=user, product=product, quantity=quantity)
+    order = checkout_cart(user)
+    if days_ago:
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+    return order
+
+
+def snapshot():
+    return (
+        sorted(ProductDailySales.objects.values_list("day", "product_id", "units", "revenue", "order_count")),
+        sorted(DailySales.objects.values_list("day", "units", "revenue", "order_count")),
+    )
+
+
+def test_incremental_rollup_counts_each_order_once(products):
+    a, b = products
+    today = timezone.localdate()
+    buy("u1", (a, 2), (b, 1))
+    buy("u2", (a, 1))
+
+    assert update_sales_rollups() == 2
+    assert update_sales_rollups() == 0
+    buy("u1", (b, 4))
+    assert roll_up(batch_size=1) == 1
+
+    by_product, daily = snapshot()
+    assert {(pid, units, str(revenue), orders) for day, pid, units, revenue, orders in by_product} == {
+        (a.id, 3, "30.00", 2), (b.id, 5, "15.00", 2),
+    }
+    assert [(day, units, str(revenue), orders) for day, units, revenue, orders in daily] == [(today, 8, "45.00", 3)]
+    assert RollupState.objects.get().last_order_id == Order.objects.latest("id").id
+
+
+def test_recent_orders_wait_for_lag(products, settings):
+    settings.ROLLUP_LAG_SEC = 60
+    buy("u1", (products[0], 1), days_ago=1)
+    buy("u1", (products[0], 1))
+    assert roll_up() == 1
+    assert DailySales.objects.get().day == timezone.localdate() - timedelta(days=1)
+
+
+def test_rebuild_matches_incremental_and_keeps_new_orders(products):
+    a, b = products
+    for days_ago in (0, 1, 1, 3):
+        buy(f"u{days_ago}", (a, 1), (b, days_ago + 1), days_ago=days_ago)
+    roll_up()
+    expected = snapshot()
+    # агрегаты испорчены: rebuild пересчитывает их с нуля по диапазонам id
+    ProductDailySales.objects.update(units=0)
+    DailySales.objects.all().delete()
+
+    call_command("rebuild_sales_rollups", chunk_size=1)
+    assert snapshot() == expected
+    assert roll_up() == 0
+
+
+def test_reports_read_only_rollups(products):
+    a, b = products
+    buy("u1", (a, 1), (b, 5), days_ago=40)
+    buy("u2", (a, 1), (b, 5), days_ago=2)
+    buy("u3", (b, 1))
+    roll_up()
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_user(username="staff", password="x", is_staff=True))
+
+    with CaptureQueriesContext(connection) as ctx:
+        top = client.get("/api/reports/top-sellers/").json()
+        by_units = client.get("/api/reports/top-sellers/?by=units&limit=1").json()
+        revenue = client.get(f"/api/reports/revenue/?start={timezone.localdate() - timedelta(days=60)}&interval=month").json()
+    assert not [q for q in ctx.captured_queries if "shop_order" in q["sql"]]
+
+    assert [(r["product_name"], r["units"], r["revenue"], r["order_count"]) for r in top["results"]] == [
+        ("B", 6, "18.00", 2), ("A", 1, "10.00", 1),
+    ]
+    assert [r["product_name"] for r in by_units["results"]] == ["B"]
+    assert sum(r["order_count"] for r in revenue["results"]) == 3
+    assert sum(float(r["revenue"]) for r in revenue["results"]) == 53.0
+
+
+def test_reports_are_staff_only_and_validate_params(products):
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_user(username="u1", password="x"))
+    assert client.get("/api/reports/revenue/").status_code == 403
+
+    client.force_authenticate(user=User.objects.create_user(username="staff", password="x", is_staff=True))
+    assert client.get("/api/reports/revenue/?interval=year").status_code in (400, 422)
+    assert client.get("/api/reports/top-sellers/?start=2026-02-01&end=2026-01-01").status_code in (400, 422)
+    assert client.get("/api/reports/revenue/").json()["results"] == []
@@ -0,0 +1,36 @@
+import pytest
+from django.db import connection
+
+from shop.models import Product
+from shop.search import _prefix_tsquery, search_products
+
+
+def test_prefix_tsquery_builds_prefix_terms():
+    assert _prefix_tsquery("Wire  charg!") == "wire:* & charg:*"
+    assert _prefix_tsquery("!!!") == ""
+
+
+def test_search_products_requires_all_terms(product_factory):
+    product_factory(count=1, name="Phone X", description="Flagship")
+    product_factory(count=1, name="Phone case", description="Accessory")
+    qs = search_products(Product.objects.all(), "phone", "flagship")
+    assert [p.name for p in qs] == ["Phone X"]
+
+
+def test_q_and_search_params_are_combined(api_client, product_factory):
+    product_factory(count=1, name="Phone X", description="Flagship")
+    product_factory(count=1, name="Phone case", description="Accessory")
+    r = api_client.get("/api/products/?q=phone&search=accessory")
+    assert [p["name"] for p in r.json()["results"]] == ["Phone case"]
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="rank есть только на PostgreSQL")
+def test_search_cursor_pages_walk_through_tied_ranks(api_client, product_factory):
+    made = product_factory(count=7, name="Phone", description="Same")
+    seen, url = [], "/api/products/?cursor=&search=phone&page_size=2"
+    while url:
+        body = api_client.get(url).json()
+        seen += [p["id"] for p in body["results"]]
+        assert len(seen) <= len(made)  # курсор не должен возвращать те же строки
+        url = body["next"] and body["next"].split("testserver", 1)[1]
+    assert seen == [p.id for p in made]
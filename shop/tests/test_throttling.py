@@ -0,0 +1,141 @@
+import fakeredis
+import pytest
+import redis
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from config import throttling
+from shop.models import Product
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    server = fakeredis.FakeRedis()
+    monkeypatch.setattr(throttling, "get_redis", lambda: server)
+    monkeypatch.setattr(throttling, "_skip_until", 0.0)
+    return server
+
+
+@pytest.fixture
+def rates(settings):
+    def set_rates(**overrides):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {**settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"], **overrides},
+        }
+    return set_rates
+
+
+def login(client, password="wrong"):
+    return client.post("/api/auth/login/", {"username": "nobody", "password": password}, format="json")
+
+
+@pytest.mark.django_db
+def test_login_limited_per_ip_with_retry_after(api_client, fake_redis, rates):
+    rates(login="3/min")
+    assert [login(api_client).status_code for _ in range(3)] == [401, 401, 401]
+
+    r = login(api_client)
+    assert r.status_code == 429
+    assert 1 <= int(r["Retry-After"]) <= 60
+    # другой IP считается отдельно
+    other = APIClient(REMOTE_ADDR="10.0.0.9")
+    assert login(other).status_code == 401
+
+
+@pytest.mark.django_db
+def test_forwarded_for_is_ignored_without_trusted_proxies(fake_redis, rates):
+    rates(login="3/min")
+    codes = [
+        login(APIClient(HTTP_X_FORWARDED_FOR=f"198.51.100.{i}")).status_code for i in range(4)
+    ]
+    assert codes == [401, 401, 401, 429]
+
+
+@pytest.mark.django_db
+def test_cart_and_checkout_limited_per_user(fake_redis, rates):
+    rates(cart="2/min", checkout="1/min")
+    product = Product.objects.create(name="P", price="1.00")
+    clients = []
+    for name in ("u1", "u2"):
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username=name, password="pass12345"))
+        clients.append(client)
+    first, second = clients
+
+    add = {"product_id": product.pk, "quantity": 1}
+    assert [first.post("/api/cart/add/", add, format="json").status_code for _ in range(3)] == [201, 201, 429]
+    assert first.get("/api/cart/").status_code == 200  # чтение корзины не лимитируется
+    assert second.post("/api/cart/add/", add, format="json").status_code == 201
+
+    assert second.post("/api/orders/create_order/").status_code == 201
+    assert second.post("/api/orders/create_order/").status_code == 429
+
+
+@pytest.mark.django_db
+def test_register_scope_and_unlimited_scope(api_client, fake_redis, rates):
+    rates(register="1/hour", login=None)
+    data = {"username": "new", "email": "new@example.com", "password": "Str0ng-pass!"}
+    assert api_client.post("/api/auth/register/", data, format="json").status_code == 201
+    assert api_client.post("/api/auth/register/", {**data, "username": "new2"}, format="json").status_code == 429
+    assert all(login(api_client).status_code == 401 for _ in range(12))
+
+
+@pytest.mark.django_db
+def test_throttle_uses_one_redis_call_per_request(api_client, fake_redis, rates, monkeypatch):
+    rates(login="5/min")
+    login(api_client)  # первый вызов загружает скрипт (NOSCRIPT -> SCRIPT LOAD)
+    calls = []
+    original = fake_redis.execute_command
+    monkeypatch.setattr(fake_redis, "execute_command", lambda *a, **kw: calls.append(a[0]) or original(*a, **kw))
+    login(api_client)
+    login(api_client)
+    assert calls == ["EVALSHA", "EVALSHA"]
+    assert fake_redis.hgetall("throttle:login:127.0.0.1").keys() == {b"w", b"cur", b"prev"}
+
+
+@pytest.mark.django_db
+def test_redis_failure_fails_open_and_backs_off(api_client, rates, monkeypatch):
+    rates(login="1/min")
+    calls = []
+
+    class Broken:
+        def register_script(self, script):
+            def run(**kwargs):
+                calls.append(kwargs)
+                raise redis.ConnectionError("down")
+            return run
+
+    monkeypatch.setattr(throttling, "get_redis", lambda: Broken())
+    monkeypatch.setattr(throttling, "_skip_until", 0.0)
+    assert [login(api_client).status_code for _ in range(3)] == [401, 401, 401]
+    assert len(calls) == 1  # после ошибки Redis не опрашивается FAIL_OPEN_SEC секунд
+
+
+def test_sliding_window_weights_previous_window(fake_redis):
+    script = fake_redis.register_script(throttling.SLIDING_WINDOW)
+    # окно подобрано так, что текущее началось ~5 мс назад: вес прошлого окна почти 1
+    window = int(fake_redis.time()[0]) * 1000 - 5
+    fake_redis.hset("k", mapping={"w": 1, "cur": 1, "prev": 10})
+    allowed, retry = script(keys=["k"], args=[10, window])
+    # 10 * вес + 1 >= 10, пока вес прошлого окна не упадёт до 0.9
+    assert allowed == 0
+    assert window / 10 - 2000 < retry <= window / 10
+
+    fake_redis.hset("k", mapping={"w": -1, "cur": 10, "prev": 10})
+    assert script(keys=["k"], args=[10, window]) == [1, 0]  # окна старше прошлого не учитываются
+
+
+def test_retry_after_full_current_window_waits_for_next_window(fake_redis):
+    script = fake_redis.register_script(throttling.SLIDING_WINDOW)
+    window = int(fake_redis.time()[0]) * 1000 - 5
+    # текущее окно уже набрало лимит: ждать его конца, не меньше
+    fake_redis.hset("k", mapping={"w": 1, "cur": 10, "prev": 0})
+    allowed, retry = script(keys=["k"], args=[10, window])
+    assert allowed == 0
+    assert window - 2000 < retry <= window
+
+    # лимит снижен до 5: в следующем окне вес прошлого (10) должен упасть ниже 0.5
+    allowed, retry = script(keys=["k"], args=[5, window])
+    assert allowed == 0
+    assert window * 1.5 - 2000 < retry <= window * 1.5
@@ -32,6 +32,23 @@ def test_products_search_and_ordering(api_client, product_factory):
     assert float(items[0]["price"]) >= float(items[1]["price"])
 
 
+def test_products_price_range_and_name_prefix(api_client, product_factory):
+    product_factory(count=1, name="Phone X", price="999.00")
+    product_factory(count=1, name="phone case", price="19.00")
+    product_factory(count=1, name="Case", price="25.00")
+
+    def names(query):
+        r = api_client.get(f"/api/products/?ordering=price&{query}")
+        assert r.status_code == 200
+        return [it["name"] for it in r.json()["results"]]
+
+    assert names("price_min=19&price_max=25") == ["phone case", "Case"]
+    assert names("price_min=20") == ["Case", "Phone X"]
+    assert names("name_prefix=PHO") == ["phone case", "Phone X"]
+    assert names("name_prefix=case") == ["Case"]
+    assert api_client.get("/api/products/?price_min=abc").status_code in (400, 422)
+
+
 @pytest.mark.django_db
 def test_product_price_cannot_be_negative_model():
     p = Product(name="Bad price", price=-100)
@@ -1,27 +1,40 @@
-from decimal import Decimal
-
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import transaction
-from django.db.models import Q
+from django.db.models import F, Prefetch, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
 
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, generics, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import NotAuthenticated
-from rest_framework.filters import OrderingFilter, SearchFilter
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import NotAuthenticated, ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
-from .models import CartItem, Order, OrderItem, Product
+from config.db_router import ReplicaReadMixin
+from config.pagination import KeysetPagination
+
+from .cache import CatalogCacheMixin, get_or_build
+from .carts import get_cart_store
+from .facets import bucket_count, facets_cache_key, price_facets
+from .fastpath import FastReadMixin, MediaURLs, get_plan
+from .filters import ProductFilter
+from .models import ArchivedOrder, CartItem, DailySales, Order, OrderItem, Product, ProductDailySales
+from .partitions import recent_months_start
 from .permissions import IsAdminUserOrReadOnly
+from .search import ProductSearchFilter
 from .serializers import (
     AddToCartSerializer,
+    CartBatchItemSerializer,
+    CartBatchSerializer,
     CartItemSerializer,
     OrderSerializer,
     ProductSerializer,
     RegisterSerializer,
+    SalesReportQuerySerializer,
 )
-from .tasks import send_order_notification
+from .snapshots import order_history
 
 
 class RegisterView(generics.CreateAPIView):
@@ -29,36 +42,66 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
     permission_classes = [AllowAny]
+    throttle_scope = "register"
 
 
-class ProductViewSet(viewsets.ModelViewSet):
-    """Фильтрация, поиск, сортировка"""
+class ProductViewSet(ReplicaReadMixin, CatalogCacheMixin, FastReadMixin, viewsets.ModelViewSet):
+    """Фильтрация, поиск, сортировка; list/retrieve кэшируются до изменения каталога и читаются с реплики"""
     serializer_class = ProductSerializer
     permission_classes = [IsAdminUserOrReadOnly]
+    replica_actions = ("list", "retrieve", "facets")
+    replica_scopes = ("catalog",)
 
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ["price"]              # ?price=999.00
-    search_fields = ["name", "description"]   # ?search=phone
+    filter_backends = [DjangoFilterBackend, OrderingFilter, ProductSearchFilter]
+    filterset_class = ProductFilter           # ?price=999.00 | ?price_min=10&price_max=99 | ?name_prefix=pho
+    search_fields = ["name", "description"]   # ?search=phone | ?q=phone
     ordering_fields = ["price", "id", "name"] # ?ordering=price | -price
     ordering = ["id"]
 
+    @property
+    def paginator(self):
+        """?cursor= переключает список на keyset-пагинацию"""
+        request = getattr(self, "request", None)
+        if (
+            not hasattr(self, "_paginator")
+            and request is not None
+            and KeysetPagination.cursor_query_param in request.query_params
+        ):
+            self._paginator = KeysetPagination()
+        return super().paginator
+
     def get_queryset(self):
-        qs = Product.objects.all().order_by("id")
-        q = self.request.query_params.get("q")
-        if q:
-            qs = qs.filter(Q(name__icontains=q) | Q(description__icontains=q))
-        return qs
+        return Product.objects.defer("search_vector").order_by("id")
+
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        """Число товаров, min/max и гистограмма цен (?buckets=) для тех же ?q= и фильтров, что у списка"""
+        buckets = bucket_count(request)
+        key = facets_cache_key(request, self.filterset_class, buckets)
+        return Response(get_or_build(key, lambda: price_facets(self.filter_queryset(self.get_queryset()), buckets)))
 
 
 class CartViewSet(viewsets.ViewSet):
-    """Работа с корзиной текущего пользователя"""
+    """Работа с корзиной текущего пользователя; хранилище — CART_BACKEND (shop.carts)"""
     permission_classes = [IsAuthenticated]
+    throttle_scope = None  # задаётся изменяющим действиям
 
     def list(self, request):
-        items = CartItem.objects.filter(user=request.user).select_related("product")
-        return Response(CartItemSerializer(items, many=True).data)
+        store = get_cart_store()
+        if not store.in_database:
+            return Response(CartItemSerializer(store.items(request.user.id), many=True).data)
+        plan = get_plan(CartItemSerializer)
+        rows = plan.values(CartItem.objects.filter(user=request.user))
+        return Response(plan.dump_many(rows, MediaURLs()))
 
-    @action(detail=False, methods=["post"], permission_classes=[AllowAny])
+    async def alist(self, request):
+        if not get_cart_store().in_database:
+            return await sync_to_async(self.list)(request)
+        plan = get_plan(CartItemSerializer)
+        rows = plan.values(CartItem.objects.filter(user=request.user))
+        return Response(plan.dump_many([row async for row in rows.aiterator()], MediaURLs()))
+
+    @action(detail=False, methods=["post"], permission_classes=[AllowAny], throttle_scope="cart")
     def add(self, request):
         """Добавить товар в корзину"""
         serializer = AddToCartSerializer(data=request.data)
@@ -70,98 +113,186 @@ class CartViewSet(viewsets.ViewSet):
         product_id = serializer.validated_data["product_id"]
         quantity = serializer.validated_data["quantity"]
 
-        product = Product.objects.get(id=product_id)
-        item, _ = CartItem.objects.get_or_create(
-            user=request.user,
-            product=product,
-            defaults={"quantity": 0},
-        )
-        item.quantity += quantity
-        item.save()
+        item = get_cart_store().add(request.user.id, product_id, quantity)
+        if item is None:
+            raise ValidationError({"product_id": ["Товар с таким ID не найден."]})
 
         return Response(CartItemSerializer(item).data, status=status.HTTP_201_CREATED)
 
-    @action(detail=True, methods=["delete"], url_path="remove")
+    @action(detail=False, methods=["post"], throttle_scope="cart")
+    def batch(self, request):
+        """Пакетное изменение корзины: items (increment/set) и remove за одну транзакцию"""
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        increment = serializer.validated_data["mode"] == "increment"
+        remove = set(serializer.validated_data["remove"])
+
+        errors = []
+        quantities, positions = {}, {}
+        for index, raw in enumerate(serializer.validated_data["items"]):
+            item = CartBatchItemSerializer(data=raw)
+            if not item.is_valid():
+                errors.append({"index": index, "detail": item.errors})
+                continue
+            product_id = item.validated_data["product_id"]
+            quantity = item.validated_data["quantity"]
+            if product_id in remove:
+                errors.append({"index": index, "detail": {"product_id": ["Товар также указан в remove."]}})
+                continue
+            quantities[product_id] = quantities.get(product_id, 0) + quantity if increment else quantity
+            positions.setdefault(product_id, []).append(index)
+
+        known = set(Product.objects.filter(id__in=quantities).values_list("id", flat=True))
+        for product_id in set(quantities) - known:
+            del quantities[product_id]
+            errors.extend(
+                {"index": index, "detail": {"product_id": ["Товар с таким ID не найден."]}}
+                for index in positions[product_id]
+            )
+
+        store = get_cart_store()
+        store.update(request.user.id, quantities, increment, remove)
+        items = store.items(request.user.id)
+        return Response({
+            "items": CartItemSerializer(items, many=True).data,
+            "errors": sorted(errors, key=lambda e: e["index"]),
+        })
+
+    @action(detail=True, methods=["delete"], url_path="remove", throttle_scope="cart")
     def remove(self, request, pk=None):
-        try:
-            item = CartItem.objects.get(pk=pk, user=request.user)
-        except CartItem.DoesNotExist:
+        if not get_cart_store().remove_item(request.user.id, pk):
             return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
-        item.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    @action(detail=False, methods=["delete"], url_path=r"remove-by-product/(?P<product_id>\d+)")
+    @action(
+        detail=False, methods=["delete"], url_path=r"remove-by-product/(?P<product_id>\d+)", throttle_scope="cart"
+    )
     def remove_by_product(self, request, product_id=None):
-        deleted, _ = CartItem.objects.filter(user=request.user, product_id=product_id).delete()
-        if deleted == 0:
+        if not get_cart_store().remove_product(request.user.id, product_id):
             return Response({"detail": "В корзине нет такого товара"}, status=status.HTTP_404_NOT_FOUND)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class OrderViewSet(viewsets.ViewSet):
+HISTORY_FIELDS = ("id", "total", "created_at", "item_count", "items_snapshot")
+
+
+class OrderViewSet(ReplicaReadMixin, viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
+    throttle_scope = None
+    replica_actions = ("my",)
+    lookup_value_regex = r"\d+"  # /api/orders/abc/ — 404 на уровне URL, а не ValueError в filter(pk=...)
 
-    @action(detail=False, methods=["post"])
-    @transaction.atomic
+    @action(detail=False, methods=["post"], throttle_scope="checkout")
     def create_order(self, request):
         """Создать заказ из всех позиций корзины"""
-        items = (
-            CartItem.objects
-            .select_for_update()
-            .filter(user=request.user)
-            .select_related("product")
-        )
-        if not items.exists():
+        order = get_cart_store().checkout(request.user)
+        if order is None:
             return Response({"detail": "Cart is empty"}, status=status.HTTP_400_BAD_REQUEST)
 
-        order = Order.objects.create(user=request.user, total=Decimal("0"))
-        total = Decimal("0")
-        bulk_items = []
+        order = (
+            Order.objects
+            .prefetch_related(Prefetch("items", queryset=OrderItem.objects.select_related("product")))
+            .get(pk=order.pk)
+        )
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        """Заказ текущего пользователя (из снимка, без JOIN); ?archive=1 — искать и в архиве"""
+        order = Order.objects.filter(user=request.user, pk=pk).only(*HISTORY_FIELDS).first()
+        if order is None and self._with_archive(request):
+            order = ArchivedOrder.objects.filter(user=request.user, pk=pk).only(*HISTORY_FIELDS).first()
+        if order is None:
+            return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(order_history([order])[0])
 
-        for it in items:
-            price = it.product.price
-            total += price * it.quantity
-            bulk_items.append(
-                OrderItem(order=order, product=it.product, price=price, quantity=it.quantity)
-            )
+    @action(detail=False, methods=["get"])
+    def my(self, request):
+        """
+        Список заказов текущего пользователя (из снимков, без JOIN).
 
-        OrderItem.objects.bulk_create(bulk_items)
-        order.total = total
-        order.save()
-        items.delete()
+        Сначала читаются партиции последних ORDER_RECENT_MONTHS месяцев, более старые —
+        только если страница не набрана; архив — только с ?archive=1.
+        """
+        orders = Order.objects.filter(user=request.user).only(*HISTORY_FIELDS).order_by("-id")
+        recent = recent_months_start(settings.ORDER_RECENT_MONTHS)
+        tiers = [orders.filter(created_at__gte=recent), orders.filter(created_at__lt=recent)]
+        if self._with_archive(request):
+            tiers.append(ArchivedOrder.objects.filter(user=request.user).only(*HISTORY_FIELDS).order_by("-id"))
+        paginator = KeysetPagination()
+        page = paginator.paginate_querysets(tiers, request, view=self)
+        return paginator.get_paginated_response(order_history(page))
 
-        try:
-            send_order_notification.delay(order.id, request.user.username, str(total))
-        except Exception:
-            pass
+    @staticmethod
+    def _with_archive(request):
+        return request.query_params.get("archive", "").lower() in ("1", "true", "yes")
 
-        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
 
-    @action(detail=False, methods=["get"])
-    def my(self, request):
-        """Список заказов текущего пользователя"""
-        orders = (
-            Order.objects.filter(user=request.user)
-            .prefetch_related("items__product")
-            .order_by("-id")
+PERIODS = {"day": F("day"), "week": TruncWeek("day"), "month": TruncMonth("day")}
+
+
+class SalesReportViewSet(ReplicaReadMixin, viewsets.ViewSet):
+    """
+    Отчёты о продажах для staff только по дневным агрегатам (shop.rollups), без OrderItem.
+    Данные отстают на ROLLUP_LAG_SEC плюс период задачи update_sales_rollups.
+    """
+    permission_classes = [IsAdminUser]
+    replica_actions = ("top_sellers", "revenue")
+
+    @action(detail=False, methods=["get"], url_path="top-sellers")
+    def top_sellers(self, request):
+        """Самые продаваемые товары за ?start=..?end= (по ?by=revenue|units, ?limit=)"""
+        params = self._params(request)
+        rows = (
+            ProductDailySales.objects
+            .filter(day__range=(params["start"], params["end"]))
+            .values("product_id", "product__name")
+            .annotate(units=Sum("units"), revenue=Sum("revenue"), order_count=Sum("order_count"))
+            .order_by(f"-{params['by']}", "product_id")[:params["limit"]]
         )
+        return Response({
+            "start": params["start"],
+            "end": params["end"],
+            "results": [
+                {
+                    "product_id": row["product_id"],
+                    "product_name": row["product__name"],
+                    "units": row["units"],
+                    "revenue": f"{row['revenue']:.2f}",  # SQLite теряет масштаб Decimal
+                    "order_count": row["order_count"],
+                }
+                for row in rows
+            ],
+        })
 
-        data = []
-        for o in orders:
-            data.append(
+    @action(detail=False, methods=["get"])
+    def revenue(self, request):
+        """Выручка, штуки и заказы по ?interval=day|week|month за ?start=..?end="""
+        params = self._params(request)
+        rows = (
+            DailySales.objects
+            .filter(day__range=(params["start"], params["end"]))
+            .annotate(period=PERIODS[params["interval"]])
+            .values("period")
+            .annotate(units=Sum("units"), revenue=Sum("revenue"), order_count=Sum("order_count"))
+            .order_by("period")
+        )
+        return Response({
+            "start": params["start"],
+            "end": params["end"],
+            "interval": params["interval"],
+            "results": [
                 {
-                    "id": o.id,
-                    "total": str(o.total),
-                    "created_at": o.created_at.isoformat() if o.created_at else None,
-                    "items": [
-                        {
-                            "product_id": it.product_id,
-                            "product_name": it.product.name,
-                            "price": str(it.price),
-                            "quantity": it.quantity,
-                        }
-                        for it in o.items.all()
-                    ],
+                    "period": row["period"],
+                    "units": row["units"],
+                    "revenue": f"{row['revenue']:.2f}",
+                    "order_count": row["order_count"],
                 }
-            )
-        return Response(data)
+                for row in rows
+            ],
+        })
+
+    @staticmethod
+    def _params(request):
+        serializer = SalesReportQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data